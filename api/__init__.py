@@ -0,0 +1,8 @@
+from .bulk import register_bulk_api
+from .associations import register_association_bulk_api
+from .pagination import register_keyset_pagination
+from .export import register_export_api
+from .render import register_render_api
+from .operations import register_operations_api
+from .network import register_network_api
+from .bake import register_bake_api
@@ -0,0 +1,81 @@
+from flask import request
+from sqlalchemy import tuple_
+from sqlalchemy.exc import SQLAlchemyError
+
+from api.bulk import BATCH_SIZE, BulkLoadError, batched, iter_request_resources, jsonapi_error, jsonapi_response
+from db import db
+
+
+class AssociationBulkLoader:
+    """Adds or removes many (owner, item) rows of a many-to-many table in one transaction.
+
+    Each resource carries the two foreign keys of the association table as
+    attributes, e.g. ``{"type": "services_repos", "attributes":
+    {"service_id": ..., "repo_id": ...}}``.
+    """
+
+    def __init__(self, table, collection_name):
+        self.table = table
+        self.collection_name = collection_name
+        self.owner_column, self.item_column = [column for column in table.columns if column.foreign_keys]
+        self.key = tuple_(self.owner_column, self.item_column)
+
+    def pair(self, resource, index):
+        attributes = resource.get('attributes', {})
+        resource_type = resource.get('type', self.collection_name)
+        if resource_type != self.collection_name:
+            raise BulkLoadError("resource type '%s' does not match collection '%s'"
+                                % (resource_type, self.collection_name), index)
+        try:
+            return attributes[self.owner_column.name], attributes[self.item_column.name]
+        except KeyError as e:
+            raise BulkLoadError("missing attribute %s for '%s'" % (e, self.collection_name), index)
+
+    def pairs(self, batch, start):
+        # dict keeps the first occurrence of each pair and the request order
+        return list(dict.fromkeys(self.pair(resource, start + offset) for offset, resource in enumerate(batch)))
+
+    def existing(self, connection, pairs):
+        query = db.select(self.owner_column, self.item_column).where(self.key.in_(pairs))
+        return set(tuple(row) for row in connection.execute(query))
+
+    def add(self, resources):
+        connection = db.session.connection()
+        added = skipped = 0
+        for start, batch in enumerate(batched(resources, BATCH_SIZE)):
+            pairs = self.pairs(batch, start * BATCH_SIZE)
+            present = self.existing(connection, pairs)
+            missing = [{self.owner_column.name: owner, self.item_column.name: item}
+                       for owner, item in pairs if (owner, item) not in present]
+            if missing:
+                connection.execute(self.table.insert(), missing)
+            added += len(missing)
+            skipped += len(pairs) - len(missing)
+        return {'added': added, 'skipped': skipped}
+
+    def remove(self, resources):
+        connection = db.session.connection()
+        removed = 0
+        for start, batch in enumerate(batched(resources, BATCH_SIZE)):
+            pairs = self.pairs(batch, start * BATCH_SIZE)
+            removed += connection.execute(self.table.delete().where(self.key.in_(pairs))).rowcount
+        return {'removed': removed}
+
+    def dispatch(self):
+        operation = self.add if request.method == 'POST' else self.remove
+        try:
+            meta = operation(iter_request_resources())
+            db.session.commit()
+        except BulkLoadError as e:
+            db.session.rollback()
+            return jsonapi_error(400, 'resource %d: %s' % (e.index, e))
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return jsonapi_error(400, str(e))
+        return jsonapi_response({'meta': meta})
+
+
+def register_association_bulk_api(app, table, url_prefix):
+    loader = AssociationBulkLoader(table, table.name)
+    app.add_url_rule('%s/%s/_bulk' % (url_prefix, table.name), endpoint='%s_bulk' % table.name,
+                     view_func=loader.dispatch, methods=['POST', 'DELETE'])
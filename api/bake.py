@@ -0,0 +1,56 @@
+from flask import request
+from sqlalchemy.orm import joinedload, selectinload
+
+from api.bulk import jsonapi_error, jsonapi_response
+from db import db
+from models import Build, Deployment, DeploymentConfig, Service, ServiceConfig
+
+
+class BakeContext:
+    """Everything a bake of one deployment reads, in one response.
+
+    The deployment is the primary data.  Its deployment target, its configs,
+    the service's configs and repos and, with ``?build=``, the build come
+    back as ``included`` resources, all read with eager loads in a handful of
+    queries, instead of one request each from the baker.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    @staticmethod
+    def deployment(deployment_id):
+        service = joinedload(Deployment.service)
+        return db.session.query(Deployment).options(
+            joinedload(Deployment.deployment_target),
+            selectinload(Deployment.configs).joinedload(DeploymentConfig.template),
+            service.selectinload(Service.configs).joinedload(ServiceConfig.template),
+            service.selectinload(Service.repos),
+        ).filter(Deployment.id == deployment_id).one_or_none()
+
+    def serialize(self, instance):
+        return self.manager.serializer_for(type(instance)).serialize(instance)
+
+    def dispatch(self, deployment_id):
+        deployment = self.deployment(deployment_id)
+        if deployment is None:
+            return jsonapi_error(404, 'No deployment with id %s' % deployment_id)
+        included = [deployment.deployment_target]
+        build_id = request.args.get('build')
+        if build_id:
+            build = db.session.get(Build, build_id)
+            if build is None:
+                return jsonapi_error(404, 'No build with id %s' % build_id)
+            if build.service_id != deployment.service_id:
+                return jsonapi_error(400, 'build %s is for service %s, not %s' % (build.id, build.service_id,
+                                                                                  deployment.service_id))
+            included.append(build)
+        included += deployment.configs + deployment.service.configs + deployment.service.repos
+        document = {'data': self.serialize(deployment), 'included': [self.serialize(x) for x in included],
+                    'jsonapi': {'version': '1.0'}}
+        return jsonapi_response(document)
+
+
+def register_bake_api(app, manager, url_prefix='/api/bake/v1'):
+    context = BakeContext(manager)
+    app.add_url_rule('%s/context/<deployment_id>' % url_prefix, endpoint='bake_context', view_func=context.dispatch)
@@ -0,0 +1,170 @@
+import json
+from itertools import islice
+
+from flask import request, Response
+from sqlalchemy import inspect
+from sqlalchemy.exc import SQLAlchemyError
+
+from db import db
+
+JSONAPI_MIMETYPE = 'application/vnd.api+json'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# number of resources handed to a single flush; the ORM turns each flush
+# into batched multi-row INSERTs per table
+BATCH_SIZE = 1000
+
+
+class BulkLoadError(ValueError):
+
+    def __init__(self, message, index=None):
+        super().__init__(message)
+        self.index = index
+
+
+def jsonapi_response(document, status=200):
+    return Response(json.dumps(document), status=status, mimetype=JSONAPI_MIMETYPE)
+
+
+def jsonapi_error(status, detail):
+    return jsonapi_response({'errors': [{'status': str(status), 'detail': detail}]}, status=status)
+
+
+def is_truthy(value):
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def sparse_fieldset(collection_name):
+    """Returns the JSON:API ``fields[<type>]`` of the request as a set, or None."""
+    fields = request.args.get('fields[%s]' % collection_name)
+    return set(fields.split(',')) if fields else None
+
+
+def iter_request_resources():
+    """Yield JSON:API resource objects from the request body.
+
+    Accepts a JSON:API document with a ``data`` array, a bare JSON array, or
+    an NDJSON stream with one resource per line.  Resources may be wrapped in
+    their own ``{"data": {...}}`` document, which is how the fixture files
+    store them.
+    """
+    if request.mimetype == NDJSON_MIMETYPE:
+        for line in request.stream:
+            line = line.strip()
+            if line:
+                yield __unwrap__(json.loads(line))
+    else:
+        document = request.get_json(force=True)
+        if isinstance(document, dict):
+            document = document.get('data', [])
+        for resource in document:
+            yield __unwrap__(resource)
+
+
+def __unwrap__(resource):
+    if 'data' in resource and 'attributes' not in resource:
+        return resource['data']
+    return resource
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class BulkLoader:
+    """Inserts or upserts many resources of one model in a single transaction."""
+
+    def __init__(self, model_class, collection_name):
+        self.model_class = model_class
+        self.collection_name = collection_name
+        self.mapper = inspect(model_class)
+        self.columns = {prop.key for prop in self.mapper.column_attrs}
+
+    def build(self, resource, index):
+        resource_type = resource.get('type', self.collection_name)
+        if resource_type != self.collection_name:
+            raise BulkLoadError("resource type '%s' does not match collection '%s'"
+                                % (resource_type, self.collection_name), index)
+        attributes = dict(resource.get('attributes', {}))
+        if resource.get('id') is not None:
+            attributes['id'] = resource['id']
+        for name, relationship in resource.get('relationships', {}).items():
+            attributes.update(self.__linkage_to_columns__(name, relationship, index))
+        unknown = set(attributes) - self.columns
+        if unknown:
+            raise BulkLoadError("unknown attribute(s) %s for '%s'" % (sorted(unknown), self.collection_name), index)
+        return self.model_class(**attributes), attributes
+
+    def __linkage_to_columns__(self, name, relationship, index):
+        prop = self.mapper.relationships.get(name)
+        linkage = relationship.get('data') if isinstance(relationship, dict) else None
+        if prop is None or prop.uselist or not isinstance(linkage, dict) or len(prop.local_columns) != 1:
+            raise BulkLoadError("relationship '%s' must be a to-one resource linkage" % name, index)
+        column = next(iter(prop.local_columns))
+        return {self.mapper.get_property_by_column(column).key: linkage['id']}
+
+    def derive_id(self, instance, connection):
+        # ids are composed in before_insert listeners (e.g. Deployment.__update_id__);
+        # firing them up front lets an upsert find existing rows before the flush
+        self.mapper.dispatch.before_insert(self.mapper, connection, inspect(instance))
+        return instance.id
+
+    def load(self, resources, upsert=False):
+        session = db.session
+        connection = session.connection()
+        created = updated = 0
+        identifiers = []
+        for start, batch in enumerate(batched(resources, BATCH_SIZE)):
+            built = [self.build(resource, start * BATCH_SIZE + offset) for offset, resource in enumerate(batch)]
+            existing = dict()
+            if upsert:
+                ids = [self.derive_id(instance, connection) for instance, attributes in built]
+                existing = {row.id: row for row in
+                            session.query(self.model_class).filter(self.model_class.id.in_(ids))}
+            loaded = []
+            for instance, attributes in built:
+                current = existing.get(instance.id) if upsert else None
+                if current is not None:
+                    for key, value in attributes.items():
+                        setattr(current, key, value)
+                    updated += 1
+                else:
+                    session.add(instance)
+                    if upsert:
+                        existing[instance.id] = instance
+                    current = instance
+                    created += 1
+                loaded.append(current)
+            session.flush()
+            identifiers.extend({'type': self.collection_name, 'id': instance.id} for instance in loaded)
+            # keep the identity map from growing with the size of the load
+            session.expunge_all()
+        return identifiers, created, updated
+
+    def dispatch(self):
+        upsert = is_truthy(request.args.get('upsert', False))
+        try:
+            identifiers, created, updated = self.load(iter_request_resources(), upsert=upsert)
+            db.session.commit()
+        except BulkLoadError as e:
+            db.session.rollback()
+            detail = str(e) if e.index is None else 'resource %d: %s' % (e.index, e)
+            return jsonapi_error(400, detail)
+        except (SQLAlchemyError, AssertionError, TypeError, ValueError) as e:
+            db.session.rollback()
+            return jsonapi_error(400, str(e))
+        meta = {'created': created, 'updated': updated, 'total': created + updated}
+        return jsonapi_response({'data': identifiers, 'meta': meta}, status=201)
+
+
+def register_bulk_api(app, model_class, url_prefix, collection_name=None):
+    if collection_name is None:
+        collection_name = model_class.__table__.name
+    loader = BulkLoader(model_class, collection_name)
+    app.add_url_rule('%s/%s/_bulk' % (url_prefix, collection_name), endpoint='%s_bulk' % collection_name,
+                     view_func=loader.dispatch, methods=['POST'])
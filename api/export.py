@@ -0,0 +1,84 @@
+import hashlib
+import json
+
+from flask import Response, request, stream_with_context
+from flask_restless.exceptions import BadRequest
+from flask_restless.search import search
+from flask_restless.views.base import collection_parameters
+from sqlalchemy import func, inspect, select
+from sqlalchemy.orm import selectinload
+
+from api.bulk import NDJSON_MIMETYPE, jsonapi_error, sparse_fieldset
+from db import db
+
+# rows fetched per round trip from the server-side cursor
+YIELD_PER = 1000
+
+
+class CollectionExporter:
+    """Streams a whole collection as NDJSON, one JSON:API resource object per line.
+
+    Rows come from a server-side cursor ``YIELD_PER`` at a time and are written
+    to a chunked response as they are serialized, so memory stays flat
+    whatever the size of the table.  ``filter[objects]``, ``sort`` and
+    ``fields[<type>]`` behave as they do on the REST API.  To-many
+    relationships are loaded per batch with one IN query each, as identifiers
+    only.
+
+    Responses carry a weak ETag derived from the row count and the newest
+    ``created_at``/``last_updated_at`` of the selection, so a client holding a
+    copy can revalidate with ``If-None-Match`` and get a bodiless 304.
+    """
+
+    def __init__(self, manager, model_class, collection_name):
+        self.manager = manager
+        self.model_class = model_class
+        self.collection_name = collection_name
+        self.mapper = inspect(model_class)
+
+    def eager_loads(self, serializer, only):
+        relations = serializer.relationship_columns if only is None else serializer.relationship_columns & only
+        loads = []
+        # many-to-one linkage is read from the foreign key column, everything else would lazy load per row
+        for name in relations - serializer.many_to_one_relationships:
+            target = self.mapper.relationships[name].mapper
+            loads.append(selectinload(getattr(self.model_class, name))
+                         .load_only(*[getattr(target.class_, column.key) for column in target.primary_key]))
+        return loads
+
+    def etag(self, query):
+        table = self.model_class.__table__
+        subquery = query.with_entities(*table.columns).order_by(None).subquery()
+        columns = [func.count()] + [func.max(subquery.c[name]) for name in ('created_at', 'last_updated_at')
+                                    if name in subquery.c]
+        version = db.session.execute(select(*columns).select_from(subquery)).one()
+        return hashlib.sha1(request.query_string + repr(tuple(version)).encode()).hexdigest()
+
+    def lines(self, query, serializer, only):
+        for instance in query:
+            yield json.dumps(serializer.serialize(instance, only=only)) + '\n'
+
+    def dispatch(self):
+        serializer = self.manager.serializer_for(self.model_class)
+        only = sparse_fieldset(self.collection_name)
+        try:
+            filters, sort = collection_parameters()
+            query = search(db.session, self.model_class, filters, sort)
+        except BadRequest as e:
+            return jsonapi_error(400, e.details)
+        etag = self.etag(query)
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            query = query.options(*self.eager_loads(serializer, only)).yield_per(YIELD_PER)
+            response = Response(stream_with_context(self.lines(query, serializer, only)), mimetype=NDJSON_MIMETYPE)
+        response.set_etag(etag, weak=True)
+        return response
+
+
+def register_export_api(app, manager, model_class, url_prefix, collection_name=None):
+    if collection_name is None:
+        collection_name = model_class.__table__.name
+    exporter = CollectionExporter(manager, model_class, collection_name)
+    app.add_url_rule('%s/%s.ndjson' % (url_prefix, collection_name), endpoint='%s_export' % collection_name,
+                     view_func=exporter.dispatch, methods=['GET'])
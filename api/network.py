@@ -0,0 +1,187 @@
+import ipaddress as ip
+
+from flask import request
+from sqlalchemy import cast, func, select
+from sqlalchemy.dialects.postgresql import CIDR, INET
+from sqlalchemy.exc import SQLAlchemyError
+
+from api.bulk import jsonapi_error, jsonapi_response
+from db import db
+from models import Network, Subnet
+from models.subnet import SubnetUnavailableError
+
+
+class FreeList:
+    """The unallocated ranges of a network as sorted, disjoint ``[start, end)`` integer intervals.
+
+    Built once from the network's subnets in address order, so finding room
+    for a block never enumerates candidate subnets.  Allocating carves the
+    block out of its interval in place, which lets one locked transaction
+    hand out many subnets.
+    """
+
+    def __init__(self, network, used=()):
+        self.network_class = type(network)
+        self.max_prefixlen = network.max_prefixlen
+        self.starts, self.ends = [], []
+        position, end = int(network.network_address), int(network.broadcast_address) + 1
+        for cidr in used:
+            lo, hi = int(cidr.network_address), int(cidr.broadcast_address) + 1
+            if lo > position:
+                self.starts.append(position)
+                self.ends.append(min(lo, end))
+            position = max(position, hi)
+        if position < end:
+            self.starts.append(position)
+            self.ends.append(end)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def allocate(self, prefixlen):
+        """Carves out the lowest free block of ``prefixlen``, the same one the old client-side search picked."""
+        size = 1 << (self.max_prefixlen - prefixlen)
+        for i, (start, end) in enumerate(self):
+            aligned = -(-start // size) * size
+            if aligned + size <= end:
+                self.__carve__(i, aligned, aligned + size)
+                return self.network_class((aligned, prefixlen))
+        raise SubnetUnavailableError('No free /%d left' % prefixlen, [])
+
+    def __carve__(self, i, lo, hi):
+        start, end = self.starts[i], self.ends[i]
+        pieces = [(s, e) for s, e in ((start, lo), (hi, end)) if s < e]
+        self.starts[i:i + 1] = [s for s, _ in pieces]
+        self.ends[i:i + 1] = [e for _, e in pieces]
+
+
+class SubnetAllocator:
+    """Allocates subnets of a network on the server, under a row lock on the network.
+
+    Concurrent callers serialise on ``SELECT ... FOR UPDATE`` of the network
+    row, read its subnets in address order into a :class:`FreeList` and
+    insert what they carved out before the lock is released, so two runs can
+    no longer be handed the same CIDR.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    @staticmethod
+    def free_list(network):
+        used = db.session.scalars(select(Subnet.cidr).where(Subnet.network_id == network.id).order_by(Subnet.cidr))
+        return FreeList(ip.ip_network(network.cidr), (ip.ip_network(x) for x in used))
+
+    def allocate(self, network_id, additional_mask_bits, names):
+        network = db.session.query(Network).filter(Network.id == network_id).with_for_update().one_or_none()
+        if network is None:
+            return None
+        cidr = ip.ip_network(network.cidr)
+        if not 0 < additional_mask_bits <= cidr.max_prefixlen - cidr.prefixlen:
+            raise ValueError('additional_mask_bits must be between 1 and %d' % (cidr.max_prefixlen - cidr.prefixlen))
+        free = self.free_list(network)
+        prefixlen = cidr.prefixlen + additional_mask_bits
+        subnets = [Subnet(network_id=network_id, name=name, cidr=str(free.allocate(prefixlen))) for name in names]
+        db.session.add_all(subnets)
+        db.session.flush()
+        return subnets
+
+    def dispatch(self, network_id):
+        body = request.get_json(force=True, silent=True) or {}
+        names = body.get('names') or ([body['name']] if body.get('name') else [])
+        if not names:
+            return jsonapi_error(400, 'name or names is required')
+        try:
+            additional_mask_bits = int(body.get('additional_mask_bits'))
+        except (TypeError, ValueError):
+            return jsonapi_error(400, 'additional_mask_bits must be an integer')
+        try:
+            subnets = self.allocate(network_id, additional_mask_bits, names)
+            if subnets is None:
+                return jsonapi_error(404, 'No network with id %s' % network_id)
+            db.session.commit()
+        except ValueError as e:
+            db.session.rollback()
+            return jsonapi_error(400, str(e))
+        except SubnetUnavailableError as e:
+            db.session.rollback()
+            return jsonapi_error(409, str(e))
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return jsonapi_error(409, str(getattr(e, 'orig', None) or e))
+        serializer = self.manager.serializer_for(Subnet)
+        data = [serializer.serialize(x) for x in subnets]
+        # a single name keeps the shape of a plain subnet create
+        document = {'data': data if 'names' in body else data[0], 'jsonapi': {'version': '1.0'}}
+        return jsonapi_response(document, status=201)
+
+
+class CidrQueries:
+    """Address lookups answered by Postgres ``inet`` operators.
+
+    ``>>=`` (contains or equals) and ``&&`` (overlaps) are both served by the
+    GiST ``inet_ops`` indexes on ``network.cidr`` and ``subnet.cidr``, so
+    finding the owner of an address is an index probe however many subnets
+    there are.  Matches come back most specific first.
+    """
+
+    def __init__(self, manager, model_class):
+        self.manager = manager
+        self.model_class = model_class
+
+    def __respond__(self, condition):
+        cidr = self.model_class.cidr
+        rows = db.session.scalars(select(self.model_class).where(condition)
+                                  .order_by(func.masklen(cidr).desc(), cidr, self.model_class.id))
+        serializer = self.manager.serializer_for(self.model_class)
+        return jsonapi_response({'data': [serializer.serialize(x) for x in rows], 'jsonapi': {'version': '1.0'}})
+
+    def contains(self):
+        try:
+            address = ip.ip_address(request.args.get('ip', ''))
+        except ValueError:
+            return jsonapi_error(400, 'ip must be an IP address')
+        return self.__respond__(self.model_class.cidr.op('>>=')(cast(str(address), INET)))
+
+    def overlaps(self):
+        try:
+            cidr = ip.ip_network(request.args.get('cidr', ''))
+        except ValueError:
+            return jsonapi_error(400, 'cidr must be a network address, without host bits set')
+        return self.__respond__(self.model_class.cidr.op('&&')(cast(str(cidr), CIDR)))
+
+
+def free_blocks(network_id):
+    """The free space of a network that can hold a ``/prefixlen``, as the largest aligned CIDR blocks."""
+    network = db.session.get(Network, network_id)
+    if network is None:
+        return jsonapi_error(404, 'No network with id %s' % network_id)
+    cidr = ip.ip_network(network.cidr)
+    try:
+        prefixlen = int(request.args.get('prefixlen', ''))
+    except ValueError:
+        return jsonapi_error(400, 'prefixlen must be an integer')
+    if not cidr.prefixlen <= prefixlen <= cidr.max_prefixlen:
+        return jsonapi_error(400, 'prefixlen must be between %d and %d' % (cidr.prefixlen, cidr.max_prefixlen))
+    address = type(cidr.network_address)
+    data = []
+    for start, end in SubnetAllocator.free_list(network):
+        for block in ip.summarize_address_range(address(start), address(end - 1)):
+            if block.prefixlen <= prefixlen:
+                data.append({'type': 'free_block', 'id': str(block),
+                             'attributes': {'cidr': str(block), 'capacity': 1 << (prefixlen - block.prefixlen)}})
+    meta = {'prefixlen': prefixlen, 'capacity': sum(x['attributes']['capacity'] for x in data)}
+    return jsonapi_response({'data': data, 'meta': meta, 'jsonapi': {'version': '1.0'}})
+
+
+def register_network_api(app, manager, url_prefix='/api/net/v1'):
+    allocator = SubnetAllocator(manager)
+    app.add_url_rule('%s/network/<network_id>/allocate' % url_prefix, endpoint='network_allocate',
+                     view_func=allocator.dispatch, methods=['POST'])
+    app.add_url_rule('%s/network/<network_id>/free' % url_prefix, endpoint='network_free', view_func=free_blocks)
+    for collection_name, model_class in (('network', Network), ('subnet', Subnet)):
+        queries = CidrQueries(manager, model_class)
+        app.add_url_rule('%s/%s/_contains' % (url_prefix, collection_name), endpoint='%s_contains' % collection_name,
+                         view_func=queries.contains)
+        app.add_url_rule('%s/%s/_overlaps' % (url_prefix, collection_name), endpoint='%s_overlaps' % collection_name,
+                         view_func=queries.overlaps)
@@ -0,0 +1,200 @@
+from flask import request
+from flask_restless.exceptions import BadRequest
+from flask_restless.search import search
+from sqlalchemy import String, cast, delete, insert, literal, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from api.bulk import is_truthy, jsonapi_error, jsonapi_response
+from db import db
+from models import Allocation, Build, Deployment, DeploymentConfig, DeploymentProc, Release
+from models.associations import deployment_current_release
+
+
+def __id__(*parts):
+    """The SQL expression joining ``parts`` with ':' the way the models' before_insert listeners build ids."""
+    expression = parts[0]
+    for part in parts[1:]:
+        expression = expression + literal(':') + part
+    return expression
+
+
+class DeploymentCloner:
+    """Copies a deployment onto another deployment target in one transaction.
+
+    The deployment, its configs, its deployment procs and their allocations
+    are each copied with a single ``INSERT ... SELECT``, so a clone costs four
+    statements whatever the size of the service, and a failure leaves nothing
+    behind.  Ids are derived in SQL the same way the models' listeners derive
+    them.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def clone(self, deployment_id, deployment_target_id, tag=None):
+        source = db.session.get(Deployment, deployment_id)
+        if source is None:
+            return None, None
+        tag = source.tag if tag is None else tag
+        new_id = '%s:%s:%s' % (deployment_target_id, source.service_id, tag)
+        new = literal(new_id)
+
+        db.session.execute(insert(Deployment).from_select(
+            ['id', 'deployment_target_id', 'service_id', 'tag', 'defaults'],
+            select(new, literal(deployment_target_id), Deployment.service_id, literal(tag), Deployment.defaults)
+            .where(Deployment.id == deployment_id)))
+
+        configs = db.session.execute(insert(DeploymentConfig).from_select(
+            ['id', 'config_template_id', 'deployment_id', 'name', 'tag', 'config', 'defaults'],
+            select(__id__(new, DeploymentConfig.config_template_id, DeploymentConfig.name, DeploymentConfig.tag),
+                   DeploymentConfig.config_template_id, new, DeploymentConfig.name, DeploymentConfig.tag,
+                   DeploymentConfig.config, DeploymentConfig.defaults)
+            .where(DeploymentConfig.deployment_id == deployment_id))).rowcount
+
+        procs = db.session.execute(insert(DeploymentProc).from_select(
+            ['id', 'deployment_id', 'proc_id', 'defaults'],
+            select(__id__(new, DeploymentProc.proc_id), new, DeploymentProc.proc_id, DeploymentProc.defaults)
+            .where(DeploymentProc.deployment_id == deployment_id))).rowcount
+
+        new_proc_id = __id__(new, DeploymentProc.proc_id)
+        allocations = db.session.execute(insert(Allocation).from_select(
+            ['id', 'value', 'allocation_type_id', 'deployment_proc_id', 'watermark', 'defaults'],
+            select(__id__(new_proc_id, Allocation.allocation_type_id, cast(Allocation.watermark, String)),
+                   Allocation.value, Allocation.allocation_type_id, new_proc_id, Allocation.watermark,
+                   Allocation.defaults)
+            .join(DeploymentProc, Allocation.deployment_proc_id == DeploymentProc.id)
+            .where(DeploymentProc.deployment_id == deployment_id))).rowcount
+
+        return new_id, {'configs': configs, 'deployment_procs': procs, 'allocations': allocations}
+
+    def dispatch(self, deployment_id):
+        body = request.get_json(force=True, silent=True) or {}
+        deployment_target_id = body.get('deployment_target_id')
+        if not deployment_target_id:
+            return jsonapi_error(400, 'deployment_target_id is required')
+        try:
+            new_id, meta = self.clone(deployment_id, deployment_target_id, body.get('tag'))
+            if new_id is None:
+                return jsonapi_error(404, 'No deployment with id %s' % deployment_id)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return jsonapi_error(409, str(getattr(e, 'orig', None) or e))
+        serializer = self.manager.serializer_for(Deployment)
+        document = {'data': serializer.serialize(db.session.get(Deployment, new_id)), 'meta': meta,
+                    'jsonapi': {'version': '1.0'}}
+        return jsonapi_response(document, status=201)
+
+
+class PromotionError(ValueError):
+    pass
+
+
+class DeploymentPromoter:
+    """Moves ``current_release`` of every deployment matching a filter to one build.
+
+    The build comes from the current release of a ``source`` deployment, or
+    is named directly with ``build_id``.  Destinations are selected with
+    Flask-Restless filter objects over deployments.  Each destination is
+    pointed at its own release of the build, ``<deployment_id>:<build_num>``,
+    which is created where it does not exist yet.  The whole set moves in one
+    transaction with a handful of set-based statements; ``dry_run`` reports
+    the same per-target results without writing anything.
+    """
+
+    def __init__(self, source=None, build_id=None, filters=None, dry_run=False):
+        self.source = source
+        self.build_id = build_id
+        self.filters = filters or []
+        self.dry_run = dry_run
+
+    def build(self):
+        if self.build_id is not None:
+            build = db.session.get(Build, self.build_id)
+            if build is None:
+                raise PromotionError('No build with id %s' % self.build_id)
+            return build
+        source = db.session.get(Deployment, self.source)
+        if source is None:
+            raise PromotionError('No deployment with id %s' % self.source)
+        if source.current_release is None:
+            raise PromotionError('Deployment %s has no current release' % self.source)
+        return source.current_release.build
+
+    def targets(self):
+        """Returns (deployment id, service id, current release id) of every destination."""
+        if not self.filters:
+            raise PromotionError('A destination filter is required')
+        ids = search(db.session, Deployment, self.filters).with_entities(Deployment.id).subquery()
+        return db.session.execute(
+            select(Deployment.id, Deployment.service_id, deployment_current_release.c.release_id)
+            .outerjoin(deployment_current_release, deployment_current_release.c.deployment_id == Deployment.id)
+            .where(Deployment.id.in_(select(ids.c.id)), Deployment.id != self.source)
+            .order_by(Deployment.id)).all()
+
+    def promote(self):
+        build = self.build()
+        targets = self.targets()
+        wanted = {deployment_id: '%s:%s' % (deployment_id, build.build_num) for deployment_id, _, _ in targets}
+        existing = set(db.session.scalars(select(Release.id).where(Release.id.in_(list(wanted.values())))))
+
+        results, moves = [], []
+        for deployment_id, service_id, current in targets:
+            release_id = wanted[deployment_id]
+            result = {'deployment_id': deployment_id, 'from_release': current, 'to_release': release_id,
+                      'release_created': False}
+            if service_id != build.service_id:
+                result.update(status='skipped', to_release=None,
+                              reason='build %s is for service %s' % (build.id, build.service_id))
+            elif current == release_id:
+                result['status'] = 'unchanged'
+            else:
+                result.update(status='promoted', release_created=release_id not in existing)
+                moves.append(result)
+            results.append(result)
+
+        if moves and not self.dry_run:
+            created = [{'id': x['to_release'], 'deployment_id': x['deployment_id'], 'build_id': build.id,
+                        'build_num': build.build_num} for x in moves if x['release_created']]
+            if created:
+                db.session.execute(insert(Release), created)
+            moved = [x['deployment_id'] for x in moves]
+            db.session.execute(delete(deployment_current_release)
+                               .where(deployment_current_release.c.deployment_id.in_(moved)))
+            db.session.execute(insert(deployment_current_release),
+                               [{'deployment_id': x['deployment_id'], 'release_id': x['to_release']} for x in moves])
+        return build, results
+
+    @staticmethod
+    def dispatch():
+        body = request.get_json(force=True, silent=True) or {}
+        promoter = DeploymentPromoter(body.get('source'), body.get('build_id'), body.get('filter'),
+                                      is_truthy(body.get('dry_run', False)))
+        try:
+            build, results = promoter.promote()
+            if promoter.dry_run:
+                db.session.rollback()
+            else:
+                db.session.commit()
+        except PromotionError as e:
+            db.session.rollback()
+            return jsonapi_error(400, str(e))
+        except BadRequest as e:
+            db.session.rollback()
+            return jsonapi_error(400, e.details)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return jsonapi_error(409, str(getattr(e, 'orig', None) or e))
+        meta = {'build_id': build.id, 'dry_run': promoter.dry_run}
+        for status in ('promoted', 'unchanged', 'skipped'):
+            meta[status] = sum(1 for x in results if x['status'] == status)
+        data = [{'type': 'promotion', 'id': x['deployment_id'], 'attributes': x} for x in results]
+        return jsonapi_response({'data': data, 'meta': meta, 'jsonapi': {'version': '1.0'}})
+
+
+def register_operations_api(app, manager, url_prefix='/api/ops/v1'):
+    cloner = DeploymentCloner(manager)
+    app.add_url_rule('%s/deployment/<deployment_id>/clone' % url_prefix, endpoint='deployment_clone',
+                     view_func=cloner.dispatch, methods=['POST'])
+    app.add_url_rule('%s/deployment/_promote' % url_prefix, endpoint='deployment_promote',
+                     view_func=DeploymentPromoter.dispatch, methods=['POST'])
@@ -0,0 +1,109 @@
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import request
+from flask_restless.exceptions import BadRequest
+from flask_restless.search import search
+from flask_restless.views.base import collection_parameters
+from sqlalchemy import tuple_
+
+from api.bulk import jsonapi_error, jsonapi_response, sparse_fieldset
+from db import db
+
+AFTER_PARAM = 'page[after]'
+SIZE_PARAM = 'page[size]'
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# cursors over created_at carry the id as a tie breaker: "<created_at>|<id>"
+CURSOR_SEPARATOR = '|'
+
+
+class KeysetPaginator:
+    """Serves ``GET <collection>?page[after]=<cursor>`` with keyset pagination.
+
+    Pages are ordered by the primary key, or by ``(created_at, id)`` with
+    ``sort=created_at``, and each one is a single indexed range scan with no
+    OFFSET and no COUNT, so a deep page costs the same as the first.  An empty
+    ``page[after]`` starts at the beginning; ``links.next`` carries the cursor
+    of the following page and is null on the last one.  Requests without
+    ``page[after]`` go to the wrapped Flask-Restless view unchanged.
+    """
+
+    def __init__(self, manager, model_class, collection_name, view_func):
+        self.manager = manager
+        self.model_class = model_class
+        self.collection_name = collection_name
+        self.view_func = view_func
+
+    def keys(self, sort):
+        if not sort or sort == [('+', 'id')]:
+            return [self.model_class.id]
+        created_at = self.model_class.__table__.columns.get('created_at')
+        if sort == [('+', 'created_at')] and created_at is not None and not created_at.nullable:
+            return [self.model_class.created_at, self.model_class.id]
+        raise BadRequest(details='page[after] supports sort=id or sort=created_at')
+
+    def parse_cursor(self, cursor, keys):
+        if len(keys) == 1:
+            return [cursor]
+        created_at, separator, id_ = cursor.partition(CURSOR_SEPARATOR)
+        if not separator:
+            raise BadRequest(details='Invalid cursor: %s' % cursor)
+        return [datetime.fromisoformat(created_at), id_]
+
+    def cursor(self, instance, keys):
+        values = [getattr(instance, key.key) for key in keys]
+        if len(values) == 1:
+            return str(values[0])
+        return values[0].isoformat() + CURSOR_SEPARATOR + values[1]
+
+    def page_size(self):
+        size = int(request.args.get(SIZE_PARAM, PAGE_SIZE))
+        if not 0 < size <= MAX_PAGE_SIZE:
+            raise BadRequest(details='Page size must be between 1 and %d' % MAX_PAGE_SIZE)
+        return size
+
+    def next_link(self, cursor):
+        params = request.args.to_dict()
+        params[AFTER_PARAM] = cursor
+        return request.base_url + '?' + urlencode(params)
+
+    def page(self):
+        filters, sort = collection_parameters()
+        keys = self.keys(sort)
+        size = self.page_size()
+        query = search(db.session, self.model_class, filters, sort=None)
+        cursor = request.args[AFTER_PARAM]
+        if cursor:
+            query = query.filter(tuple_(*keys) > tuple_(*self.parse_cursor(cursor, keys)))
+        # one extra row tells whether there is a next page without counting
+        rows = query.order_by(*keys).limit(size + 1).all()
+        has_next = len(rows) > size
+        rows = rows[:size]
+
+        serializer = self.manager.serializer_for(self.model_class)
+        only = sparse_fieldset(self.collection_name)
+        data = [serializer.serialize(row, only=only) for row in rows]
+        links = {'self': request.url, 'next': self.next_link(self.cursor(rows[-1], keys)) if has_next else None}
+        return {'data': data, 'links': links, 'jsonapi': {'version': '1.0'}}
+
+    def dispatch(self, *args, **kwargs):
+        if AFTER_PARAM not in request.args:
+            return self.view_func(*args, **kwargs)
+        try:
+            return jsonapi_response(self.page())
+        except BadRequest as e:
+            return jsonapi_error(400, e.details)
+        except ValueError as e:
+            return jsonapi_error(400, str(e))
+
+
+def register_keyset_pagination(app, manager, model_class, url_prefix, collection_name=None):
+    if collection_name is None:
+        collection_name = model_class.__table__.name
+    path = '%s/%s' % (url_prefix, collection_name)
+    for rule in app.url_map.iter_rules():
+        if rule.rule == path and rule.endpoint.endswith('.%s_get_collection' % collection_name):
+            paginator = KeysetPaginator(manager, model_class, collection_name, app.view_functions[rule.endpoint])
+            app.view_functions[rule.endpoint] = paginator.dispatch
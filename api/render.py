@@ -0,0 +1,94 @@
+from string import Template
+
+from flask import Response
+from sqlalchemy.orm import joinedload
+
+from db import db
+from models import Deployment, DeploymentConfig, DeploymentTarget, Partition, Provider, Region
+from models.defaults import cache, defaults_of, parse_defaults
+
+TEMPLATE_TYPE = 'tf'
+VARS_TYPE = 'vars'
+DEFAULT_TAG = 'default'
+
+
+class DeploymentRenderer:
+    """Renders a deployment's configs against its inherited defaults.
+
+    The deployment and its whole inheritance chain come back in one joined
+    query and every config it needs in a second one, whatever the number of
+    files.  Defaults are merged provider, region, environment, deployment,
+    service and then the deployment's ``vars`` config, later ones winning,
+    into a single context, and each template is substituted once.
+    """
+
+    def __init__(self, deployment_id, tag=None):
+        self.deployment_id = deployment_id
+        self.tag = DEFAULT_TAG if tag is None else tag
+
+    def deployment(self):
+        target = joinedload(Deployment.deployment_target)
+        return db.session.query(Deployment).options(
+            target.joinedload(DeploymentTarget.partition).joinedload(Partition.region)
+            .joinedload(Region.provider).joinedload(Provider.environment),
+            joinedload(Deployment.service)
+        ).filter(Deployment.id == self.deployment_id).one_or_none()
+
+    def configs(self, config_type, name=None):
+        """The deployment's templates of ``config_type`` and its vars configs, by name."""
+        templates = (DeploymentConfig.config_template_id == config_type) & (DeploymentConfig.tag == self.tag)
+        if name is not None:
+            templates &= DeploymentConfig.name == name
+        variables = (DeploymentConfig.config_template_id == VARS_TYPE) & \
+            DeploymentConfig.tag.in_([self.tag, DEFAULT_TAG])
+        rows = db.session.query(DeploymentConfig).filter(DeploymentConfig.deployment_id == self.deployment_id,
+                                                         templates | variables) \
+            .order_by(DeploymentConfig.name).all()
+        return [row for row in rows if row.config_template_id == config_type], \
+            [row for row in rows if row.config_template_id == VARS_TYPE]
+
+    def context(self, deployment, variables):
+        region = deployment.deployment_target.partition.region
+        layers = [region.provider, region, region.provider.environment, deployment, deployment.service]
+        context = dict()
+        parsed = [defaults_of(layer) for layer in layers]
+        # the vars config of the requested tag wins over the default one
+        parsed += [cache.get(row, 'config', parse_defaults)
+                   for row in sorted(variables, key=lambda x: x.tag == self.tag)[-1:]]
+        for values in parsed:
+            if isinstance(values, dict):
+                context.update(values)
+        # values may refer to other values, as they could when each layer was substituted in turn
+        return {k: Template(v).safe_substitute(context) if isinstance(v, str) else v for k, v in context.items()}
+
+    def render(self, config_type=TEMPLATE_TYPE, name=None):
+        """Returns the rendered configs as a list, or None when the deployment does not exist."""
+        deployment = self.deployment()
+        if deployment is None:
+            return None
+        templates, variables = self.configs(config_type, name)
+        context = self.context(deployment, variables)
+        return [cache.get(template, 'config', Template).safe_substitute(context) for template in templates]
+
+
+def gen_config(dep_id, config_tag=None):
+    rendered = DeploymentRenderer(dep_id, config_tag).render()
+    if rendered is None:
+        return Response('Deployment %s not found\n' % dep_id, status=404, mimetype='text/plain')
+    return Response(''.join(x + '\n' for x in rendered), mimetype='text/plain')
+
+
+def gen_tf(dep_id, config_type, name, config_tag=None):
+    rendered = DeploymentRenderer(dep_id, config_tag).render(config_type, name)
+    if not rendered:
+        return Response('Config %s:%s:%s not found\n' % (dep_id, config_type, name), status=404,
+                        mimetype='text/plain')
+    return Response(rendered[0], mimetype='text/plain')
+
+
+def register_render_api(app, url_prefix='/api/tf/v1/deployment/gen'):
+    app.add_url_rule(url_prefix + '/<dep_id>', endpoint='gen_config', view_func=gen_config)
+    app.add_url_rule(url_prefix + '/<dep_id>/<config_tag>', endpoint='gen_config', view_func=gen_config)
+    app.add_url_rule(url_prefix + '/<dep_id>/<config_type>/<name>', endpoint='gen_tf', view_func=gen_tf)
+    app.add_url_rule(url_prefix + '/<dep_id>/<config_type>/<name>/<config_tag>', endpoint='gen_tf',
+                     view_func=gen_tf)
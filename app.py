@@ -9,6 +9,8 @@ from flask_migrate import Migrate, Config
 from flask_restless import APIManager
 
 import models
+from api import register_bulk_api, register_association_bulk_api, register_keyset_pagination, register_export_api, \
+    register_render_api, register_operations_api, register_network_api, register_bake_api
 from base import app
 from db import db
 from qairon_qcli.lib import dynamic
@@ -62,20 +64,39 @@ with app.app_context():
         restmanager.create_api(model_class, primary_key='id', methods=['GET', 'POST', 'DELETE', 'PATCH'],
                                url_prefix='/api/rest/v1', page_size=0,
                                allow_client_generated_ids=True, allow_to_many_replacement=True,
+                               allow_delete_from_to_many_relationships=True,
                                exclude=getattr(model_class, 'exclude'))
         qclimanager.create_api(model_class, primary_key='id', methods=['GET', 'POST', 'DELETE', 'PATCH'],
                                url_prefix='/api/qcli/v1', page_size=5, max_page_size=100,
                                allow_client_generated_ids=True, allow_to_many_replacement=True,
                                exclude=getattr(model_class, 'exclude'), serializer=custom_serializer)
+        register_bulk_api(app, model_class, url_prefix='/api/rest/v1')
+        register_keyset_pagination(app, restmanager, model_class, url_prefix='/api/rest/v1')
+        register_export_api(app, restmanager, model_class, url_prefix='/api/export/v1')
     for plugin_model_class in plugin_model_classes:
         restmanager.create_api(plugin_model_class, primary_key='id', methods=['GET', 'POST', 'DELETE', 'PATCH'],
                                url_prefix='/api/rest/v1', page_size=0,
                                allow_client_generated_ids=True, allow_to_many_replacement=True,
+                               allow_delete_from_to_many_relationships=True,
                                exclude=getattr(plugin_model_class, 'exclude'), collection_name=getattr(plugin_model_class, 'collection_name'))
         qclimanager.create_api(plugin_model_class, primary_key='id', methods=['GET', 'POST', 'DELETE', 'PATCH'],
                                url_prefix='/api/qcli/v1', page_size=5, max_page_size=100,
                                allow_client_generated_ids=True, allow_to_many_replacement=True,
                                exclude=getattr(plugin_model_class, 'exclude'), collection_name=getattr(plugin_model_class, 'collection_name'), serializer=custom_serializer)
+        register_bulk_api(app, plugin_model_class, url_prefix='/api/rest/v1',
+                          collection_name=getattr(plugin_model_class, 'collection_name'))
+        register_keyset_pagination(app, restmanager, plugin_model_class, url_prefix='/api/rest/v1',
+                                   collection_name=getattr(plugin_model_class, 'collection_name'))
+        register_export_api(app, restmanager, plugin_model_class, url_prefix='/api/export/v1',
+                            collection_name=getattr(plugin_model_class, 'collection_name'))
+    for association_table in (deps_to_zones, svcs_to_repos, subnets_to_fleets, target_to_fleets):
+        register_association_bulk_api(app, association_table, url_prefix='/api/rest/v1')
+    register_render_api(app)
+    register_operations_api(app, restmanager)
+    register_network_api(app, restmanager)
+    register_bake_api(app, restmanager)
+    for plugin in dynamic.plugin_has_module('api', 'plugins'):
+        importlib.import_module('plugins.%s.api' % plugin).register_api(app, restmanager)
 
     # set optional bootswatch theme
     admin = Admin(app, name='QAIRON: %s' % version, theme=Bootstrap4Theme(swatch='slate', base_template='admin/master.html'))
@@ -166,8 +187,6 @@ with app.app_context():
     admin.add_view(WithIdView(RepoType, db.session, category='Types'))
     admin.add_view(DefaultView(Repo, db.session, category='CI/CD'))
 
-from flask import Response
-
 from models import Deployment, Environment, Provider, Region
 
 
@@ -189,84 +208,3 @@ def get_deployment_json(deployment_id):
     s = db.session
     tfs = s.query(Deployment).filter(Deployment.id == deployment_id).all()
     return json_api_doc.serialize(tfs)
-
-
-@app.route('/api/tf/v1/deployment/gen/<dep_id>')
-@app.route('/api/tf/v1/deployment/gen/<dep_id>/<config_tag>')
-def gen_config(dep_id, config_tag=None):
-    from db import db
-    s = db.session
-    config_tag = 'default' if config_tag is None else config_tag
-    tfs = s.query(Config).filter(Config.deployment_id == dep_id, Config.config_type_id == 'tf',
-                                 Config.tag == config_tag).all()
-    tf_files = list(map(lambda x: x.name, tfs))
-
-    result = ''
-
-    for file in tf_files:
-        res = _gen_tf(dep_id, 'tf', file, config_tag)
-        result += res + '\n'
-    return Response(result, mimetype='text/plain')
-
-
-@app.route('/api/tf/v1/deployment/gen/<dep_id>/<config_type>/<name>')
-@app.route('/api/tf/v1/deployment/gen/<dep_id>/<config_type>/<name>/<config_tag>')
-def gen_tf(dep_id, config_type, name, config_tag=None):
-    return Response(_gen_tf(dep_id, config_type, name, config_tag), mimetype='text/plain')
-
-
-def __clean_config_reader__(query):
-    import ast
-    if query is not None:
-        config = query.config
-    else:
-        config = '{}'
-    return ast.literal_eval(config)
-
-
-def __clean_outputs_reader__(query):
-    import ast
-    if query is not None:
-        config = query.config
-    else:
-        config = '{}'
-    return ast.literal_eval(config)
-
-
-def _gen_tf(dep_id, config_type, name, tag=None):
-    import ast
-    from string import Template
-    from db import db
-    s = db.session
-    app_result = s.query(Config).filter(Config.deployment_id == dep_id, Config.config_type_id == 'vars').first()
-    appvars = __clean_config_reader__(app_result)
-    dep = s.query(Deployment).get(dep_id)
-    env = s.query(Environment).get(dep.environment.id)
-    # inheritance order
-    # provider
-    # region
-    # zone
-    # appvars
-
-    provvars = ast.literal_eval(s.query(Provider).get('aws').defaults)
-    regvars = __clean_outputs_reader__(s.query(Region).get('us-east-1'))
-
-    depcfg = ast.literal_eval(
-        dep.defaults)
-    envvars = ast.literal_eval(env.defaults)
-    servicevars = ast.literal_eval(dep.service.defaults)
-
-    config_type_tmpl = s.query(Config).get(dep_id + ':tf:' + name + ':default').config
-
-    config_type_cfg = Template(config_type_tmpl)
-
-    post_prov_cfg = config_type_cfg.safe_substitute(provvars)
-    post_prov_tmpl = Template(post_prov_cfg)
-    post_env_cfg = post_prov_tmpl.safe_substitute(envvars)
-    post_env_tmpl = Template(post_env_cfg)
-    post_dep_cfg = post_env_tmpl.safe_substitute(depcfg)
-    post_dep_tmpl = Template(post_dep_cfg)
-    svc_cfg = post_dep_tmpl.safe_substitute(servicevars)
-    post_svc_cfg = Template(svc_cfg)
-    app_cfg = post_svc_cfg.safe_substitute(appvars)
-    return app_cfg
@@ -8,3 +8,25 @@ from sqlalchemy.pool import QueuePool
 from base import app
 
 db = SQLAlchemy(app)
+
+
+def written(session, model):
+    """The instances of ``model`` the session is about to insert or update."""
+    return [x for x in session.new | session.dirty if isinstance(x, model)]
+
+
+def lookup(session, statement, keys, known=None):
+    """Maps each of ``keys`` to a value, those ``known`` does not cover read with one query.
+
+    ``statement`` is given the missing keys and returns a select of
+    ``(key, value)`` rows, keys without a row map to None.  Meant for
+    before_flush listeners: nothing is autoflushed and nothing is kept, so
+    every flush checks its rows against the database as it is then.
+    """
+    values = dict(known or {})
+    missing = set(keys) - values.keys()
+    if missing:
+        values.update(dict.fromkeys(missing))
+        with session.no_autoflush:
+            values.update(session.execute(statement(missing)).all())
+    return values
@@ -0,0 +1,234 @@
+@db
+Feature: Baking deployment files
+
+  Scenario: setup fixtures
+    Given bulk create "environment" with ids "bkenv" via rest
+    And bulk create "provider_type" with ids "bkptype" via rest
+    And bulk create "provider" in env "bkenv" of type "bkptype" with native_ids "bkprov" via rest
+    And bulk create "region" named "bkreg" under "provider_id" "bkenv:bkptype:bkprov" via rest
+    And bulk create "partition" named "bkpart" under "region_id" "bkenv:bkptype:bkprov:bkreg" via rest
+    And bulk create "deployment_target_type" with ids "bkk8s" via rest
+    And bulk create "deployment_target" rows via rest
+      | name | partition_id                      | deployment_target_type_id | native_id |
+      | dt   | bkenv:bkptype:bkprov:bkreg:bkpart | bkk8s                     | eks-1     |
+      | dt2  | bkenv:bkptype:bkprov:bkreg:bkpart | bkk8s                     | eks-2     |
+    And bulk create "application" with ids "bkapp" via rest
+    And bulk create "stack" named "bkstack" under "application_id" "bkapp" via rest
+    And bulk create "service" named "web,other,vault,ledger" under "stack_id" "bkapp:bkstack" via rest
+    And bulk create "deployment" rows via rest
+      | deployment_target_id                       | service_id        |
+      | bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt | bkapp:bkstack:web |
+      | bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt2 | bkapp:bkstack:web |
+      | bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt  | bkapp:bkstack:vault |
+      | bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt  | bkapp:bkstack:ledger |
+    And bulk create "build" rows via rest
+      | service_id          | build_num | vcs_ref |
+      | bkapp:bkstack:web   | 7         | abc123  |
+      | bkapp:bkstack:other | 1         | def456  |
+      | bkapp:bkstack:vault | 1         | fed789  |
+      | bkapp:bkstack:ledger | 1        | cab321  |
+    And bulk create "language" with ids "bkjson" via rest
+    And bulk create "config_template" rows via rest
+      | id         | language_id | doc |
+      | bake_files | bkjson      | {}  |
+      | kv         | bkjson      | {}  |
+      | helm       | bkjson      | {}  |
+      | secret_name_map_item | bkjson | {}  |
+    And bulk create "repo_type" with ids "ecr" via rest
+    And bulk create "repo" named "web" under "repo_type_id" "ecr" via rest
+    When bulk associate "services_repos" pairs "bkapp:bkstack:web=ecr:web" via rest
+    And deployment "bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt:bkapp:bkstack:web:default" has a "kv" config "env" with
+      """
+      {"LOG_LEVEL": "info", "WORKERS": 4}
+      """
+    And deployment "bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt:bkapp:bkstack:web:default" has a "helm" config "namespace" with
+      """
+      {{ deploy_target.name }}-{{ k8s_fmt(local.build_id) }}
+      """
+    And service "bkapp:bkstack:web" bakes files with
+      """
+      {"files": {"substitutions": [{"filename": "values.yaml", "fields": [
+        {"name": "job", "type": "local", "value": "release_job_number"},
+        {"name": "cluster", "type": "meta", "value": {"object": "deployment_target", "field": "native_id"}},
+        {"name": "version", "type": "meta", "value": {"object": "build", "field": "ver"}},
+        {"name": "image", "type": "meta", "value": {"object": "repo", "field": "name"}},
+        {"name": "namespace", "type": "template", "template_id": "helm"},
+        {"name": "env", "type": "config_kv_list", "value": {"object": "configs", "field": "template_id", "filter": "kv"}},
+        {"name": "first", "type": "one_from_collection", "collection": "configs", "data_field": "name",
+         "filters": [{"field_name": "template_id", "value": "kv"}]}
+      ]}]}}
+      """
+
+  Scenario: the bake context comes back in one request
+    When the bake context of deployment "bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt:bkapp:bkstack:web:default" with build "bkapp:bkstack:web:7" is read
+    Then the bake context took "1" request
+    And the bake context includes "2" "deployment_config"
+    And the bake context includes "1" "service_config"
+    And the bake context includes "1" "repo"
+    And the bake context includes "1" "build"
+    And the bake context includes "1" "deployment_target"
+
+  Scenario: the bake context of a build of another service is refused
+    When the bake context of deployment "bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt:bkapp:bkstack:web:default" with build "bkapp:bkstack:other:1" is read
+    Then the bake context is refused with "400"
+
+  Scenario: the bake context of an unknown deployment is not found
+    When the bake context of deployment "nope" with build "bkapp:bkstack:web:7" is read
+    Then the bake context is refused with "404"
+
+  Scenario: files are baked from the bake context
+    Given a file "values.yaml" to bake with
+      """
+      job: %--job--%
+      cluster: %--cluster--%
+      version: %--version--%
+      image: %--image--%
+      namespace: %--namespace--%
+      first: %--first--%
+      env:
+      %--env--%
+      """
+    When deployment "bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt:bkapp:bkstack:web:default" is baked with build "bkapp:bkstack:web:7" as job "42"
+    Then the bake took "1" request
+    And the baked file "values.yaml" is
+      """
+      job: 42
+      cluster: eks-1
+      version: abc123
+      image: web
+      namespace: dt-bkapp/bkstack/web/7
+      first: env
+      env:
+        LOG_LEVEL=info
+        WORKERS=4
+      """
+
+  Scenario: files are baked from prefetched resources when the server has no bake context
+    Given a file "values.yaml" to bake with
+      """
+      job: %--job--%
+      cluster: %--cluster--%
+      version: %--version--%
+      image: %--image--%
+      namespace: %--namespace--%
+      first: %--first--%
+      env:
+      %--env--%
+      """
+    When deployment "bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt:bkapp:bkstack:web:default" is baked with build "bkapp:bkstack:web:7" as job "42" by a server without bake contexts
+    Then the bake took "7" request
+    And the baked file "values.yaml" is
+      """
+      job: 42
+      cluster: eks-1
+      version: abc123
+      image: web
+      namespace: dt-bkapp/bkstack/web/7
+      first: env
+      env:
+        LOG_LEVEL=info
+        WORKERS=4
+      """
+
+  Scenario: every deployment of a service is baked at once, each into its own directory
+    Given a file "values.yaml" to bake with
+      """
+      cluster: %--cluster--%
+      namespace: %--namespace--%
+      """
+    When deployments where '[{"name": "service_id", "op": "eq", "val": "bkapp:bkstack:web"}]' are batch baked with build "bkapp:bkstack:web:7" as job "43"
+    Then the batch reports "1" "baked"
+    And the batch reports "1" "failed"
+    And the batch baked file "values.yaml" of deployment "bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt:bkapp:bkstack:web:default" is
+      """
+      cluster: eks-1
+      namespace: dt-bkapp/bkstack/web/7
+      """
+
+  Scenario: a template is compiled once however many deployments render it
+    When the template "{{ deploy_target.name }}-{{ k8s_fmt(local.deployment_id) }}" is rendered for targets "dt,dt2"
+    Then the renders are "dt-bkapp/web,dt2-bkapp/web"
+    And the template was compiled "1" time
+    And the compiled template is in the bytecode cache
+
+  Scenario: a sandboxed template cannot reach into Python objects
+    When the template "{{ local.__class__.__mro__ }}" is rendered in the sandbox
+    Then rendering is refused as unsafe
+
+  Scenario: fields whose placeholders are not in a file are never resolved
+    Given a file "values.yaml" to bake with
+      """
+      cluster: %--cluster--%
+      """
+    When deployment "bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt2:bkapp:bkstack:web:default" is baked with build "bkapp:bkstack:web:7" as job "44"
+    Then the baked file "values.yaml" is
+      """
+      cluster: eks-2
+      """
+
+  Scenario: placeholders split across chunks are substituted in one pass
+    When "a%--x--%b%--yy--%%--x--%%--unknown--%%-%--yy--%%" is substituted with "x=1,yy=22" in every chunk size
+    Then every chunk size gives "a1b221%--unknown--%%-22%"
+    When "50%--off %--x--% and %--%--yy--%, 10%-- %--x--%--%" is substituted with "x=1,yy=22" in every chunk size
+    Then every chunk size gives "50%--off 1 and %--22, 10%-- 1--%"
+
+  Scenario: every secret a bake needs comes from one batch call
+    Given a file "db.env" to bake with
+      """
+      DB=%--db--%
+      """
+    And a file "app.env" to bake beside it with
+      """
+      API=%--api--%
+      DB=%--db--%
+      """
+    When deployment "bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt:bkapp:bkstack:vault:default" has a "secret_name_map_item" config "db_password" with
+      """
+      {"db_password": "prod/db"}
+      """
+    And deployment "bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt:bkapp:bkstack:vault:default" has a "secret_name_map_item" config "api_key" with
+      """
+      {"api_key": "prod/api"}
+      """
+    And service "bkapp:bkstack:vault" bakes files with
+      """
+      {"files": {"substitutions": [
+        {"filename": "db.env", "fields": [
+          {"name": "db", "type": "aws_secret", "secret_name": "db_password"}]},
+        {"filename": "app.env", "fields": [
+          {"name": "api", "type": "aws_secret", "secret_name": "api_key"},
+          {"name": "db", "type": "aws_secret", "secret_name": "db_password"}]}
+      ]}}
+      """
+    And Secrets Manager holds "prod/api=s3cret,prod/db=hunter2" while deployment "bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt:bkapp:bkstack:vault:default" is baked with build "bkapp:bkstack:vault:1" as job "45"
+    Then the bake took "2" request
+    And Secrets Manager was called once
+    And the baked file "app.env" is
+      """
+      API=s3cret
+      DB=hunter2
+      """
+
+  Scenario: a secret only named by an unused field needs no mapping
+    Given a file "ledger.env" to bake with
+      """
+      API=%--api--%
+      """
+    When deployment "bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt:bkapp:bkstack:ledger:default" has a "secret_name_map_item" config "api_key" with
+      """
+      {"api_key": "ledger/api"}
+      """
+    And service "bkapp:bkstack:ledger" bakes files with
+      """
+      {"files": {"substitutions": [
+        {"filename": "ledger.env", "fields": [
+          {"name": "api", "type": "aws_secret", "secret_name": "api_key"},
+          {"name": "token", "type": "aws_secret", "secret_name": "unmapped_token"}]}
+      ]}}
+      """
+    And Secrets Manager holds "ledger/api=s3cret" while deployment "bkenv:bkptype:bkprov:bkreg:bkpart:bkk8s:dt:bkapp:bkstack:ledger:default" is baked with build "bkapp:bkstack:ledger:1" as job "46"
+    Then Secrets Manager was called once
+    And the baked file "ledger.env" is
+      """
+      API=s3cret
+      """
@@ -0,0 +1,44 @@
+@db
+Feature: Bulk REST API
+
+  Scenario: bulk create derives composite ids
+    Given bulk create "environment" with ids "bkenv" via rest
+    And bulk create "provider_type" with ids "bkptype" via rest
+    And bulk create "provider" in env "bkenv" of type "bkptype" with native_ids "bkprov0,bkprov1" via rest
+    Then bulk create "region" named "bkreg0,bkreg1,bkreg2" under "provider_id" "bkenv:bkptype:bkprov0" via rest
+    And "region" "bkenv:bkptype:bkprov0:bkreg2" exists via rest
+
+  Scenario: bulk create rejects duplicates without upsert
+    When bulk create "region" named "bkreg0,bkreg3" under "provider_id" "bkenv:bkptype:bkprov0" via rest it fails
+    Then "region" "bkenv:bkptype:bkprov0:bkreg3" does not exist via rest
+
+  Scenario: bulk upsert updates existing rows and inserts new ones
+    When bulk upsert "region" named "bkreg0,bkreg3" under "provider_id" "bkenv:bkptype:bkprov0" with defaults "upserted" via rest
+    Then bulk result reports "1" created and "1" updated
+    And "region" "bkenv:bkptype:bkprov0:bkreg0" has defaults "upserted" via rest
+
+  Scenario: bulk create accepts an NDJSON stream
+    When bulk create "zone" named "bkzone0,bkzone1" under "region_id" "bkenv:bkptype:bkprov0:bkreg1" as ndjson via rest
+    Then "zone" "bkenv:bkptype:bkprov0:bkreg1:bkzone1" exists via rest
+
+  Scenario: bulk associate and dissociate many-to-many pairs
+    Given bulk create "application" with ids "bkapp" via rest
+    And bulk create "repo_type" with ids "bkgit" via rest
+    And bulk create "stack" named "bkstack" under "application_id" "bkapp" via rest
+    And bulk create "service" named "bksvc0,bksvc1" under "stack_id" "bkapp:bkstack" via rest
+    And bulk create "repo" named "bkrepo0,bkrepo1" under "repo_type_id" "bkgit" via rest
+    When bulk associate "services_repos" pairs "bkapp:bkstack:bksvc0=bkgit:bkrepo0,bkapp:bkstack:bksvc0=bkgit:bkrepo1,bkapp:bkstack:bksvc1=bkgit:bkrepo0" via rest
+    Then bulk association reports "added" "3"
+    And "service" "bkapp:bkstack:bksvc0" has "2" "repos" via rest
+    When bulk associate "services_repos" pairs "bkapp:bkstack:bksvc0=bkgit:bkrepo0,bkapp:bkstack:bksvc1=bkgit:bkrepo1" via rest
+    Then bulk association reports "skipped" "1"
+    When bulk dissociate "services_repos" pairs "bkapp:bkstack:bksvc0=bkgit:bkrepo0,bkapp:bkstack:bksvc0=bkgit:bkrepo1" via rest
+    Then bulk association reports "removed" "2"
+    And "service" "bkapp:bkstack:bksvc0" has "0" "repos" via rest
+    And "service" "bkapp:bkstack:bksvc1" has "2" "repos" via rest
+
+  Scenario: relationship endpoint adds and removes several items at once
+    When add "repo" "bkgit:bkrepo0,bkgit:bkrepo1" to "repos" on "service" "bkapp:bkstack:bksvc0" via rest
+    Then "service" "bkapp:bkstack:bksvc0" has "2" "repos" via rest
+    When remove "repo" "bkgit:bkrepo0,bkgit:bkrepo1" from "repos" on "service" "bkapp:bkstack:bksvc0" via rest
+    Then "service" "bkapp:bkstack:bksvc0" has "0" "repos" via rest
@@ -0,0 +1,47 @@
+@db
+Feature: CIDR containment, overlap and free space queries
+
+  Scenario: setup fixtures
+    Given bulk create "environment" with ids "cqenv" via rest
+    And bulk create "provider_type" with ids "cqptype" via rest
+    And bulk create "provider" in env "cqenv" of type "cqptype" with native_ids "cqprov" via rest
+    And bulk create "region" named "cqreg" under "provider_id" "cqenv:cqptype:cqprov" via rest
+    And bulk create "partition" named "cqpart" under "region_id" "cqenv:cqptype:cqprov:cqreg" via rest
+    And bulk create "network" rows via rest
+      | partition_id                      | name | cidr          |
+      | cqenv:cqptype:cqprov:cqreg:cqpart | vpc  | 10.30.0.0/16  |
+      | cqenv:cqptype:cqprov:cqreg:cqpart | peer | 10.31.0.0/16  |
+    And bulk create "subnet" rows via rest
+      | network_id                            | name | cidr          |
+      | cqenv:cqptype:cqprov:cqreg:cqpart:vpc | a    | 10.30.0.0/24  |
+      | cqenv:cqptype:cqprov:cqreg:cqpart:vpc | b    | 10.30.1.0/26  |
+      | cqenv:cqptype:cqprov:cqreg:cqpart:vpc | c    | 10.30.4.0/22  |
+
+  Scenario: the owners of an address are found most specific first
+    When "subnet" containing "10.30.1.17" is looked up via qcli
+    Then the lookup returns "cqenv:cqptype:cqprov:cqreg:cqpart:vpc:b"
+    When "network" containing "10.30.1.17" is looked up via qcli
+    Then the lookup returns "cqenv:cqptype:cqprov:cqreg:cqpart:vpc"
+    When "subnet" containing "10.30.1.200" is looked up via qcli
+    Then the lookup returns nothing
+
+  Scenario: subnets overlapping a cidr
+    When "subnet" overlapping "10.30.0.0/21" is looked up via qcli
+    Then the lookup returns "cqenv:cqptype:cqprov:cqreg:cqpart:vpc:b,cqenv:cqptype:cqprov:cqreg:cqpart:vpc:a,cqenv:cqptype:cqprov:cqreg:cqpart:vpc:c"
+    When "network" overlapping "10.0.0.0/8" is looked up via qcli
+    Then the lookup returns "cqenv:cqptype:cqprov:cqreg:cqpart:vpc,cqenv:cqptype:cqprov:cqreg:cqpart:peer"
+
+  Scenario: free blocks of a network
+    When free "/24" blocks of network "cqenv:cqptype:cqprov:cqreg:cqpart:vpc" are looked up via qcli
+    Then the lookup returns "10.30.2.0/23,10.30.8.0/21,10.30.16.0/20,10.30.32.0/19,10.30.64.0/18,10.30.128.0/17"
+    And the free blocks hold "250" "/24"s
+
+  Scenario: malformed lookups are rejected
+    When "subnet" overlapping "10.30.0.1/21" is looked up via qcli it fails
+    Then the lookup error mentions "without host bits set"
+    When "subnet" containing "not-an-ip" is looked up via qcli it fails
+    Then the lookup error mentions "ip must be an IP address"
+
+  Scenario: address lookups are served by the gist indexes
+    Then a "subnet" containment lookup of "10.30.1.17" can use index "ix_subnet_cidr_gist"
+    And a "network" overlap lookup of "10.30.0.0/21" can use index "ix_network_cidr_gist"
@@ -48,6 +48,10 @@ Feature: CLI
     Then create "dependency" with "dependency_case_id" equals "test_relatable_on_single_related" and "relatable_id" equals "Deployment:testenv:testprovider_type:testprovider:testregion:testpartition:k8s:testdt:testapp:teststack:testservice:default" named "test_dependency" via cli
     Then create "related" with "related_type" equals "Build" and "dependency_id" equals "test_relatable_on_single_related:Deployment:testenv:testprovider_type:testprovider:testregion:testpartition:k8s:testdt:testapp:teststack:testservice:default:test_dependency" and "object_id" equals "testapp:teststack:testservice:123" via cli
 
+  Scenario: export
+    Then export "zone" via cli prints "2" ndjson lines
+    Then export "zone" where "name" equals "testzone2" with fields "name" via cli prints "testzone2"
+
 
   Scenario: cleanup
     Then delete "related" "Build:test_relatable_on_single_related:Deployment:testenv:testprovider_type:testprovider:testregion:testpartition:k8s:testdt:testapp:teststack:testservice:default:test_dependency:testapp:teststack:testservice:123" via cli
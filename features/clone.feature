@@ -0,0 +1,64 @@
+@db
+Feature: Deployment clone
+
+  Scenario: setup fixtures
+    Given bulk create "environment" with ids "clenv" via rest
+    And bulk create "provider_type" with ids "clptype" via rest
+    And bulk create "provider" in env "clenv" of type "clptype" with native_ids "clprov" via rest
+    And bulk create "region" named "clreg" under "provider_id" "clenv:clptype:clprov" via rest
+    And bulk create "partition" named "clpart" under "region_id" "clenv:clptype:clprov:clreg" via rest
+    And bulk create "deployment_target_type" with ids "clk8s" via rest
+    And bulk create "deployment_target" rows via rest
+      | name | partition_id                      | deployment_target_type_id |
+      | src  | clenv:clptype:clprov:clreg:clpart | clk8s                     |
+      | dst  | clenv:clptype:clprov:clreg:clpart | clk8s                     |
+    And bulk create "application" with ids "clapp" via rest
+    And bulk create "stack" named "clstack" under "application_id" "clapp" via rest
+    And bulk create "service" named "clsvc" under "stack_id" "clapp:clstack" via rest
+    And bulk create "proc" named "web,worker" under "service_id" "clapp:clstack:clsvc" via rest
+    And bulk create "deployment" rows via rest
+      | deployment_target_id                        | service_id          | defaults        |
+      | clenv:clptype:clprov:clreg:clpart:clk8s:src | clapp:clstack:clsvc | {'replicas': 3} |
+    And bulk create "language" with ids "cllang" via rest
+    And bulk create "config_template" rows via rest
+      | id   | language_id | doc       |
+      | cltf | cllang      | terraform |
+    And bulk create "deployment_config" rows via rest
+      | deployment_id                                                           | config_template_id | name | config |
+      | clenv:clptype:clprov:clreg:clpart:clk8s:src:clapp:clstack:clsvc:default | cltf               | main | a=1    |
+      | clenv:clptype:clprov:clreg:clpart:clk8s:src:clapp:clstack:clsvc:default | cltf               | vars | b=2    |
+    And bulk create "deployment_proc" rows via rest
+      | deployment_id                                                           | proc_id                    |
+      | clenv:clptype:clprov:clreg:clpart:clk8s:src:clapp:clstack:clsvc:default | clapp:clstack:clsvc:web    |
+      | clenv:clptype:clprov:clreg:clpart:clk8s:src:clapp:clstack:clsvc:default | clapp:clstack:clsvc:worker |
+    And bulk create "allocation_type" rows via rest
+      | id    | unit |
+      | clcpu | m    |
+    And bulk create "allocation" rows via rest
+      | deployment_proc_id                                                                                 | allocation_type_id | watermark | value |
+      | clenv:clptype:clprov:clreg:clpart:clk8s:src:clapp:clstack:clsvc:default:clapp:clstack:clsvc:web    | clcpu              | HIGH      | 500   |
+      | clenv:clptype:clprov:clreg:clpart:clk8s:src:clapp:clstack:clsvc:default:clapp:clstack:clsvc:web    | clcpu              | LOW       | 250   |
+      | clenv:clptype:clprov:clreg:clpart:clk8s:src:clapp:clstack:clsvc:default:clapp:clstack:clsvc:worker | clcpu              | HIGH      | 100   |
+
+  Scenario: a deployment is cloned with one request
+    When deployment "clenv:clptype:clprov:clreg:clpart:clk8s:src:clapp:clstack:clsvc:default" is cloned to target "clenv:clptype:clprov:clreg:clpart:clk8s:dst" via qcli
+    Then the clone is "clenv:clptype:clprov:clreg:clpart:clk8s:dst:clapp:clstack:clsvc:default"
+    And the clone took "1" request
+    And "deployment" "clenv:clptype:clprov:clreg:clpart:clk8s:dst:clapp:clstack:clsvc:default" has defaults "{'replicas': 3}" via rest
+    And "deployment_config" "clenv:clptype:clprov:clreg:clpart:clk8s:dst:clapp:clstack:clsvc:default:cltf:vars:default" exists via rest
+    And "deployment_proc" "clenv:clptype:clprov:clreg:clpart:clk8s:dst:clapp:clstack:clsvc:default:clapp:clstack:clsvc:worker" exists via rest
+    And "allocation" "clenv:clptype:clprov:clreg:clpart:clk8s:dst:clapp:clstack:clsvc:default:clapp:clstack:clsvc:web:clcpu:LOW" exists via rest
+    And "deployment" "clenv:clptype:clprov:clreg:clpart:clk8s:dst:clapp:clstack:clsvc:default" has "2" "configs" via rest
+
+  Scenario: a clone under a new tag sits next to the source
+    When tagging a clone of deployment "clenv:clptype:clprov:clreg:clpart:clk8s:src:clapp:clstack:clsvc:default" on target "clenv:clptype:clprov:clreg:clpart:clk8s:src" as "canary" via qcli
+    Then the clone is "clenv:clptype:clprov:clreg:clpart:clk8s:src:clapp:clstack:clsvc:canary"
+    And "allocation" "clenv:clptype:clprov:clreg:clpart:clk8s:src:clapp:clstack:clsvc:canary:clapp:clstack:clsvc:worker:clcpu:HIGH" exists via rest
+
+  Scenario: a clone that collides leaves nothing behind
+    When cloning deployment "clenv:clptype:clprov:clreg:clpart:clk8s:src:clapp:clstack:clsvc:default" to target "clenv:clptype:clprov:clreg:clpart:clk8s:dst" via qcli fails
+    Then "deployment" "clenv:clptype:clprov:clreg:clpart:clk8s:dst:clapp:clstack:clsvc:default" has "2" "configs" via rest
+
+  Scenario: cloning an unknown deployment is not found
+    When cloning deployment "nope" to target "clenv:clptype:clprov:clreg:clpart:clk8s:dst" via qcli fails
+    Then the clone error mentions "No deployment with id nope"
@@ -0,0 +1,21 @@
+@db
+Feature: Defaults column
+
+  Scenario: jsonb defaults are parsed once on the way in
+    Given a scratch table with jsonb defaults
+    When defaults "{'region': 'us-east-1', 'count': 2}" are written to the scratch table
+    Then the scratch table reads back an object with "region" "us-east-1"
+    And the scratch table finds the row where defaults "region" is "us-east-1"
+
+  Scenario: jsonb keeps text that is not a literal as a string
+    Given a scratch table with jsonb defaults
+    When defaults "not a literal" are written to the scratch table
+    Then the scratch table reads back the string "not a literal"
+
+  Scenario: parsed defaults are reused until the row changes
+    Given an environment row with defaults "{'env': 'dev'}"
+    When its defaults are read "3" times
+    Then they were parsed "1" times
+    When the environment row is updated
+    And its defaults are read "2" times
+    Then they were parsed "2" times
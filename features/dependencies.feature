@@ -0,0 +1,92 @@
+@db
+Feature: Dependency related objects
+
+  Scenario: setup fixtures
+    Given bulk create "application" with ids "dpapp" via rest
+    And bulk create "language" with ids "dplang0,dplang1,dplang2,dplang3,dplang4" via rest
+    And bulk create "dependency_case" rows via rest
+      | id         | relatable_type | related_type | allowed_relationship |
+      | dpapp_lang | Application    | Language     | OTM                  |
+    And bulk create "relatable" rows via rest
+      | relatable_type | object_id |
+      | Application    | dpapp     |
+    And bulk create "dependency" rows via rest
+      | dependency_case_id | relatable_id      | name  |
+      | dpapp_lang         | Application:dpapp | langs |
+    And bulk create "related" rows via rest
+      | dependency_id                       | related_type | object_id |
+      | dpapp_lang:Application:dpapp:langs  | Language     | dplang3   |
+      | dpapp_lang:Application:dpapp:langs  | Language     | dplang0   |
+      | dpapp_lang:Application:dpapp:langs  | Language     | dplang1   |
+      | dpapp_lang:Application:dpapp:langs  | Language     | dplang4   |
+      | dpapp_lang:Application:dpapp:langs  | Language     | gone      |
+
+  Scenario: related objects are resolved with one request
+    When the related objects of dependency "dpapp_lang:Application:dpapp:langs" are fetched via qcli
+    Then the related objects are "language" "dplang0,dplang1,dplang3,dplang4"
+    And fetching the related objects took "1" request
+
+  Scenario: related objects of an unknown dependency
+    When the related objects of dependency "nope" are fetched via qcli it fails
+    Then the related objects error mentions "No dependency with id nope"
+
+  Scenario: graph fixtures
+    Given bulk create "application" with ids "dpg1,dpg2,dpg3,dpg4" via rest
+    And bulk create "dependency_case" rows via rest
+      | id        | relatable_type | related_type | allowed_relationship |
+      | dpapp_app | Application    | Application  | OTM                  |
+    And bulk create "relatable" rows via rest
+      | relatable_type | object_id |
+      | Application    | dpg1      |
+      | Application    | dpg2      |
+      | Application    | dpg3      |
+      | Application    | dpg4      |
+    And bulk create "dependency" rows via rest
+      | dependency_case_id | relatable_id     | name |
+      | dpapp_app          | Application:dpg1 | uses |
+      | dpapp_app          | Application:dpg2 | uses |
+      | dpapp_app          | Application:dpg3 | uses |
+      | dpapp_app          | Application:dpg4 | uses |
+      | dpapp_lang         | Application:dpg2 | langs |
+    And bulk create "related" rows via rest
+      | dependency_id                   | related_type | object_id |
+      | dpapp_app:Application:dpg1:uses | Application  | dpg2      |
+      | dpapp_app:Application:dpg1:uses | Application  | dpg3      |
+      | dpapp_app:Application:dpg2:uses | Application  | dpg4      |
+      | dpapp_app:Application:dpg3:uses | Application  | dpg4      |
+      | dpapp_app:Application:dpg4:uses | Application  | dpg1      |
+      | dpapp_lang:Application:dpg2:langs | Language   | dplang2   |
+
+  Scenario: what a node depends on, transitively
+    When the graph is walked "down" from "Application:dpg1" via qcli
+    Then the walk reaches "Application:dpg2@1,Application:dpg3@1,Application:dpg4@2,Language:dplang2@2"
+    And the walk finds a cycle back to "Application:dpg1" at depth "3"
+    And walking the graph took "1" request
+
+  Scenario: what depends on a node, transitively
+    When the graph is walked "up" from "Application:dpg4" via qcli
+    Then the walk reaches "Application:dpg2@1,Application:dpg3@1,Application:dpg1@2"
+    And the walk finds a cycle back to "Application:dpg4" at depth "3"
+
+  Scenario: walks are limited by depth and type
+    When the graph is walked "down" from "Application:dpg1" at most "1" deep via qcli
+    Then the walk reaches "Application:dpg2@1,Application:dpg3@1"
+    And the walk finds no cycle
+    When the graph is walked "down" from "Application:dpg1" following only "Application" related objects via qcli
+    Then the walk reaches "Application:dpg2@1,Application:dpg3@1,Application:dpg4@2"
+
+  Scenario: every node of a ladder of diamonds is expanded once
+    Given a ladder of "24" diamonds of applications "dplad"
+    When the graph is walked "down" from "Application:dplad0" at most "48" deep within "10" seconds
+    Then the walk reaches "72" nodes, each once
+    And the walk finds no cycle
+    When walking the graph "down" from "Application:dplad0" at most "51" deep via qcli fails with "max_depth must be at most 50"
+
+  Scenario: related rows are validated with one query per flush
+    When "200" "Language" related rows are bulk loaded into dependency "dpapp_lang:Application:dpapp:langs"
+    Then the related rows were created
+    And loading the related rows took at most "6" queries
+
+  Scenario: related rows of the wrong type are rejected
+    When "1" "Application" related rows are bulk loaded into dependency "dpapp_lang:Application:dpapp:langs"
+    Then the related rows were rejected mentioning "relates Language objects, not Application"
@@ -0,0 +1,35 @@
+@db
+Feature: Deployment proc fan-out
+
+  Scenario: setup fixtures
+    Given bulk create "environment" with ids "dpenv" via rest
+    And bulk create "provider_type" with ids "dpptype" via rest
+    And bulk create "provider" in env "dpenv" of type "dpptype" with native_ids "dpprov" via rest
+    And bulk create "region" named "dpreg" under "provider_id" "dpenv:dpptype:dpprov" via rest
+    And bulk create "partition" named "dppart" under "region_id" "dpenv:dpptype:dpprov:dpreg" via rest
+    And bulk create "deployment_target_type" with ids "dpk8s" via rest
+    And bulk create "deployment_target" rows via rest
+      | name | partition_id                      | deployment_target_type_id |
+      | dt   | dpenv:dpptype:dpprov:dpreg:dppart | dpk8s                     |
+    And bulk create "application" with ids "dpapp" via rest
+    And bulk create "stack" named "dpstack" under "application_id" "dpapp" via rest
+    And bulk create "service" named "web,other" under "stack_id" "dpapp:dpstack" via rest
+    And "300" procs named "p" of service "dpapp:dpstack:web" exist
+    And bulk create "proc" named "stray" under "service_id" "dpapp:dpstack:other" via rest
+    And bulk create "deployment" rows via rest
+      | deployment_target_id                       | service_id        |
+      | dpenv:dpptype:dpprov:dpreg:dppart:dpk8s:dt | dpapp:dpstack:web |
+
+  Scenario: procs are fanned out at bulk speed
+    When "300" procs named "p" of service "dpapp:dpstack:web" are bulk loaded into deployment "dpenv:dpptype:dpprov:dpreg:dppart:dpk8s:dt:dpapp:dpstack:web:default"
+    Then the deployment procs were created
+    And loading the deployment procs took at most "6" queries
+
+  Scenario: a proc of another service is rejected
+    When "1" procs named "stray" of service "dpapp:dpstack:other" are bulk loaded into deployment "dpenv:dpptype:dpprov:dpreg:dppart:dpk8s:dt:dpapp:dpstack:web:default"
+    Then the deployment procs were rejected mentioning "must match deployment service_id (dpapp:dpstack:web)"
+
+  Scenario: each flush checks procs against the deployment as it is then
+    Given bulk create "proc" named "solo" under "service_id" "dpapp:dpstack:web" via rest
+    When one session adds proc "dpapp:dpstack:web:solo" to deployment "dpenv:dpptype:dpprov:dpreg:dppart:dpk8s:dt:dpapp:dpstack:web:default", which then moves to service "dpapp:dpstack:other", and adds proc "dpapp:dpstack:other:stray"
+    Then the second proc was checked against service "dpapp:dpstack:other"
@@ -1,5 +1,7 @@
 import io
+import os
 import sys
+import tempfile
 
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.sql.ddl import DropTable
@@ -18,6 +20,17 @@ def _compile_drop_table(element, compiler):
     return compiler.visit_drop_table(element) + " CASCADE"
 
 
+def before_all(context):
+    # a fresh completion cache per run, tables are recreated for every @db feature
+    context.completion_cache_dir = tempfile.TemporaryDirectory()
+    os.environ['QAIRON_COMPLETION_CACHE'] = os.path.join(context.completion_cache_dir.name, 'completion.sqlite')
+    os.environ['QAIRON_PARSER_MANIFEST'] = os.path.join(context.completion_cache_dir.name, 'manifest.json')
+
+
+def after_all(context):
+    context.completion_cache_dir.cleanup()
+
+
 def before_feature(context, feature):
     if 'db' not in feature.tags:
         return
@@ -33,6 +46,10 @@ def before_feature(context, feature):
 
         migrate.db.drop_all()
         migrate.db.create_all()
+        # ids cached by earlier features are gone with their tables
+        RestController._completion_cache = None
+        if os.path.exists(os.environ['QAIRON_COMPLETION_CACHE']):
+            os.remove(os.environ['QAIRON_COMPLETION_CACHE'])
         if 'cli' in feature.tags:
             context.real_stdout = sys.stdout
             sys.stdout = context.stdout_mock
@@ -0,0 +1,51 @@
+@db
+Feature: Re-keying derived ids
+
+  Scenario: setup fixtures
+    Given bulk create "environment" with ids "ckenv" via rest
+    And bulk create "provider_type" with ids "ckptype" via rest
+    And bulk create "provider" in env "ckenv" of type "ckptype" with native_ids "ckprov" via rest
+    And bulk create "region" named "ckreg" under "provider_id" "ckenv:ckptype:ckprov" via rest
+    And bulk create "partition" named "ckpart" under "region_id" "ckenv:ckptype:ckprov:ckreg" via rest
+    And bulk create "zone" named "a,b" under "region_id" "ckenv:ckptype:ckprov:ckreg" via rest
+    And bulk create "deployment_target_type" with ids "ckk8s" via rest
+    And bulk create "deployment_target" rows via rest
+      | name | partition_id                      | deployment_target_type_id |
+      | dt   | ckenv:ckptype:ckprov:ckreg:ckpart | ckk8s                     |
+    And bulk create "application" with ids "ckapp" via rest
+    And bulk create "stack" named "ckstack" under "application_id" "ckapp" via rest
+    And bulk create "service" named "web" under "stack_id" "ckapp:ckstack" via rest
+    And bulk create "proc" named "worker" under "service_id" "ckapp:ckstack:web" via rest
+    And bulk create "deployment" rows via rest
+      | deployment_target_id                       | service_id        |
+      | ckenv:ckptype:ckprov:ckreg:ckpart:ckk8s:dt | ckapp:ckstack:web |
+    And bulk create "deployment_proc" rows via rest
+      | deployment_id                                                      | proc_id                  |
+      | ckenv:ckptype:ckprov:ckreg:ckpart:ckk8s:dt:ckapp:ckstack:web:default | ckapp:ckstack:web:worker |
+
+  Scenario: id recipes are read off the models
+    Then the id recipe of "deployment" is "{deployment_target_id}:{service_id}:{tag}"
+    And the id recipe of "partition" is "{region_id}:{name}"
+    And the id recipe of "environment" is not derived
+
+  Scenario: a dry run changes nothing
+    When region "ckenv:ckptype:ckprov:ckreg" is renamed to "ckreg2" as a dry run
+    Then the cascade reported "1" rows of "deployment_proc"
+    And "deployment_proc" "ckenv:ckptype:ckprov:ckreg:ckpart:ckk8s:dt:ckapp:ckstack:web:default:ckapp:ckstack:web:worker" exists via rest
+    And "region" "ckenv:ckptype:ckprov:ckreg2" does not exist via rest
+
+  Scenario: renaming a region re-keys everything below it
+    When region "ckenv:ckptype:ckprov:ckreg" is renamed to "ckreg2"
+    Then the cascade reported "1" rows of "region"
+    And the cascade reported "2" rows of "zone"
+    And "region" "ckenv:ckptype:ckprov:ckreg" does not exist via rest
+    And "zone" "ckenv:ckptype:ckprov:ckreg2:b" exists via rest
+    And "partition" "ckenv:ckptype:ckprov:ckreg2:ckpart" exists via rest
+    And "deployment_target" "ckenv:ckptype:ckprov:ckreg2:ckpart:ckk8s:dt" exists via rest
+    And "deployment" "ckenv:ckptype:ckprov:ckreg2:ckpart:ckk8s:dt:ckapp:ckstack:web:default" exists via rest
+    And "deployment_proc" "ckenv:ckptype:ckprov:ckreg2:ckpart:ckk8s:dt:ckapp:ckstack:web:default:ckapp:ckstack:web:worker" exists via rest
+    And "deployment_proc" "ckenv:ckptype:ckprov:ckreg:ckpart:ckk8s:dt:ckapp:ckstack:web:default:ckapp:ckstack:web:worker" does not exist via rest
+
+  Scenario: re-deriving ids that are already right changes nothing
+    When every id is re-derived
+    Then the cascade reported no rows
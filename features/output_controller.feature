@@ -0,0 +1,44 @@
+# Test index — Streaming output (T39–T43)
+#
+# T39 — json output of many rows is a JSON array written row by row
+#   Data: a generator of 3 JSON:API rows that records how many rows were pulled
+#   Relationship: the array opens after one-row lookahead, before the generator is exhausted
+#   Passes when: output equals json.dumps of the simplified rows, and the first write
+#                happened after at most 2 rows were pulled
+#   Fails when: the controller materialises rows with list() before writing
+#   False success risk: low — the pull count is captured at the first write
+#   False failure risk: separator or spacing changes in json.dumps
+#
+# T40 — json output of one row stays a scalar object
+# T41 — json output of no rows is an empty array
+# T42 — ndjson output writes one object per line
+# T43 — plain output writes each row as it arrives
+
+Feature: Streaming output
+
+  # T39
+  Scenario: json output streams many rows as an array
+    When "3" rows are printed as "json"
+    Then the output is the json of "3" rows
+    And the first write happened after at most "2" rows were read
+
+  # T40
+  Scenario: json output keeps a single row scalar
+    When "1" rows are printed as "json"
+    Then the output is the json object of the row
+
+  # T41
+  Scenario: json output of no rows is an empty array
+    When "0" rows are printed as "json"
+    Then the output is "[]"
+
+  # T42
+  Scenario: ndjson output writes one object per line
+    When "3" rows are printed as "ndjson"
+    Then the output has "3" json lines
+
+  # T43
+  Scenario: plain output writes each row as it arrives
+    When "3" rows are printed as "plain" with field "id"
+    Then the output has "3" plain rows
+    And the first write happened after at most "1" rows were read
@@ -0,0 +1,28 @@
+@db
+Feature: Keyset pagination
+
+  Scenario: setup fixtures
+    Given bulk create "environment" with ids "pgenv" via rest
+    And bulk create "provider_type" with ids "pgptype" via rest
+    And bulk create "provider" in env "pgenv" of type "pgptype" with native_ids "pgprov" via rest
+    And "25" regions named "pgreg" under "pgenv:pgptype:pgprov" via rest
+
+  Scenario: page[after] walks a collection in primary key order
+    When reading "region" with page[after] in pages of "10" via rest
+    Then "3" pages with "25" distinct ids in ascending order were read
+    And the last page has no next link
+
+  Scenario: page[after] orders by created_at with the id as tie breaker
+    When sorting "region" by "created_at" with page[after] in pages of "7" via rest
+    Then "4" pages with "25" distinct ids were read
+
+  Scenario: page[after] keeps filters
+    When filtering "region" by name like "pgreg1%" with page[after] in pages of "2" via rest
+    Then "5" pages with "10" distinct ids in ascending order were read
+
+  Scenario: page[after] rejects other sort orders
+    When requesting "region" with page[after] sorted by "-name" via rest
+    Then the page request fails with "400"
+
+  Scenario: RestController streams every row over keyset pages
+    Then listing "region" via rest returns "25" rows
@@ -0,0 +1,72 @@
+@db
+Feature: Fleet-wide promote and set_version
+
+  Scenario: setup fixtures
+    Given bulk create "environment" with ids "pmenv" via rest
+    And bulk create "provider_type" with ids "pmptype" via rest
+    And bulk create "provider" in env "pmenv" of type "pmptype" with native_ids "pmprov" via rest
+    And bulk create "region" named "pmreg" under "provider_id" "pmenv:pmptype:pmprov" via rest
+    And bulk create "partition" named "pmpart" under "region_id" "pmenv:pmptype:pmprov:pmreg" via rest
+    And bulk create "deployment_target_type" with ids "pmk8s" via rest
+    And bulk create "deployment_target" rows via rest
+      | name | partition_id                      | deployment_target_type_id |
+      | a    | pmenv:pmptype:pmprov:pmreg:pmpart | pmk8s                     |
+      | b    | pmenv:pmptype:pmprov:pmreg:pmpart | pmk8s                     |
+      | c    | pmenv:pmptype:pmprov:pmreg:pmpart | pmk8s                     |
+    And bulk create "application" with ids "pmapp" via rest
+    And bulk create "stack" named "pmstack" under "application_id" "pmapp" via rest
+    And bulk create "service" named "web,other" under "stack_id" "pmapp:pmstack" via rest
+    And bulk create "deployment" rows via rest
+      | deployment_target_id                      | service_id          |
+      | pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:a | pmapp:pmstack:web   |
+      | pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:b | pmapp:pmstack:web   |
+      | pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:c | pmapp:pmstack:web   |
+      | pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:c | pmapp:pmstack:other |
+    And bulk create "build" rows via rest
+      | service_id          | build_num | vcs_ref |
+      | pmapp:pmstack:web   | 1         | v1      |
+      | pmapp:pmstack:web   | 2         | v2      |
+      | pmapp:pmstack:other | 1         | v1      |
+
+  Scenario: setver moves every matching deployment with one request
+    When build "pmapp:pmstack:web:1" is set on deployments where '[{"name": "service_id", "op": "eq", "val": "pmapp:pmstack:web"}]' via qcli
+    Then the promotion took "1" request
+    And the promotion reports "3" "promoted"
+    And deployment "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:b:pmapp:pmstack:web:default" is on release "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:b:pmapp:pmstack:web:default:1" via rest
+    And deployment "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:c:pmapp:pmstack:other:default" has no current release via rest
+
+  Scenario: setver on a single deployment
+    When build "pmapp:pmstack:web:2" is set on deployment "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:a:pmapp:pmstack:web:default" via qcli
+    Then the promotion reports "1" "promoted"
+    And deployment "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:a:pmapp:pmstack:web:default" is on release "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:a:pmapp:pmstack:web:default:2" via rest
+
+  Scenario: a dry run reports the diff and changes nothing
+    When deployment "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:a:pmapp:pmstack:web:default" is dry run promoted where '[{"name": "deployment_target_id", "op": "in", "val": ["pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:b", "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:c"]}]' via qcli
+    Then the promotion reports "2" "promoted"
+    And the promotion reports "1" "skipped"
+    And the promotion of "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:b:pmapp:pmstack:web:default" goes from "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:b:pmapp:pmstack:web:default:1" to "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:b:pmapp:pmstack:web:default:2"
+    And deployment "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:b:pmapp:pmstack:web:default" is on release "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:b:pmapp:pmstack:web:default:1" via rest
+    And "release" "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:b:pmapp:pmstack:web:default:2" does not exist via rest
+
+  Scenario: promote moves the rest of the fleet to the source's build
+    When deployment "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:a:pmapp:pmstack:web:default" is promoted where '[{"name": "deployment_target_id", "op": "in", "val": ["pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:b", "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:c"]}]' via qcli
+    Then the promotion reports "2" "promoted"
+    And deployment "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:c:pmapp:pmstack:web:default" is on release "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:c:pmapp:pmstack:web:default:2" via rest
+    And deployment "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:c:pmapp:pmstack:other:default" has no current release via rest
+
+  Scenario: promoting again changes nothing
+    When deployment "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:a:pmapp:pmstack:web:default" is promoted where '[{"name": "service_id", "op": "eq", "val": "pmapp:pmstack:web"}]' via qcli
+    Then the promotion reports "2" "unchanged"
+    And the promotion reports "0" "promoted"
+
+  Scenario: setver and promote print their results through the cli
+    When build "pmapp:pmstack:web:1" is set on deployment "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:c:pmapp:pmstack:web:default" via the cli
+    Then the cli printed "1" "promoted" promotions
+    And deployment "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:c:pmapp:pmstack:web:default" is on release "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:c:pmapp:pmstack:web:default:1" via rest
+    When deployment "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:a:pmapp:pmstack:web:default" is promoted where '[{"name": "service_id", "op": "eq", "val": "pmapp:pmstack:web"}]' via the cli
+    Then the cli printed "1" "promoted" promotions
+    And the cli printed "1" "unchanged" promotions
+
+  Scenario: a bad destination filter is rejected
+    When promoting deployment "pmenv:pmptype:pmprov:pmreg:pmpart:pmk8s:a:pmapp:pmstack:web:default" where '[{"name": "nope", "op": "eq", "val": "x"}]' via qcli fails
+    Then the promotion error mentions "Invalid filter object"
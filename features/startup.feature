@@ -0,0 +1,50 @@
+# Test index — qcli startup (T45–T48)
+#
+# T45 — cold startup stays under budget
+#   Data: a warm parser manifest; "qcli service get -h" run in fresh interpreters
+#   Relationship: the manifest replaces plugin imports and only the service subtree is built
+#   Passes when: the fastest of 3 runs finishes within QAIRON_STARTUP_BUDGET_MS (default 600)
+#   Fails when: plugin modules or the full parser tree are loaded on every run
+#   False success risk: a very fast machine hides a regression; T46 covers the imports directly
+#   False failure risk: a loaded CI host; raise QAIRON_STARTUP_BUDGET_MS there
+#
+# T46 — a core command imports no plugin dependencies
+#   Data: "qcli service get -h" with -X importtime
+#   Passes when: neither boto3 nor jinja2 shows up in the import log
+#   Fails when: a plugin package __init__ imports its cli or controllers again
+#
+# T47 — a stale manifest is rebuilt from the plugins
+#   Data: a manifest file whose fingerprint does not match the plugin sources
+#   Passes when: the loaded commands include every plugin and the file is rewritten
+#
+# T48 — only the invoked resource gets a subtree
+#   Passes when: building the parser for "service" creates subparsers for service alone,
+#                while every resource is still a valid top level choice
+
+Feature: qcli startup
+
+  # T45
+  Scenario: cold startup stays under budget
+    Given the parser manifest is warm
+    When "qcli service get -h" is started "3" times
+    Then the fastest start is within the startup budget
+
+  # T46
+  Scenario: a core command imports no plugin dependencies
+    Given the parser manifest is warm
+    When "qcli service get -h" is started with the import log
+    Then "boto3" was not imported
+    And "jinja2" was not imported
+
+  # T47
+  Scenario: a stale manifest is rebuilt
+    Given a parser manifest with a stale fingerprint
+    When the parser manifest is loaded
+    Then the manifest lists the commands of plugins "aws,bake,dependencies"
+    And the manifest file matches the plugin sources
+
+  # T48
+  Scenario: only the invoked resource is built
+    When the parser is built for "service"
+    Then only "service" has command subparsers
+    And "zone" is still a top level choice
@@ -0,0 +1,203 @@
+import io
+import os
+import tempfile
+
+from behave import given, when, then
+from botocore.stub import Stubber
+from jinja2.exceptions import SecurityError
+
+from qairon_qcli.controllers.rest_controller import RestController
+from qairon_qcli.plugins.aws.controllers.aws import secrets_client
+from qairon_qcli.plugins.bake.controllers import BakingBuilder, BatchBaker
+from qairon_qcli.plugins.bake.controllers.baking import JinjaTemplateEngine
+from qairon_qcli.plugins.bake.controllers.baking.substitution import substitute
+from qairon_qcli.plugins.bake.controllers.batch import output_dir_for
+
+
+@when('deployment "{deployment_id}" has a "{config_template_id}" config "{name}" with')
+def step_impl(context, deployment_id, config_template_id, name):
+    resources = [{'type': 'deployment_config',
+                  'attributes': {'deployment_id': deployment_id, 'config_template_id': config_template_id,
+                                 'name': name, 'config': context.text}}]
+    response = context.rest.bulk_create_resources('deployment_config', resources)
+    assert response.status_code == 201, response.text
+
+
+@when('service "{service_id}" bakes files with')
+def step_impl(context, service_id):
+    resources = [{'type': 'service_config',
+                  'attributes': {'service_id': service_id, 'config_template_id': 'bake_files', 'name': 'default',
+                                 'config': context.text}}]
+    response = context.rest.bulk_create_resources('service_config', resources)
+    assert response.status_code == 201, response.text
+
+
+@given('a file "{filename}" to bake with')
+def step_impl(context, filename):
+    context.bake_dir = tempfile.TemporaryDirectory()
+    with open(os.path.join(context.bake_dir.name, filename), 'w') as file:
+        file.write(context.text)
+
+
+@given('a file "{filename}" to bake beside it with')
+def step_impl(context, filename):
+    with open(os.path.join(context.bake_dir.name, filename), 'w') as file:
+        file.write(context.text)
+
+
+@when('the bake context of deployment "{deployment_id}" with build "{build_id}" is read')
+def step_impl(context, deployment_id, build_id):
+    before = RestController.request_count()
+    context.bake_response = context.rest.bake_context(deployment_id, build_id)
+    context.bake_requests = RestController.request_count() - before
+
+
+class ServerWithoutBakeContext(RestController):
+    BAKE_URL = RestController.BAKE_URL.replace('/api/bake/', '/api/no-bake/')
+
+
+def _bake(context, deployment_id, build_id, job, rest=None):
+    cwd = os.getcwd()
+    before = RestController.request_count()
+    os.chdir(context.bake_dir.name)
+    try:
+        BakingBuilder(deployment_id, build_id, job, rest).build().bake()
+    finally:
+        os.chdir(cwd)
+    context.bake_requests = RestController.request_count() - before
+
+
+@when('deployment "{deployment_id}" is baked with build "{build_id}" as job "{job}"')
+def step_impl(context, deployment_id, build_id, job):
+    _bake(context, deployment_id, build_id, job)
+
+
+@when('Secrets Manager holds "{secrets}" while deployment "{deployment_id}" is baked with build "{build_id}" as job "{job}"')
+def step_impl(context, secrets, deployment_id, build_id, job):
+    for name, value in (('AWS_DEFAULT_REGION', 'us-east-1'), ('AWS_ACCESS_KEY_ID', 'testing'),
+                        ('AWS_SECRET_ACCESS_KEY', 'testing')):
+        os.environ.setdefault(name, value)
+    values = dict(x.split('=', 1) for x in secrets.split(','))
+    response = {'SecretValues': [{'ARN': 'arn:aws:secretsmanager:us-east-1:123456789012:secret:%s' % secret_id,
+                                  'Name': secret_id, 'SecretString': value} for secret_id, value in values.items()],
+                'Errors': []}
+    with Stubber(secrets_client()) as stubber:
+        stubber.add_response('batch_get_secret_value', response, {'SecretIdList': sorted(values)})
+        _bake(context, deployment_id, build_id, job)
+        context.secrets_stubber = stubber
+
+
+@then('Secrets Manager was called once')
+def step_impl(context):
+    context.secrets_stubber.assert_no_pending_responses()
+
+
+@when('deployment "{deployment_id}" is baked with build "{build_id}" as job "{job}" by a server without bake contexts')
+def step_impl(context, deployment_id, build_id, job):
+    _bake(context, deployment_id, build_id, job, ServerWithoutBakeContext())
+
+
+@then('the bake context took "{count}" request')
+@then('the bake took "{count}" request')
+def step_impl(context, count):
+    assert context.bake_requests == int(count), context.bake_requests
+
+
+@then('the bake context includes "{count}" "{resource}"')
+def step_impl(context, count, resource):
+    assert context.bake_response.status_code == 200, context.bake_response.text
+    included = [x for x in context.bake_response.json()['included'] if x['type'] == resource]
+    assert len(included) == int(count), included
+
+
+@then('the bake context is refused with "{status}"')
+def step_impl(context, status):
+    assert context.bake_response.status_code == int(status), context.bake_response.text
+
+
+@then('the baked file "{filename}" is')
+def step_impl(context, filename):
+    with open(os.path.join(context.bake_dir.name, filename)) as file:
+        baked = file.read()
+    assert baked == context.text, baked
+
+
+@when("deployments where '{query}' are batch baked with build \"{build_id}\" as job \"{job}\"")
+def step_impl(context, query, build_id, job):
+    cwd = os.getcwd()
+    os.chdir(context.bake_dir.name)
+    try:
+        baker = BatchBaker(job, 'baked', workers=2)
+        context.batch_results = list(baker.bake(baker.from_query(query, build_id)))
+    finally:
+        os.chdir(cwd)
+
+
+@then('the batch reports "{count}" "{status}"')
+def step_impl(context, count, status):
+    matching = [x for x in context.batch_results if x['status'] == status]
+    assert len(matching) == int(count), context.batch_results
+    assert all(x['seconds'] >= 0 for x in context.batch_results), context.batch_results
+
+
+@then('the batch baked file "{filename}" of deployment "{deployment_id}" is')
+def step_impl(context, filename, deployment_id):
+    path = os.path.join(context.bake_dir.name, output_dir_for('baked', deployment_id), filename)
+    with open(path) as file:
+        baked = file.read()
+    assert baked == context.text, baked
+
+
+@when('the template "{source}" is rendered for targets "{names}"')
+def step_impl(context, source, names):
+    before = len(JinjaTemplateEngine._templates)
+    context.renders = [JinjaTemplateEngine().render_string({'deploy_target': {'name': name},
+                                                            'local': {'deployment_id': 'bkapp:web'}}, source)
+                       for name in names.split(',')]
+    context.compiled = len(JinjaTemplateEngine._templates) - before
+
+
+@then('the renders are "{renders}"')
+def step_impl(context, renders):
+    assert context.renders == renders.split(','), context.renders
+
+
+@then('the template was compiled "{count}" time')
+def step_impl(context, count):
+    assert context.compiled == int(count), context.compiled
+
+
+@then('the compiled template is in the bytecode cache')
+def step_impl(context):
+    directory = JinjaTemplateEngine.environment().bytecode_cache.directory
+    assert any(x.endswith('.cache') for x in os.listdir(directory)), os.listdir(directory)
+
+
+@when('the template "{source}" is rendered in the sandbox')
+def step_impl(context, source):
+    try:
+        context.renders = [JinjaTemplateEngine(sandboxed=True).render_string({'local': {}}, source)]
+        context.render_error = None
+    except SecurityError as e:
+        context.render_error = e
+
+
+@then('rendering is refused as unsafe')
+def step_impl(context):
+    assert context.render_error is not None, context.renders
+
+
+@when('"{text}" is substituted with "{values}" in every chunk size')
+def step_impl(context, text, values):
+    values = dict(x.split('=') for x in values.split(','))
+    context.substituted = []
+    for chunk_size in range(1, len(text) + 1):
+        output = []
+        substitute(io.StringIO(text).read, output.append, lambda x: values.get(x.group(1), x.group(0)), chunk_size)
+        context.substituted.append(''.join(output))
+
+
+@then('every chunk size gives "{expected}"')
+def step_impl(context, expected):
+    assert set(context.substituted) == {expected}, context.substituted
+
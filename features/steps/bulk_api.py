@@ -0,0 +1,142 @@
+import json
+
+import requests
+from behave import given, when, then
+
+
+def _named(resource, names, parent_field, parent_id, **attributes):
+    return [{'type': resource, 'attributes': dict(name=name, **{parent_field: parent_id}, **attributes)}
+            for name in names.split(',')]
+
+
+def _bulk_create(context, resource, resources, upsert=False):
+    context.bulk_response = context.rest.bulk_create_resources(resource, resources, upsert=upsert)
+    return context.bulk_response
+
+
+def _assert_created(response, expected_ids):
+    assert response.status_code == 201, '%d %s' % (response.status_code, response.text)
+    ids = [x['id'] for x in response.json()['data']]
+    assert ids == expected_ids, ids
+
+
+@given('bulk create "{resource}" with ids "{ids}" via rest')
+def step_impl(context, resource, ids):
+    response = _bulk_create(context, resource, [{'type': resource, 'id': x} for x in ids.split(',')])
+    _assert_created(response, ids.split(','))
+
+
+@given('bulk create "provider" in env "{environment_id}" of type "{provider_type_id}" with native_ids "{native_ids}" via rest')
+def step_impl(context, environment_id, provider_type_id, native_ids):
+    resources = [{'type': 'provider', 'attributes': {'environment_id': environment_id, 'native_id': native_id},
+                  'relationships': {'type': {'data': {'type': 'provider_type', 'id': provider_type_id}}}}
+                 for native_id in native_ids.split(',')]
+    response = _bulk_create(context, 'provider', resources)
+    _assert_created(response, [':'.join([environment_id, provider_type_id, x]) for x in native_ids.split(',')])
+
+
+@given('bulk create "{resource}" rows via rest')
+def step_impl(context, resource):
+    resources = []
+    for row in context.table:
+        attributes = {k: v for k, v in row.as_dict().items() if k != 'id' and v != ''}
+        resource_object = {'type': resource, 'attributes': attributes}
+        if row.get('id'):
+            resource_object['id'] = row['id']
+        resources.append(resource_object)
+    response = _bulk_create(context, resource, resources)
+    assert response.status_code == 201, '%d %s' % (response.status_code, response.text)
+
+
+@given('bulk create "{resource}" named "{names}" under "{parent_field}" "{parent_id}" via rest')
+@then('bulk create "{resource}" named "{names}" under "{parent_field}" "{parent_id}" via rest')
+def step_impl(context, resource, names, parent_field, parent_id):
+    response = _bulk_create(context, resource, _named(resource, names, parent_field, parent_id))
+    _assert_created(response, ['%s:%s' % (parent_id, x) for x in names.split(',')])
+
+
+@when('bulk create "{resource}" named "{names}" under "{parent_field}" "{parent_id}" via rest it fails')
+def step_impl(context, resource, names, parent_field, parent_id):
+    response = _bulk_create(context, resource, _named(resource, names, parent_field, parent_id))
+    assert response.status_code == 400
+    assert 'errors' in response.json()
+
+
+@when('bulk upsert "{resource}" named "{names}" under "{parent_field}" "{parent_id}" with defaults "{defaults}" via rest')
+def step_impl(context, resource, names, parent_field, parent_id, defaults):
+    response = _bulk_create(context, resource, _named(resource, names, parent_field, parent_id, defaults=defaults),
+                            upsert=True)
+    _assert_created(response, ['%s:%s' % (parent_id, x) for x in names.split(',')])
+
+
+@when('bulk create "{resource}" named "{names}" under "{parent_field}" "{parent_id}" as ndjson via rest')
+def step_impl(context, resource, names, parent_field, parent_id):
+    body = '\n'.join(json.dumps({'data': x}) for x in _named(resource, names, parent_field, parent_id))
+    response = requests.post(context.rest.URL + resource + '/_bulk', data=body,
+                             headers={'Content-Type': 'application/x-ndjson'})
+    _assert_created(response, ['%s:%s' % (parent_id, x) for x in names.split(',')])
+
+
+@then('bulk result reports "{created}" created and "{updated}" updated')
+def step_impl(context, created, updated):
+    meta = context.bulk_response.json()['meta']
+    assert meta['created'] == int(created), meta
+    assert meta['updated'] == int(updated), meta
+
+
+def _pairs(association, pairs):
+    owner_field, item_field = {'services_repos': ('service_id', 'repo_id'),
+                               'deployments_zones': ('deployment_id', 'zone_id')}[association]
+    return [{owner_field: owner, item_field: item} for owner, item in (x.split('=') for x in pairs.split(','))]
+
+
+@when('bulk associate "{association}" pairs "{pairs}" via rest')
+def step_impl(context, association, pairs):
+    context.bulk_response = context.rest.bulk_associate(association, _pairs(association, pairs))
+    assert context.bulk_response.status_code == 200, context.bulk_response.text
+
+
+@when('bulk dissociate "{association}" pairs "{pairs}" via rest')
+def step_impl(context, association, pairs):
+    context.bulk_response = context.rest.bulk_dissociate(association, _pairs(association, pairs))
+    assert context.bulk_response.status_code == 200, context.bulk_response.text
+
+
+@then('bulk association reports "{counter}" "{number}"')
+def step_impl(context, counter, number):
+    meta = context.bulk_response.json()['meta']
+    assert meta[counter] == int(number), meta
+
+
+@when('add "{singular_resource}" "{item_ids}" to "{plural_resource}" on "{resource}" "{res_id}" via rest')
+def step_impl(context, singular_resource, item_ids, plural_resource, resource, res_id):
+    response = context.rest.add_to_many_to_many(resource, res_id, singular_resource, plural_resource,
+                                                item_ids.split(','))
+    assert response is not None
+
+
+@when('remove "{singular_resource}" "{item_ids}" from "{plural_resource}" on "{resource}" "{res_id}" via rest')
+def step_impl(context, singular_resource, item_ids, plural_resource, resource, res_id):
+    response = context.rest.del_from_many_to_many(resource, res_id, singular_resource, plural_resource,
+                                                  item_ids.split(','))
+    assert response is not None
+
+
+@then('"{resource}" "{res_id}" has "{number}" "{field}" via rest')
+def step_impl(context, resource, res_id, number, field):
+    assert len(context.rest.get_field(resource, res_id, field)) == int(number)
+
+
+@then('"{resource}" "{res_id}" exists via rest')
+def step_impl(context, resource, res_id):
+    assert context.rest.get_instance(resource, res_id)['id'] == res_id
+
+
+@then('"{resource}" "{res_id}" does not exist via rest')
+def step_impl(context, resource, res_id):
+    assert context.rest._get_record_(resource, res_id).status_code == 404
+
+
+@then('"{resource}" "{res_id}" has defaults "{defaults}" via rest')
+def step_impl(context, resource, res_id, defaults):
+    assert context.rest.get_instance(resource, res_id)['attributes']['defaults'] == defaults
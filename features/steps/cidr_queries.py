@@ -0,0 +1,87 @@
+from behave import when, then
+from sqlalchemy import text
+
+from db import db
+from qairon_qcli.controllers.operations_controller import OperationsController
+
+
+def _lookup(context, query):
+    try:
+        context.lookup = list(query(OperationsController()))
+        context.lookup_error = None
+    except ValueError as e:
+        context.lookup = None
+        context.lookup_error = str(e)
+
+
+@when('"{resource}" containing "{address}" is looked up via qcli')
+def step_impl(context, resource, address):
+    _lookup(context, lambda ops: ops.contains(resource, address))
+    assert context.lookup_error is None, context.lookup_error
+
+
+@when('"{resource}" containing "{address}" is looked up via qcli it fails')
+def step_impl(context, resource, address):
+    _lookup(context, lambda ops: ops.contains(resource, address))
+    assert context.lookup_error is not None, context.lookup
+
+
+@when('"{resource}" overlapping "{cidr}" is looked up via qcli')
+def step_impl(context, resource, cidr):
+    _lookup(context, lambda ops: ops.overlaps(resource, cidr))
+    assert context.lookup_error is None, context.lookup_error
+
+
+@when('"{resource}" overlapping "{cidr}" is looked up via qcli it fails')
+def step_impl(context, resource, cidr):
+    _lookup(context, lambda ops: ops.overlaps(resource, cidr))
+    assert context.lookup_error is not None, context.lookup
+
+
+@when('free "/{prefixlen}" blocks of network "{network_id}" are looked up via qcli')
+def step_impl(context, prefixlen, network_id):
+    _lookup(context, lambda ops: ops.free_blocks(network_id, prefixlen))
+    assert context.lookup_error is None, context.lookup_error
+
+
+@then('the lookup returns "{ids}"')
+def step_impl(context, ids):
+    assert [x['id'] for x in context.lookup] == ids.split(','), [x['id'] for x in context.lookup]
+
+
+@then('the lookup returns nothing')
+def step_impl(context):
+    assert context.lookup == [], context.lookup
+
+
+@then('the free blocks hold "{count}" "/{prefixlen}"s')
+def step_impl(context, count, prefixlen):
+    assert sum(x['attributes']['capacity'] for x in context.lookup) == int(count), context.lookup
+
+
+@then('the lookup error mentions "{text}"')
+def step_impl(context, text):
+    assert text in context.lookup_error, context.lookup_error
+
+
+def _plan(table, condition, value):
+    from app import app
+    with app.app_context():
+        with db.engine.connect() as connection:
+            # the fixtures are far too small for the planner to choose an index by itself
+            connection.execute(text('SET enable_seqscan = off'))
+            rows = connection.execute(text('EXPLAIN SELECT id FROM %s WHERE cidr %s' % (table, condition)),
+                                      {'value': value})
+            return '\n'.join(row[0] for row in rows)
+
+
+@then('a "{table}" containment lookup of "{address}" can use index "{index}"')
+def step_impl(context, table, address, index):
+    plan = _plan(table, '>>= CAST(:value AS inet)', address)
+    assert index in plan, plan
+
+
+@then('a "{table}" overlap lookup of "{cidr}" can use index "{index}"')
+def step_impl(context, table, cidr, index):
+    plan = _plan(table, '&& CAST(:value AS cidr)', cidr)
+    assert index in plan, plan
@@ -384,3 +384,26 @@ def step_impl(context, resource, field1, value1, field2, value2):
     output_obj['resource'] = resource
     resource_dict['id'] = ':'.join([value1, value2])
     assert output_obj == resource_dict
+
+
+def _exported_lines(context):
+    output = context.stdout_mock.getvalue()
+    context.stdout_mock.seek(0)
+    context.stdout_mock.truncate(0)
+    return [json.loads(line) for line in output.splitlines()]
+
+
+@then('export "{resource}" via cli prints "{number}" ndjson lines')
+def step_impl(context, resource, number):
+    context.cli.export(resource)
+    rows = _exported_lines(context)
+    assert len(rows) == int(number)
+    assert all(row['type'] == resource for row in rows)
+
+
+@then('export "{resource}" where "{field}" equals "{value}" with fields "{fields}" via cli prints "{expected}"')
+def step_impl(context, resource, field, value, fields, expected):
+    query = json.dumps([dict(name=field, op='eq', val=value)])
+    context.cli.export(resource, query=query, output_fields=fields.split(','))
+    rows = _exported_lines(context)
+    assert [row['attributes'] for row in rows] == [{fields: expected}], rows
@@ -0,0 +1,48 @@
+from behave import when, then
+
+from qairon_qcli.controllers.operations_controller import OperationsController
+from qairon_qcli.controllers.rest_controller import RestController
+
+
+def _clone(context, deployment_id, deployment_target_id, tag=None):
+    before = RestController.request_count()
+    try:
+        context.clone_rows = list(OperationsController().clone_deployment(deployment_id, deployment_target_id, tag))
+        context.clone_error = None
+    except ValueError as e:
+        context.clone_rows = None
+        context.clone_error = str(e)
+    context.clone_requests = RestController.request_count() - before
+
+
+@when('deployment "{deployment_id}" is cloned to target "{deployment_target_id}" via qcli')
+def step_impl(context, deployment_id, deployment_target_id):
+    _clone(context, deployment_id, deployment_target_id)
+    assert context.clone_error is None, context.clone_error
+
+
+@when('tagging a clone of deployment "{deployment_id}" on target "{deployment_target_id}" as "{tag}" via qcli')
+def step_impl(context, deployment_id, deployment_target_id, tag):
+    _clone(context, deployment_id, deployment_target_id, tag)
+    assert context.clone_error is None, context.clone_error
+
+
+@when('cloning deployment "{deployment_id}" to target "{deployment_target_id}" via qcli fails')
+def step_impl(context, deployment_id, deployment_target_id):
+    _clone(context, deployment_id, deployment_target_id)
+    assert context.clone_error is not None, context.clone_rows
+
+
+@then('the clone is "{deployment_id}"')
+def step_impl(context, deployment_id):
+    assert [x['id'] for x in context.clone_rows] == [deployment_id], context.clone_rows
+
+
+@then('the clone took "{count}" request')
+def step_impl(context, count):
+    assert context.clone_requests == int(count), context.clone_requests
+
+
+@then('the clone error mentions "{text}"')
+def step_impl(context, text):
+    assert text in context.clone_error, context.clone_error
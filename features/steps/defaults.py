@@ -0,0 +1,84 @@
+import datetime
+
+from behave import given, when, then
+from sqlalchemy import Column, Integer, MetaData, Table, select
+
+from db import db
+from models import Environment
+from models.defaults import Defaults, ParsedCache
+
+
+def _engine():
+    from app import app
+    with app.app_context():
+        return db.engine
+
+
+@given('a scratch table with jsonb defaults')
+def step_impl(context):
+    context.scratch = Table('defaults_scratch', MetaData(), Column('id', Integer, primary_key=True),
+                            Column('defaults', Defaults(jsonb=True)))
+    engine = _engine()
+    context.scratch.drop(engine, checkfirst=True)
+    context.scratch.create(engine)
+    context.add_cleanup(context.scratch.drop, engine)
+
+
+@when('defaults "{defaults}" are written to the scratch table')
+def step_impl(context, defaults):
+    with _engine().begin() as conn:
+        conn.execute(context.scratch.insert().values(id=1, defaults=defaults))
+
+
+@then('the scratch table reads back an object with "{key}" "{value}"')
+def step_impl(context, key, value):
+    with _engine().connect() as conn:
+        defaults = conn.execute(select(context.scratch.c.defaults)).scalar_one()
+    assert isinstance(defaults, dict) and defaults[key] == value, defaults
+
+
+@then('the scratch table finds the row where defaults "{key}" is "{value}"')
+def step_impl(context, key, value):
+    with _engine().connect() as conn:
+        ids = conn.execute(select(context.scratch.c.id)
+                           .where(context.scratch.c.defaults[key].astext == value)).scalars().all()
+    assert ids == [1], ids
+
+
+@then('the scratch table reads back the string "{value}"')
+def step_impl(context, value):
+    with _engine().connect() as conn:
+        defaults = conn.execute(select(context.scratch.c.defaults)).scalar_one()
+    assert defaults == value, defaults
+
+
+@given('an environment row with defaults "{defaults}"')
+def step_impl(context, defaults):
+    context.parsed_cache = ParsedCache()
+    context.parse_count = 0
+    context.environment = Environment(id='cached', defaults=defaults, created_at=datetime.datetime(2026, 1, 1))
+
+
+def _counting_parse(context):
+    if not hasattr(context, 'counting_parse'):
+        def parse(text):
+            context.parse_count += 1
+            return text
+        context.counting_parse = parse
+    return context.counting_parse
+
+
+@when('its defaults are read "{times}" times')
+def step_impl(context, times):
+    for _ in range(int(times)):
+        context.parsed_cache.get(context.environment, 'defaults', _counting_parse(context))
+
+
+@when('the environment row is updated')
+def step_impl(context):
+    context.environment.last_updated_at = datetime.datetime(2026, 1, 2)
+
+
+@then('they were parsed "{times}" times')
+def step_impl(context, times):
+    assert context.parse_count == int(times), context.parse_count
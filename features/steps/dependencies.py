@@ -0,0 +1,174 @@
+import json
+
+from behave import given, when, then
+from sqlalchemy import event, text
+
+from db import db
+from qairon_qcli.controllers.rest_controller import RestController
+from qairon_qcli.plugins.dependencies.controllers import DependencyController
+
+
+def _related(context, dependency_id):
+    before = RestController.request_count()
+    try:
+        context.related = list(DependencyController().get_related(dependency_id))
+        context.related_error = None
+    except ValueError as e:
+        context.related = None
+        context.related_error = str(e)
+    context.related_requests = RestController.request_count() - before
+
+
+@when('the related objects of dependency "{dependency_id}" are fetched via qcli')
+def step_impl(context, dependency_id):
+    _related(context, dependency_id)
+    assert context.related_error is None, context.related_error
+
+
+@when('the related objects of dependency "{dependency_id}" are fetched via qcli it fails')
+def step_impl(context, dependency_id):
+    _related(context, dependency_id)
+    assert context.related_error is not None, context.related
+
+
+@then('the related objects are "{resource}" "{ids}"')
+def step_impl(context, resource, ids):
+    assert [(x['type'], x['id']) for x in context.related] == [(resource, x) for x in ids.split(',')], context.related
+
+
+@then('fetching the related objects took "{count}" request')
+def step_impl(context, count):
+    assert context.related_requests == int(count), context.related_requests
+
+
+@then('the related objects error mentions "{text}"')
+def step_impl(context, text):
+    assert text in context.related_error, context.related_error
+
+
+def _walk(context, node, direction, **kwargs):
+    before = RestController.request_count()
+    context.walk = list(DependencyController().walk(node, direction, **kwargs))
+    context.walk_requests = RestController.request_count() - before
+
+
+@when('the graph is walked "{direction}" from "{node}" via qcli')
+def step_impl(context, direction, node):
+    _walk(context, node, direction)
+
+
+@when('the graph is walked "{direction}" from "{node}" at most "{depth}" deep via qcli')
+def step_impl(context, direction, node, depth):
+    _walk(context, node, direction, max_depth=depth)
+
+
+@when('the graph is walked "{direction}" from "{node}" following only "{related_type}" related objects via qcli')
+def step_impl(context, direction, node, related_type):
+    _walk(context, node, direction, related_types=[related_type])
+
+
+@when('walking the graph "{direction}" from "{node}" at most "{depth}" deep via qcli fails with "{text}"')
+def step_impl(context, direction, node, depth, text):
+    try:
+        _walk(context, node, direction, max_depth=depth)
+    except ValueError as e:
+        assert text in str(e), str(e)
+    else:
+        raise AssertionError(context.walk)
+
+
+@given('a ladder of "{rungs}" diamonds of applications "{prefix}"')
+def step_impl(context, rungs, prefix):
+    # prefixN uses prefixNl and prefixNr, which both use prefixN+1
+    rungs = int(rungs)
+    edges = [(x, '%s%d%s' % (prefix, i, side)) for i in range(rungs) for x in ['%s%d' % (prefix, i)] for side in 'lr']
+    edges += [('%s%d%s' % (prefix, i, side), '%s%d' % (prefix, i + 1)) for i in range(rungs) for side in 'lr']
+    names = sorted({x for edge in edges for x in edge})
+    for resource, rows in (
+            ('application', [{'id': x} for x in names]),
+            ('relatable', [{'relatable_type': 'Application', 'object_id': x} for x in names]),
+            ('dependency', [{'dependency_case_id': 'dpapp_app', 'relatable_id': 'Application:%s' % x, 'name': 'uses'}
+                            for x in names]),
+            ('related', [{'dependency_id': 'dpapp_app:Application:%s:uses' % source, 'related_type': 'Application',
+                          'object_id': target} for source, target in edges])):
+        response = context.rest.bulk_create_resources(resource, [{'type': resource, 'attributes': x} for x in rows])
+        assert response.status_code == 201, response.text
+
+
+@when('the graph is walked "{direction}" from "{node}" at most "{depth}" deep within "{seconds}" seconds')
+def step_impl(context, direction, node, depth, seconds):
+    from app import app
+    from plugins.dependencies.api import GraphWalker
+    with app.app_context():
+        try:
+            # a walk that follows every path of the ladder would never finish
+            db.session.execute(text("SET LOCAL statement_timeout = '%ds'" % int(seconds)))
+            context.walk = [json.loads(x) for x in GraphWalker(node, direction, int(depth)).lines()]
+        finally:
+            db.session.rollback()
+
+
+@then('the walk reaches "{count}" nodes, each once')
+def step_impl(context, count):
+    nodes = [x['id'] for x in context.walk if not x['attributes']['cycle']]
+    assert len(nodes) == len(set(nodes)) == int(count), nodes
+
+
+@then('the walk reaches "{nodes}"')
+def step_impl(context, nodes):
+    reached = ['%s@%d' % (x['id'], x['attributes']['depth']) for x in context.walk if not x['attributes']['cycle']]
+    assert sorted(reached) == sorted(nodes.split(',')), reached
+
+
+@then('the walk finds a cycle back to "{node}" at depth "{depth}"')
+def step_impl(context, node, depth):
+    cycles = [(x['id'], x['attributes']['depth']) for x in context.walk if x['attributes']['cycle']]
+    assert cycles == [(node, int(depth))], cycles
+
+
+@then('the walk finds no cycle')
+def step_impl(context):
+    assert not any(x['attributes']['cycle'] for x in context.walk), context.walk
+
+
+@then('walking the graph took "{count}" request')
+def step_impl(context, count):
+    assert context.walk_requests == int(count), context.walk_requests
+
+
+@when('"{count}" "{related_type}" related rows are bulk loaded into dependency "{dependency_id}"')
+def step_impl(context, count, related_type, dependency_id):
+    from app import app
+    resources = [{'type': 'related', 'attributes': {'dependency_id': dependency_id, 'related_type': related_type,
+                                                    'object_id': 'bulk%04d' % i}}
+                 for i in range(int(count))]
+    with app.app_context():
+        engine = db.engine
+    queries = []
+
+    def collect(conn, cursor, statement, parameters, execution_context, executemany):
+        queries.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', collect)
+    try:
+        context.related_response = app.test_client().post('/api/rest/v1/related/_bulk', json={'data': resources},
+                                                          base_url='https://localhost')
+    finally:
+        event.remove(engine, 'before_cursor_execute', collect)
+    context.related_queries = queries
+
+
+@then('the related rows were created')
+def step_impl(context):
+    assert context.related_response.status_code == 201, context.related_response.get_data(as_text=True)
+
+
+@then('loading the related rows took at most "{count}" queries')
+def step_impl(context, count):
+    assert len(context.related_queries) <= int(count), context.related_queries
+
+
+@then('the related rows were rejected mentioning "{text}"')
+def step_impl(context, text):
+    assert context.related_response.status_code == 400, context.related_response.status_code
+    assert text in context.related_response.get_data(as_text=True), context.related_response.get_data(as_text=True)
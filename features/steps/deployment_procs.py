@@ -0,0 +1,89 @@
+from behave import given, when, then
+from sqlalchemy import event, update
+
+from db import db
+from models import Deployment, DeploymentProc
+
+
+def _names(prefix, count):
+    return [prefix] if int(count) == 1 else ['%s%03d' % (prefix, i) for i in range(int(count))]
+
+
+@given('"{count}" procs named "{prefix}" of service "{service_id}" exist')
+def step_impl(context, count, prefix, service_id):
+    resources = [{'type': 'proc', 'attributes': {'name': name, 'service_id': service_id}}
+                 for name in _names(prefix, count)]
+    response = context.rest.bulk_create_resources('proc', resources)
+    assert response.status_code == 201, response.text
+
+
+@when('"{count}" procs named "{prefix}" of service "{service_id}" are bulk loaded into deployment "{deployment_id}"')
+def step_impl(context, count, prefix, service_id, deployment_id):
+    from app import app
+    resources = [{'type': 'deployment_proc',
+                  'attributes': {'deployment_id': deployment_id, 'proc_id': '%s:%s' % (service_id, name)}}
+                 for name in _names(prefix, count)]
+    with app.app_context():
+        engine = db.engine
+    queries = []
+
+    def collect(conn, cursor, statement, parameters, execution_context, executemany):
+        queries.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', collect)
+    try:
+        context.procs_response = app.test_client().post('/api/rest/v1/deployment_proc/_bulk',
+                                                        json={'data': resources}, base_url='https://localhost')
+    finally:
+        event.remove(engine, 'before_cursor_execute', collect)
+    context.procs_queries = queries
+
+
+@then('the deployment procs were created')
+def step_impl(context):
+    assert context.procs_response.status_code == 201, context.procs_response.get_data(as_text=True)
+
+
+@then('loading the deployment procs took at most "{count}" queries')
+def step_impl(context, count):
+    assert len(context.procs_queries) <= int(count), context.procs_queries
+
+
+@then('the deployment procs were rejected mentioning "{text}"')
+def step_impl(context, text):
+    assert context.procs_response.status_code == 400, context.procs_response.status_code
+    assert text in context.procs_response.get_data(as_text=True), context.procs_response.get_data(as_text=True)
+
+
+@when(
+    'one session adds proc "{first}" to deployment "{deployment_id}", which then moves to service "{service_id}", '
+    'and adds proc "{second}"')
+def step_impl(context, first, deployment_id, service_id, second):
+    from app import app
+
+    def move(to):
+        with db.engine.begin() as connection:
+            connection.execute(update(Deployment).where(Deployment.id == deployment_id).values(service_id=to))
+
+    with app.app_context():
+        session = db.session
+        original = session.get(Deployment, deployment_id).service_id
+        session.expunge_all()
+        try:
+            session.add(DeploymentProc(deployment_id=deployment_id, proc_id=first))
+            session.flush()
+            move(service_id)
+            session.add(DeploymentProc(deployment_id=deployment_id, proc_id=second))
+            session.flush()
+            context.procs_error = None
+        except AssertionError as e:
+            context.procs_error = str(e)
+        finally:
+            session.rollback()
+            move(original)
+            session.remove()
+
+
+@then('the second proc was checked against service "{service_id}"')
+def step_impl(context, service_id):
+    assert context.procs_error is None, context.procs_error
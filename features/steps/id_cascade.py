@@ -0,0 +1,55 @@
+from behave import when, then
+
+from db import db
+
+
+def _cascade():
+    from models.cascade import IdCascade
+    return IdCascade()
+
+
+def _rename(context, region_id, name, dry_run):
+    from app import app
+    with app.app_context():
+        context.cascade_report = _cascade().run('region', [region_id], {'name': name}, dry_run=dry_run)
+        db.session.remove()
+
+
+@when('region "{region_id}" is renamed to "{name}" as a dry run')
+def step_impl(context, region_id, name):
+    _rename(context, region_id, name, True)
+
+
+@when('region "{region_id}" is renamed to "{name}"')
+def step_impl(context, region_id, name):
+    _rename(context, region_id, name, False)
+
+
+@when('every id is re-derived')
+def step_impl(context):
+    from app import app
+    with app.app_context():
+        context.cascade_report = _cascade().refresh()
+        db.session.remove()
+
+
+@then('the cascade reported "{count}" rows of "{table}"')
+def step_impl(context, count, table):
+    assert context.cascade_report.get(table) == int(count), context.cascade_report
+
+
+@then('the cascade reported no rows')
+def step_impl(context):
+    assert not context.cascade_report, context.cascade_report
+
+
+@then('the id recipe of "{table}" is "{recipe}"')
+def step_impl(context, table, recipe):
+    parts = _cascade().recipes[table]
+    spelled = ''.join(value if kind == 'literal' else '{%s}' % value for kind, value in parts)
+    assert spelled == recipe, spelled
+
+
+@then('the id recipe of "{table}" is not derived')
+def step_impl(context, table):
+    assert table not in _cascade().recipes, _cascade().recipes[table]
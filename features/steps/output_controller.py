@@ -0,0 +1,74 @@
+import json
+from io import StringIO
+
+from behave import when, then
+
+from qairon_qcli.controllers.output_controller import StringIOOutputController, simplify_row
+
+
+def _row(i):
+    return {'type': 'release', 'id': 'rel%d' % i, 'attributes': {'build_num': i}}
+
+
+class _RecordingIO(StringIO):
+    """Remembers how many rows had been pulled when the first write happened."""
+
+    def __init__(self, context):
+        super().__init__()
+        self.context = context
+        self.pulled_at_first_write = None
+
+    def write(self, s):
+        if self.pulled_at_first_write is None:
+            self.pulled_at_first_write = self.context.pulled
+        return super().write(s)
+
+
+def _rows(context, number):
+    for i in range(number):
+        context.pulled += 1
+        yield _row(i)
+
+
+@when('"{number}" rows are printed as "{output_format}"')
+@when('"{number}" rows are printed as "{output_format}" with field "{field}"')
+def step_impl(context, number, output_format, field=None):
+    context.pulled = 0
+    context.number = int(number)
+    context.output = _RecordingIO(context)
+    output_fields = [field] if field else None
+    StringIOOutputController(context.output).handle(_rows(context, context.number), output_format=output_format,
+                                                    output_fields=output_fields)
+
+
+@then('the output is the json of "{number}" rows')
+def step_impl(context, number):
+    expected = json.dumps([simplify_row(_row(i)) for i in range(int(number))])
+    assert context.output.getvalue() == expected, context.output.getvalue()
+
+
+@then('the output is the json object of the row')
+def step_impl(context):
+    assert json.loads(context.output.getvalue()) == simplify_row(_row(0)), context.output.getvalue()
+
+
+@then('the output is "{expected}"')
+def step_impl(context, expected):
+    assert context.output.getvalue() == expected, context.output.getvalue()
+
+
+@then('the output has "{number}" json lines')
+def step_impl(context, number):
+    lines = context.output.getvalue().splitlines()
+    assert [json.loads(line) for line in lines] == [simplify_row(_row(i)) for i in range(int(number))], lines
+
+
+@then('the output has "{number}" plain rows')
+def step_impl(context, number):
+    assert context.output.getvalue().count('rel') == int(number), context.output.getvalue()
+
+
+@then('the first write happened after at most "{number}" rows were read')
+def step_impl(context, number):
+    assert context.output.pulled_at_first_write <= int(number), context.output.pulled_at_first_write
+    assert context.pulled == context.number
@@ -0,0 +1,76 @@
+import json
+
+from behave import given, when, then
+
+
+def _read_pages(context, resource, size, **params):
+    params.update({'page[after]': '', 'page[size]': size})
+    response = context.rest.session.get(context.rest.URL + resource, params=params, headers=context.rest.HEADERS)
+    context.pages = []
+    while True:
+        assert response.status_code == 200, response.text
+        page = response.json()
+        context.pages.append(page)
+        if page['links']['next'] is None:
+            break
+        response = context.rest.session.get(page['links']['next'], headers=context.rest.HEADERS)
+    context.page_ids = [x['id'] for page in context.pages for x in page['data']]
+
+
+@given('"{count}" regions named "{prefix}" under "{provider_id}" via rest')
+def step_impl(context, count, prefix, provider_id):
+    resources = [{'type': 'region', 'attributes': {'name': '%s%02d' % (prefix, i), 'provider_id': provider_id}}
+                 for i in range(int(count))]
+    response = context.rest.bulk_create_resources('region', resources)
+    assert response.status_code == 201, response.text
+
+
+@when('reading "{resource}" with page[after] in pages of "{size}" via rest')
+def step_impl(context, resource, size):
+    _read_pages(context, resource, size)
+
+
+@when('sorting "{resource}" by "{sort}" with page[after] in pages of "{size}" via rest')
+def step_impl(context, resource, size, sort):
+    _read_pages(context, resource, size, sort=sort)
+
+
+@when('filtering "{resource}" by name like "{pattern}" with page[after] in pages of "{size}" via rest')
+def step_impl(context, resource, size, pattern):
+    _read_pages(context, resource, size, **{'filter[objects]': json.dumps([dict(name='name', op='like', val=pattern)])})
+
+
+@when('requesting "{resource}" with page[after] sorted by "{sort}" via rest')
+def step_impl(context, resource, sort):
+    context.page_response = context.rest.session.get(context.rest.URL + resource, headers=context.rest.HEADERS,
+                                                     params={'page[after]': '', 'sort': sort})
+
+
+@then('"{pages}" pages with "{count}" distinct ids were read')
+def step_impl(context, pages, count):
+    assert len(context.pages) == int(pages), len(context.pages)
+    assert len(set(context.page_ids)) == len(context.page_ids) == int(count), context.page_ids
+
+
+@then('"{pages}" pages with "{count}" distinct ids in ascending order were read')
+def step_impl(context, pages, count):
+    context.execute_steps('then "%s" pages with "%s" distinct ids were read' % (pages, count))
+    assert context.page_ids == sorted(context.page_ids), context.page_ids
+
+
+@then('the last page has no next link')
+def step_impl(context):
+    assert context.pages[-1]['links']['next'] is None
+    assert len(context.pages[-1]['data']) > 0
+
+
+@then('the page request fails with "{status}"')
+def step_impl(context, status):
+    assert context.page_response.status_code == int(status), context.page_response.status_code
+    assert 'errors' in context.page_response.json()
+
+
+@then('listing "{resource}" via rest returns "{count}" rows')
+def step_impl(context, resource, count):
+    rows = [row for page in context.rest.list(resource) for row in page]
+    assert len(rows) == int(count), len(rows)
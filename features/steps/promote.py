@@ -0,0 +1,109 @@
+import io
+import json
+
+from behave import when, then
+
+from qairon_qcli.controllers.operations_controller import OperationsController
+from qairon_qcli.controllers.output_controller import StringIOOutputController
+from qairon_qcli.controllers.qcli_controller import QCLIController
+from qairon_qcli.controllers.rest_controller import RestController
+
+
+def _promote(context, promote):
+    before = RestController.request_count()
+    try:
+        context.promotion = list(promote(OperationsController()))
+        context.promotion_error = None
+    except ValueError as e:
+        context.promotion = None
+        context.promotion_error = str(e)
+    context.promotion_requests = RestController.request_count() - before
+
+
+def _promote_via_cli(context, promote):
+    output = io.StringIO()
+    promote(QCLIController(StringIOOutputController(output)))
+    context.promotion = [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+@when("build \"{build_id}\" is set on deployments where '{query}' via qcli")
+def step_impl(context, build_id, query):
+    _promote(context, lambda ops: ops.set_version('deployment', None, build_id, query))
+    assert context.promotion_error is None, context.promotion_error
+
+
+@when('build "{build_id}" is set on deployment "{deployment_id}" via qcli')
+def step_impl(context, build_id, deployment_id):
+    _promote(context, lambda ops: ops.set_version('deployment', deployment_id, build_id))
+    assert context.promotion_error is None, context.promotion_error
+
+
+@when('build "{build_id}" is set on deployment "{deployment_id}" via the cli')
+def step_impl(context, build_id, deployment_id):
+    _promote_via_cli(context, lambda cli: cli.set_version(deployment_id, build_id, 'deployment',
+                                                          output_format='ndjson'))
+
+
+@when("deployment \"{deployment_id}\" is promoted where '{query}' via the cli")
+def step_impl(context, deployment_id, query):
+    _promote_via_cli(context, lambda cli: cli.promote('deployment', deployment_id, query=query,
+                                                      output_format='ndjson'))
+
+
+@when("deployment \"{deployment_id}\" is promoted where '{query}' via qcli")
+def step_impl(context, deployment_id, query):
+    _promote(context, lambda ops: ops.promote(deployment_id, query=query))
+    assert context.promotion_error is None, context.promotion_error
+
+
+@when("deployment \"{deployment_id}\" is dry run promoted where '{query}' via qcli")
+def step_impl(context, deployment_id, query):
+    _promote(context, lambda ops: ops.promote(deployment_id, query=query, dry_run=True))
+    assert context.promotion_error is None, context.promotion_error
+
+
+@when("promoting deployment \"{deployment_id}\" where '{query}' via qcli fails")
+def step_impl(context, deployment_id, query):
+    _promote(context, lambda ops: ops.promote(deployment_id, query=query))
+    assert context.promotion_error is not None, context.promotion
+
+
+@then('the promotion took "{count}" request')
+def step_impl(context, count):
+    assert context.promotion_requests == int(count), context.promotion_requests
+
+
+@then('the promotion reports "{count}" "{status}"')
+def step_impl(context, count, status):
+    matching = [x for x in context.promotion if x['attributes']['status'] == status]
+    assert len(matching) == int(count), context.promotion
+
+
+@then('the promotion of "{deployment_id}" goes from "{from_release}" to "{to_release}"')
+def step_impl(context, deployment_id, from_release, to_release):
+    result = next(x['attributes'] for x in context.promotion if x['id'] == deployment_id)
+    assert (result['from_release'], result['to_release']) == (from_release, to_release), result
+
+
+@then('the cli printed "{count}" "{status}" promotions')
+def step_impl(context, count, status):
+    matching = [x for x in context.promotion if x['resource'] == 'promotion' and x['status'] == status]
+    assert len(matching) == int(count), context.promotion
+
+
+@then('the promotion error mentions "{text}"')
+def step_impl(context, text):
+    assert text in context.promotion_error, context.promotion_error
+
+
+@then('deployment "{deployment_id}" is on release "{release_id}" via rest')
+def step_impl(context, deployment_id, release_id):
+    current = context.rest.get_field('deployment', deployment_id, 'current_release')
+    assert current is not None and current['id'] == release_id, current
+
+
+@then('deployment "{deployment_id}" has no current release via rest')
+def step_impl(context, deployment_id):
+    current = context.rest.get_field('deployment', deployment_id, 'current_release')
+    assert current is None, current
+
@@ -0,0 +1,79 @@
+from behave import given, when, then
+from sqlalchemy import event
+
+from db import db
+
+
+def _client(context):
+    from app import app
+    return app.test_client(), app
+
+
+def _render(context, path):
+    client, app = _client(context)
+    with app.app_context():
+        engine = db.engine
+    queries = []
+
+    def count(conn, cursor, statement, parameters, execution_context, executemany):
+        queries.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        context.render_response = client.get('/api/tf/v1/deployment/gen/' + path, base_url='https://localhost')
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    return len(queries)
+
+
+@given('"{count}" "{config_type}" configs of deployment "{deployment_id}" rendering "{template}" via rest')
+def step_impl(context, count, config_type, deployment_id, template):
+    resources = [{'type': 'deployment_config',
+                  'attributes': {'deployment_id': deployment_id, 'config_template_id': config_type,
+                                 'name': '%s%02d' % (config_type, i), 'config': template}}
+                 for i in range(int(count))]
+    response = context.rest.bulk_create_resources('deployment_config', resources)
+    assert response.status_code == 201, response.text
+
+
+@when('rendering "{config_type}" config "{name}" of deployment "{deployment_id}"')
+def step_impl(context, config_type, name, deployment_id):
+    context.one_config_queries = _render(context, '%s/%s/%s' % (deployment_id, config_type, name))
+
+
+@when('rendering every config of deployment "{deployment_id}"')
+def step_impl(context, deployment_id):
+    context.every_config_queries = _render(context, deployment_id)
+
+
+@when('"{resource}" "{res_id}" defaults are set to "{defaults}" in process')
+def step_impl(context, resource, res_id, defaults):
+    client, app = _client(context)
+    body = {'data': {'type': resource, 'id': res_id, 'attributes': {'defaults': defaults}}}
+    response = client.patch('/api/rest/v1/%s/%s' % (resource, res_id), json=body, base_url='https://localhost',
+                            headers={'Content-Type': 'application/vnd.api+json'})
+    assert response.status_code in (200, 204), response.get_data(as_text=True)
+
+
+@then('the rendered text is "{text}"')
+def step_impl(context, text):
+    assert context.render_response.status_code == 200, context.render_response.get_data(as_text=True)
+    assert context.render_response.get_data(as_text=True) == text, context.render_response.get_data(as_text=True)
+
+
+@then('"{count}" configs were rendered')
+def step_impl(context, count):
+    assert context.render_response.status_code == 200, context.render_response.get_data(as_text=True)
+    lines = context.render_response.get_data(as_text=True).splitlines()
+    assert len(lines) == int(count), lines
+
+
+@then('rendering every config took as many queries as rendering one')
+def step_impl(context):
+    assert context.every_config_queries == context.one_config_queries, \
+        (context.every_config_queries, context.one_config_queries)
+
+
+@then('the render request fails with "{status}"')
+def step_impl(context, status):
+    assert context.render_response.status_code == int(status), context.render_response.status_code
@@ -0,0 +1,94 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from behave import given, when, then
+
+from qairon_qcli.controllers.args import CLIArgs
+from qairon_qcli.controllers.manifest import ParserManifest, fingerprint
+from qairon_qcli.controllers.rest_controller import RestController
+
+STARTUP_BUDGET_MS = int(os.getenv('QAIRON_STARTUP_BUDGET_MS', 600))
+
+
+def _qcli(command, *flags):
+    argv = [sys.executable] + list(flags) + ['-m', 'qairon_qcli.qcli'] + command.split()[1:]
+    return subprocess.run(argv, capture_output=True, text=True, env=os.environ.copy())
+
+
+@given('the parser manifest is warm')
+def step_impl(context):
+    _qcli('qcli -h')
+    assert os.path.exists(os.environ['QAIRON_PARSER_MANIFEST'])
+
+
+@given('a parser manifest with a stale fingerprint')
+def step_impl(context):
+    context.manifest_path = os.environ['QAIRON_PARSER_MANIFEST']
+    with open(context.manifest_path, 'w') as f:
+        json.dump({'version': 1, 'fingerprint': [], 'create_fields': {}, 'commands': {}}, f)
+
+
+@when('"{command}" is started "{times}" times')
+def step_impl(context, command, times):
+    context.start_times = []
+    for _ in range(int(times)):
+        start = time.perf_counter()
+        result = _qcli(command)
+        context.start_times.append((time.perf_counter() - start) * 1000)
+        assert result.returncode == 0, result.stderr
+
+
+@when('"{command}" is started with the import log')
+def step_impl(context, command):
+    result = _qcli(command, '-X', 'importtime')
+    assert result.returncode == 0, result.stderr
+    context.imported = {line.split('|')[-1].strip() for line in result.stderr.splitlines()
+                        if line.startswith('import time:')}
+
+
+@when('the parser manifest is loaded')
+def step_impl(context):
+    context.manifest = ParserManifest(context.manifest_path)
+    context.manifest_commands = context.manifest.commands
+
+
+@when('the parser is built for "{resource}"')
+def step_impl(context, resource):
+    context.cli_args = CLIArgs(RestController())
+    context.parser = context.cli_args.assign_args(resource)
+
+
+@then('the fastest start is within the startup budget')
+def step_impl(context):
+    fastest = min(context.start_times)
+    assert fastest <= STARTUP_BUDGET_MS, '%.0fms > %dms budget' % (fastest, STARTUP_BUDGET_MS)
+
+
+@then('"{module}" was not imported')
+def step_impl(context, module):
+    assert module not in context.imported
+
+
+@then('the manifest lists the commands of plugins "{plugins}"')
+def step_impl(context, plugins):
+    assert sorted(context.manifest_commands.keys()) == sorted(plugins.split(',')), context.manifest_commands.keys()
+
+
+@then('the manifest file matches the plugin sources')
+def step_impl(context):
+    with open(context.manifest_path) as f:
+        assert json.load(f)['fingerprint'] == fingerprint()
+
+
+@then('only "{resource}" has command subparsers')
+def step_impl(context, resource):
+    assert list(context.cli_args.model_subparsers.keys()) == [resource]
+
+
+@then('"{resource}" is still a top level choice')
+def step_impl(context, resource):
+    subparsers = next(action for action in context.parser._actions if action.dest == 'resource')
+    assert resource in subparsers.choices
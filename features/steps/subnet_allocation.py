@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from behave import when, then
+
+from qairon_qcli.controllers.operations_controller import OperationsController
+from qairon_qcli.controllers.rest_controller import RestController
+
+
+def _allocate(context, network_id, additional_mask_bits, names):
+    before = RestController.request_count()
+    try:
+        context.allocated = list(OperationsController().allocate_subnet(network_id, additional_mask_bits, names))
+        context.allocation_error = None
+    except ValueError as e:
+        context.allocated = None
+        context.allocation_error = str(e)
+    context.allocation_requests = RestController.request_count() - before
+
+
+@when('"{count}" subnets "{prefix}" with "{bits}" additional bits are allocated in network "{network_id}" via qcli')
+def step_impl(context, count, prefix, bits, network_id):
+    _allocate(context, network_id, bits, ['%s%d' % (prefix, i) for i in range(int(count))])
+    assert context.allocation_error is None, context.allocation_error
+
+
+@when('"{count}" subnets "{prefix}" with "{bits}" additional bits are allocated in network "{network_id}" via qcli it fails')
+def step_impl(context, count, prefix, bits, network_id):
+    _allocate(context, network_id, bits, ['%s%d' % (prefix, i) for i in range(int(count))])
+    assert context.allocation_error is not None, context.allocated
+
+
+@when('"{count}" clients each allocate a subnet "{prefix}" with "{bits}" additional bits in network "{network_id}" via qcli')
+def step_impl(context, count, prefix, bits, network_id):
+    def allocate(i):
+        return list(OperationsController().allocate_subnet(network_id, bits, '%s%d' % (prefix, i)))
+
+    with ThreadPoolExecutor(max_workers=int(count)) as pool:
+        context.allocated = [row for rows in pool.map(allocate, range(int(count))) for row in rows]
+
+
+def _cidrs(context):
+    return [x['attributes']['cidr'] for x in context.allocated]
+
+
+@then('the allocated cidrs are "{cidrs}"')
+def step_impl(context, cidrs):
+    assert _cidrs(context) == cidrs.split(','), _cidrs(context)
+
+
+@then('the allocated cidrs are distinct')
+def step_impl(context):
+    assert len(set(_cidrs(context))) == len(context.allocated), _cidrs(context)
+
+
+@then('"{count}" cidrs were allocated')
+def step_impl(context, count):
+    assert len(context.allocated) == int(count), _cidrs(context)
+
+
+@then('the last allocated cidr is "{cidr}"')
+def step_impl(context, cidr):
+    assert _cidrs(context)[-1] == cidr, _cidrs(context)[-1]
+
+
+@then('the allocation took "{count}" request')
+def step_impl(context, count):
+    assert context.allocation_requests == int(count), context.allocation_requests
+
+
+@then('the allocation error mentions "{text}"')
+def step_impl(context, text):
+    assert text in context.allocation_error, context.allocation_error
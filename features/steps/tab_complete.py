@@ -92,7 +92,9 @@ def step_setup_repos(context, repo1, repo2, repo3):
 @when('tab-completing "{comp_line}"')
 def step_tab_complete(context, comp_line):
     parser = context.args.assign_args()
+    before = context.rest.request_count()
     context.completions = _get_completions(parser, comp_line)
+    context.completion_requests = context.rest.request_count() - before
 
 
 @then('"{item}" is in completions')
@@ -104,4 +106,23 @@ def step_in_completions(context, item):
 @then('"{item}" is not in completions')
 def step_not_in_completions(context, item):
     assert item not in context.completions, \
-        f'{item!r} unexpectedly in completions: {context.completions}'
\ No newline at end of file
+        f'{item!r} unexpectedly in completions: {context.completions}'
+
+
+@then('the completion made "{number}" requests')
+def step_completion_requests(context, number):
+    assert context.completion_requests == int(number), \
+        f'completion made {context.completion_requests} requests'
+
+
+
+@given('completion cache entries expire after "{seconds}" seconds')
+def step_completion_ttl(context, seconds):
+    context.rest.completion_cache.ttl = float(seconds)
+
+
+@when('zone "{zone}" is created behind the completion cache')
+def step_create_zone_uncached(context, zone):
+    response = context.rest.session.post(context.rest.URL + 'zone', headers=context.rest.HEADERS, json={
+        'data': {'type': 'zone', 'attributes': {'name': zone, 'region_id': _REGION_ID, 'defaults': '{}'}}})
+    assert response.status_code == 201, response.text
@@ -0,0 +1,41 @@
+@db
+Feature: Server-side subnet allocation
+
+  Scenario: setup fixtures
+    Given bulk create "environment" with ids "snenv" via rest
+    And bulk create "provider_type" with ids "snptype" via rest
+    And bulk create "provider" in env "snenv" of type "snptype" with native_ids "snprov" via rest
+    And bulk create "region" named "snreg" under "provider_id" "snenv:snptype:snprov" via rest
+    And bulk create "partition" named "snpart" under "region_id" "snenv:snptype:snprov:snreg" via rest
+    And bulk create "network" rows via rest
+      | partition_id                      | name  | cidr         |
+      | snenv:snptype:snprov:snreg:snpart | big   | 10.0.0.0/8   |
+      | snenv:snptype:snprov:snreg:snpart | small | 10.20.0.0/24 |
+    And bulk create "subnet" rows via rest
+      | network_id                              | name     | cidr          |
+      | snenv:snptype:snprov:snreg:snpart:small | taken0   | 10.20.0.0/28  |
+      | snenv:snptype:snprov:snreg:snpart:small | taken2   | 10.20.0.32/27 |
+
+  Scenario: the first free block is allocated around existing subnets
+    When "3" subnets "a" with "4" additional bits are allocated in network "snenv:snptype:snprov:snreg:snpart:small" via qcli
+    Then the allocated cidrs are "10.20.0.16/28,10.20.0.64/28,10.20.0.80/28"
+
+  Scenario: a large network is carved into many small subnets in one request
+    When "2000" subnets "s" with "20" additional bits are allocated in network "snenv:snptype:snprov:snreg:snpart:big" via qcli
+    Then the allocation took "1" request
+    And the allocated cidrs are distinct
+    And the last allocated cidr is "10.0.124.240/28"
+
+  Scenario: concurrent allocations never share a cidr
+    When "8" clients each allocate a subnet "c" with "20" additional bits in network "snenv:snptype:snprov:snreg:snpart:big" via qcli
+    Then the allocated cidrs are distinct
+    And "8" cidrs were allocated
+
+  Scenario: a full network is a conflict and allocates nothing
+    When "20" subnets "full" with "4" additional bits are allocated in network "snenv:snptype:snprov:snreg:snpart:small" via qcli it fails
+    Then the allocation error mentions "No free /28 left"
+    And "subnet" "snenv:snptype:snprov:snreg:snpart:small:full0" does not exist via rest
+
+  Scenario: too many additional bits are rejected
+    When "1" subnets "huge" with "9" additional bits are allocated in network "snenv:snptype:snprov:snreg:snpart:small" via qcli it fails
+    Then the allocation error mentions "additional_mask_bits must be between 1 and 8"
@@ -50,6 +50,22 @@
 #   Fails when: already-assigned repos filtered out
 #   False success risk: hard
 #   False failure risk: same as T34
+#
+# T38 — unassign_repo completer is served from the completion cache
+#   Data: same repos; T35 already completed the service's repos
+#   Relationship: service_repos_completer reads /service/{id}/repos once, then answers from the on-disk cache
+#   Passes when: the session counts no request for the completion
+#   Fails when: the cache is bypassed or its entry expires immediately
+#   False success risk: low — the count is taken around a single completion
+#   False failure risk: the scenario runs on its own, with a cold cache
+#
+# T44 — expired completion entries are revalidated
+#   Data: zones of the deployment; zone4 is created without going through RestController
+#   Relationship: with a zero TTL every completion revalidates the zone collection against its ETag
+#   Passes when: an unchanged collection costs one request and zone4 appears once created
+#   Fails when: the ETag never changes, or the cache keeps serving its old id list
+#   False success risk: low — zone4 did not exist when the collection was first cached
+#   False failure risk: the server's ETag ignores created_at
 
 @db
 Feature: Tab completion
@@ -100,3 +116,20 @@ Feature: Tab completion
     Then "tcrepotype:tcrepo1" is in completions
     And "tcrepotype:tcrepo2" is in completions
     And "tcrepotype:tcrepo3" is in completions
+
+  # T38
+  Scenario: unassign_repo completer is served from the completion cache
+    When tab-completing "qcli service unassign_repo tcapp:tcstack:tcsvc tcrepotype:tcrepo"
+    Then the completion made "0" requests
+    And "tcrepotype:tcrepo1" is in completions
+
+  # T44
+  Scenario: expired completion entries are revalidated
+    Given completion cache entries expire after "0" seconds
+    When tab-completing "qcli deployment assign_zone tcenv:tcptype:tcprov:tcregion:tcpart:tck8s:tcdt:tcapp:tcstack:tcsvc:default "
+    Then the completion made "1" requests
+    When zone "tczone4" is created behind the completion cache
+    And tab-completing "qcli deployment assign_zone tcenv:tcptype:tcprov:tcregion:tcpart:tck8s:tcdt:tcapp:tcstack:tcsvc:default tcenv:tcptype:tcprov:tcregion:tczone4"
+    Then "tcenv:tcptype:tcprov:tcregion:tczone4" is in completions
+    And "tcenv:tcptype:tcprov:tcregion:tczone1" is not in completions
+    Given completion cache entries expire after "300" seconds
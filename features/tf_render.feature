@@ -0,0 +1,56 @@
+@db
+Feature: Config rendering
+
+  Scenario: setup fixtures
+    Given bulk create "environment" rows via rest
+      | id    | defaults                      |
+      | tfenv | {'env': 'dev', 'over': 'env'} |
+    And bulk create "provider_type" with ids "tfptype" via rest
+    And bulk create "provider" rows via rest
+      | environment_id | provider_type_id | native_id | defaults                                                          |
+      | tfenv          | tfptype          | tfprov    | {'provider': 'aws', 'over': 'provider', 'bucket': '${env}-state'} |
+    And bulk create "region" rows via rest
+      | name  | provider_id          | defaults                                  |
+      | tfreg | tfenv:tfptype:tfprov | {'region': 'us-east-1', 'over': 'region'} |
+    And bulk create "partition" named "tfpart" under "region_id" "tfenv:tfptype:tfprov:tfreg" via rest
+    And bulk create "deployment_target_type" with ids "tfk8s" via rest
+    And bulk create "deployment_target" rows via rest
+      | name | partition_id                      | deployment_target_type_id |
+      | tfdt | tfenv:tfptype:tfprov:tfreg:tfpart | tfk8s                     |
+    And bulk create "application" with ids "tfapp" via rest
+    And bulk create "stack" named "tfstack" under "application_id" "tfapp" via rest
+    And bulk create "service" rows via rest
+      | name  | stack_id      | defaults                            |
+      | tfsvc | tfapp:tfstack | {'svc': 'tfsvc', 'over': 'service'} |
+    And bulk create "deployment" rows via rest
+      | deployment_target_id                         | service_id          | defaults               |
+      | tfenv:tfptype:tfprov:tfreg:tfpart:tfk8s:tfdt | tfapp:tfstack:tfsvc | {'over': 'deployment'} |
+    And bulk create "language" with ids "hcl" via rest
+    And bulk create "config_template" rows via rest
+      | id   | language_id | doc       |
+      | tf   | hcl         | terraform |
+      | vars | hcl         | variables |
+    And "30" "tf" configs of deployment "tfenv:tfptype:tfprov:tfreg:tfpart:tfk8s:tfdt:tfapp:tfstack:tfsvc:default" rendering "${region} ${env} ${svc} ${bucket} ${over} ${app} ${missing}" via rest
+    And bulk create "deployment_config" rows via rest
+      | deployment_id                                                            | config_template_id | name | config                         |
+      | tfenv:tfptype:tfprov:tfreg:tfpart:tfk8s:tfdt:tfapp:tfstack:tfsvc:default | vars               | app  | {'app': 'web', 'over': 'vars'} |
+
+  Scenario: a config is rendered against the merged inheritance chain
+    When rendering "tf" config "tf00" of deployment "tfenv:tfptype:tfprov:tfreg:tfpart:tfk8s:tfdt:tfapp:tfstack:tfsvc:default"
+    Then the rendered text is "us-east-1 dev tfsvc dev-state vars web ${missing}"
+
+  Scenario: a whole deployment renders with as many queries as one config
+    When rendering "tf" config "tf00" of deployment "tfenv:tfptype:tfprov:tfreg:tfpart:tfk8s:tfdt:tfapp:tfstack:tfsvc:default"
+    And rendering every config of deployment "tfenv:tfptype:tfprov:tfreg:tfpart:tfk8s:tfdt:tfapp:tfstack:tfsvc:default"
+    Then "30" configs were rendered
+    And rendering every config took as many queries as rendering one
+
+  Scenario: cached defaults are dropped when a row is written
+    When rendering every config of deployment "tfenv:tfptype:tfprov:tfreg:tfpart:tfk8s:tfdt:tfapp:tfstack:tfsvc:default"
+    And "region" "tfenv:tfptype:tfprov:tfreg" defaults are set to "{'region': 'eu-west-1'}" in process
+    And rendering "tf" config "tf00" of deployment "tfenv:tfptype:tfprov:tfreg:tfpart:tfk8s:tfdt:tfapp:tfstack:tfsvc:default"
+    Then the rendered text is "eu-west-1 dev tfsvc dev-state vars web ${missing}"
+
+  Scenario: an unknown deployment is not found
+    When rendering every config of deployment "nope"
+    Then the render request fails with "404"
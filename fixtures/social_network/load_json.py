@@ -9,6 +9,7 @@ from pathlib import Path
 
 API_URL = os.getenv("QAIRON_ENDPOINT", "http://127.0.0.1:5001") + "/api/rest/v1"
 JSON_DIR = Path(__file__).parent / "json"
+BULK_SIZE = 5000
 
 RESOURCES = [
     "environment",
@@ -50,12 +51,12 @@ RESOURCES = [
     "deployment_targets_fleets",
 ]
 
-# Many-to-many mapping: resource_name -> (owner_resource, owner_id_field, collection_name, related_type, related_id_field)
+# Many-to-many fixtures: resource_name -> association table served at /{table}/_bulk
 MANY_TO_MANY = {
-    "services_repos": ("service", "service_id", "repos", "repo", "repo_id"),
-    "deployments_zones": ("deployment", "deployment_id", "zones", "zone", "zone_id"),
-    "subnets_fleets": ("subnet", "subnet_id", "fleets", "fleet", "fleet_id"),
-    "deployment_targets_fleets": ("deployment_target", "deployment_target_id", "fleets", "fleet", "fleet_id"),
+    "services_repos": "services_repos",
+    "deployments_zones": "deployments_zones",
+    "subnets_fleets": "subnets_fleets",
+    "deployment_targets_fleets": "target_fleets",
 }
 
 session = requests.Session()
@@ -64,59 +65,41 @@ session.headers.update({
     'Accept': 'application/vnd.api+json'
 })
 
-def add_to_collection(owner_res, owner_id, collection_name, related_type, item_id):
-    """Add a single item to a collection (like qcli add_to_collection)."""
-    # GET existing collection
-    url = f"{API_URL}/{owner_res}/{owner_id}/{collection_name}"
-    resp = session.get(url)
-
-    if resp.status_code != 200:
-        return False, f"GET failed: {resp.status_code}"
-
-    # Build new collection with existing items + new item
-    existing = resp.json().get('data', [])
-    collection = {'data': []}
-    for item in existing:
-        collection['data'].append({'id': item['id'], 'type': related_type})
-
-    # Check if item already exists
-    if any(item['id'] == item_id for item in existing):
-        return True, "duplicate"
-
-    # Add new item
-    collection['data'].append({'type': related_type, 'id': item_id})
-
-    # PATCH to /{resource}/{id}/relationships/{collection}
-    rel_url = f"{API_URL}/{owner_res}/{owner_id}/relationships/{collection_name}"
-    resp = session.patch(rel_url, json=collection)
-    if resp.status_code == 204:
-        return True, "success"
-    else:
-        return False, f"PATCH failed: {resp.status_code} - {resp.text[:100]}"
-
 def load_many_to_many(resource, records):
-    """Load many-to-many relationships one item at a time."""
-    owner_res, owner_id_field, collection_name, related_type, related_id_field = MANY_TO_MANY[resource]
+    """Add all pairs of an association table through its /_bulk endpoint, BULK_SIZE per request."""
+    table = MANY_TO_MANY[resource]
+    pairs = [{'type': table, 'attributes': record['data']['attributes']} for record in records]
 
     success = errors = duplicates = 0
-    for record in records:
-        attrs = record['data']['attributes']
-        owner_id = attrs[owner_id_field]
-        item_id = attrs[related_id_field]
-
-        ok, status = add_to_collection(owner_res, owner_id, collection_name, related_type, item_id)
-        if ok:
-            if status == "duplicate":
-                duplicates += 1
-            else:
-                success += 1
+    for start in range(0, len(pairs), BULK_SIZE):
+        chunk = pairs[start:start + BULK_SIZE]
+        resp = session.post(f"{API_URL}/{table}/_bulk", json={'data': chunk})
+        if resp.status_code == 200:
+            meta = resp.json()['meta']
+            success += meta['added']
+            duplicates += meta['skipped']
         else:
-            errors += 1
-            if errors <= 3:
-                print(f"\n  ERROR: {status}")
+            errors += len(chunk)
+            print(f"\n  ERROR: {resp.status_code} - {resp.text[:150]}")
 
     return success, duplicates, errors
 
+def load_bulk(resource, records):
+    """Upsert all records of a resource through the /_bulk endpoint, BULK_SIZE per request."""
+    success = errors = updated = 0
+    for start in range(0, len(records), BULK_SIZE):
+        chunk = records[start:start + BULK_SIZE]
+        resp = session.post(f"{API_URL}/{resource}/_bulk", params={'upsert': 'true'}, json={'data': chunk})
+        if resp.status_code == 201:
+            meta = resp.json()['meta']
+            success += meta['created']
+            updated += meta['updated']
+        else:
+            errors += len(chunk)
+            print(f"\n  ERROR: {resp.status_code} - {resp.text[:150]}")
+
+    return success, updated, errors
+
 def main():
     from_idx = 0
     to_idx = len(RESOURCES)
@@ -142,6 +125,7 @@ def main():
     total_success = 0
     total_errors = 0
     total_duplicates = 0
+    total_updated = 0
 
     for idx, resource in enumerate(RESOURCES[from_idx:to_idx], start=from_idx + 1):
         json_file = JSON_DIR / f"{resource}.json"
@@ -154,30 +138,23 @@ def main():
 
         print(f"[{idx:02d}] Loading {resource} ({len(records)} records)...", end=" ", flush=True)
 
-        # Handle many-to-many relationships differently
+        # Handle many-to-many relationships differently, pairs already there are skipped rather than upserted
         if resource in MANY_TO_MANY:
             success, duplicates, errors = load_many_to_many(resource, records)
+            total_duplicates += duplicates
+            print(f"OK ({success} new, {duplicates} dup, {errors} err)")
         else:
-            success = errors = duplicates = 0
-            for record in records:
-                resp = session.post(f"{API_URL}/{resource}", json=record)
-                if resp.status_code == 201:
-                    success += 1
-                elif resp.status_code == 400 and 'UniqueViolation' in resp.text:
-                    duplicates += 1
-                else:
-                    errors += 1
-                    if errors <= 3:
-                        print(f"\n  ERROR: {resp.status_code} - {resp.text[:150]}")
+            success, updated, errors = load_bulk(resource, records)
+            total_updated += updated
+            print(f"OK ({success} new, {updated} updated, {errors} err)")
 
         total_success += success
         total_errors += errors
-        total_duplicates += duplicates
-        print(f"OK ({success} new, {duplicates} dup, {errors} err)")
 
     print()
     print("=" * 50)
-    print(f"Complete! Success: {total_success}, Duplicates: {total_duplicates}, Errors: {total_errors}")
+    print(f"Complete! Success: {total_success}, Updated: {total_updated}, Duplicates: {total_duplicates}, "
+          f"Errors: {total_errors}")
     print("=" * 50)
 
 if __name__ == "__main__":
@@ -7,6 +7,7 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
+from alembic.script import ScriptDirectory
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -54,6 +55,29 @@ def run_migrations_offline():
         context.run_migrations()
 
 
+# the revision that put the defaults columns under QAIRON_JSONB_DEFAULTS
+JSONB_DEFAULTS_REVISION = '5d2e8c41a0f3'
+
+
+def sync_defaults_columns(migration_context):
+    """Casts the defaults columns again when QAIRON_JSONB_DEFAULTS changed since they were last converted.
+
+    Only after an upgrade or downgrade that leaves the database at or past
+    the revision that introduced the setting; autogenerate and check never
+    change the schema.
+    """
+    from models.defaults import convert_defaults_columns
+    if 'destination_rev' not in migration_context.opts:
+        return
+    heads = migration_context.get_current_heads()
+    if not heads:
+        return
+    script = ScriptDirectory.from_config(config)
+    if any(x.revision == JSONB_DEFAULTS_REVISION for x in script.iterate_revisions(heads, 'base')):
+        for table in convert_defaults_columns(migration_context.connection):
+            logger.info('Cast %s.defaults to follow QAIRON_JSONB_DEFAULTS', table)
+
+
 def run_migrations_online():
     """Run migrations in 'online' mode.
 
@@ -88,6 +112,7 @@ def run_migrations_online():
 
         with context.begin_transaction():
             context.run_migrations()
+            sync_defaults_columns(context.get_context())
 
 
 if context.is_offline_mode():
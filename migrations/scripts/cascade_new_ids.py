@@ -1,61 +1,39 @@
 #!/usr/bin/env python
-from base import app
-from models import *
-from app import db
+import argparse
+import sys
 
-repo_classes = {
-    Repo: "repo_type_id"
-}
+from app import app
+from models.cascade import IdCascade
 
-service_classes = {
-    Stack: "application_id",
-    Service: "stack_id",
-    ServiceConfig:"config_template_id"
-}
 
-provider_classes = {
-    Provider: "environment_id",
-    Region: "provider_id",
-    Partition: "region_id",
-    DeploymentTarget: "partition_id",
-    Network: "partition_id",
-    Zone: "region_id",
-    DeploymentProc: "deployment_id",
-    Allocation: "deployment_proc_id",
-    Release: "deployment_id",
-    Build: "service_id",
-    BuildArtifact: "build_id",
-    BuildArtifact: "input_repo_id",
-    BuildArtifact: "output_repo_id",
-    ReleaseArtifact: "release_id",
-    ReleaseArtifact: "input_repo_id",
-    ReleaseArtifact: "output_repo_id"
-}
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Re-key rows and cascade the new ids to everything derived from them.')
+    parser.add_argument('table', nargs='?', help='table of the rows to change, all ids are re-derived without one')
+    parser.add_argument('ids', nargs='*', help='ids of the rows to change')
+    parser.add_argument('--set', dest='values', action='append', default=[], metavar='COLUMN=VALUE',
+                        help='column to change on the rows, repeatable, e.g. --set name=us-east-2')
+    parser.add_argument('--dry-run', action='store_true', help='report the rows that would change, change nothing')
+    args = parser.parse_args(argv)
+    if args.table and not (args.ids and args.values):
+        parser.error('ids and at least one --set are required with a table')
+    try:
+        args.values = dict(x.split('=', 1) for x in args.values)
+    except ValueError:
+        parser.error('--set takes COLUMN=VALUE')
+    return args
 
-deployment_classes = {
-    Deployment: "deployment_target_id",
-    Fleet: "deployment_target_id",
-    Fleet: "fleet_type_id",
-    Capacity: "fleet_id",
-    DeploymentProc: "deployment_id",
-    Allocation: "deployment_proc_id",
-    Allocation: "allocation_type_id",
-    Release: "deployment_id",
-    ReleaseArtifact: "release_id",
-    DeploymentConfig: "config_template_id",
-    DeploymentConfig: "deployment_id",
-    Deployment: "current_release_id"
-}
 
-klasses = [repo_classes, service_classes, provider_classes, deployment_classes, ]
-with app.app_context():
-    sess = db.session()
+def progress(table, rows):
+    print('%-32s %8d' % (table, rows))
 
-    for klass in klasses:
-        for k, v in klass.items():
-            instances = sess.query(k).all()
-            for instance in instances:
-                setattr(instance, v, getattr(instance, v))
 
-            sess.flush()
-            sess.commit()
+if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    with app.app_context():
+        cascade = IdCascade(progress=progress)
+        if args.table:
+            report = cascade.run(args.table, args.ids, args.values, dry_run=args.dry_run)
+        else:
+            report = cascade.refresh(dry_run=args.dry_run)
+    print('%s %d rows in %d tables' % ('would change' if args.dry_run else 'changed', sum(report.values()),
+                                       len(report)))
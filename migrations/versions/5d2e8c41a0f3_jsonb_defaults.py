@@ -0,0 +1,66 @@
+"""jsonb defaults
+
+Revision ID: 5d2e8c41a0f3
+Revises: 067f8b64c38a
+Create Date: 2026-10-18 10:02:41.513207
+
+Gives every ``defaults`` column the type QAIRON_JSONB_DEFAULTS asks for,
+jsonb when it is set and text otherwise.  The column type records the
+choice: migrations/env.py checks it again after every upgrade, so setting or
+clearing the variable later takes effect on the next ``flask db upgrade``.
+Run the server with the same setting.
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5d2e8c41a0f3'
+down_revision = '067f8b64c38a'
+
+from alembic import op
+import sqlalchemy as sa
+
+from models.defaults import convert_defaults_columns
+
+from alembic import context
+
+
+def upgrade():
+    upgrades_pre()
+    schema_upgrades()
+    upgrades_post()
+
+
+def downgrade():
+    downgrades_pre()
+    schema_downgrades()
+    downgrades_post()
+
+
+def upgrades_pre():
+    """Add any optional data prep pre migrations here!"""
+    pass
+
+
+def schema_upgrades():
+    """schema upgrade migrations go here."""
+    convert_defaults_columns(op.get_bind())
+
+
+def upgrades_post():
+    """Add any optional data prep post migrations here!"""
+    pass
+
+
+def downgrades_pre():
+    """Add any optional data prep pre migrations here!"""
+    pass
+
+
+def schema_downgrades():
+    """schema downgrade migrations go here."""
+    convert_defaults_columns(op.get_bind(), jsonb=False)
+
+
+def downgrades_post():
+    """Add any optional data prep post migrations here!"""
+    pass
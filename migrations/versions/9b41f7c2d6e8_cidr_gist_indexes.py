@@ -0,0 +1,66 @@
+"""cidr gist indexes
+
+Revision ID: 9b41f7c2d6e8
+Revises: 5d2e8c41a0f3
+Create Date: 2026-10-18 14:20:07.118402
+
+GiST indexes over inet_ops on network.cidr and subnet.cidr, for the
+containment and overlap lookups under /api/net/v1.
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '9b41f7c2d6e8'
+down_revision = '5d2e8c41a0f3'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+from alembic import context
+
+
+def upgrade():
+    upgrades_pre()
+    schema_upgrades()
+    upgrades_post()
+
+
+def downgrade():
+    downgrades_pre()
+    schema_downgrades()
+    downgrades_post()
+
+
+def upgrades_pre():
+    """Add any optional data prep pre migrations here!"""
+    pass
+
+
+def schema_upgrades():
+    """schema upgrade migrations go here."""
+    op.create_index('ix_network_cidr_gist', 'network', ['cidr'], unique=False, postgresql_using='gist',
+                    postgresql_ops={'cidr': 'inet_ops'})
+    op.create_index('ix_subnet_cidr_gist', 'subnet', ['cidr'], unique=False, postgresql_using='gist',
+                    postgresql_ops={'cidr': 'inet_ops'})
+
+
+def upgrades_post():
+    """Add any optional data prep post migrations here!"""
+    pass
+
+
+def downgrades_pre():
+    """Add any optional data prep pre migrations here!"""
+    pass
+
+
+def schema_downgrades():
+    """schema downgrade migrations go here."""
+    op.drop_index('ix_subnet_cidr_gist', table_name='subnet')
+    op.drop_index('ix_network_cidr_gist', table_name='network')
+
+
+def downgrades_post():
+    """Add any optional data prep post migrations here!"""
+    pass
@@ -0,0 +1,74 @@
+"""deferrable foreign keys
+
+Revision ID: c3a9e5f17b42
+Revises: 9b41f7c2d6e8
+Create Date: 2026-10-18 16:41:52.730915
+
+Makes every foreign key DEFERRABLE INITIALLY IMMEDIATE.  They are still
+checked after each statement, unless a transaction defers them with
+SET CONSTRAINTS, which is how migrations/scripts/cascade_new_ids.py
+re-keys a tree of rows and has it checked once, at commit.
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'c3a9e5f17b42'
+down_revision = '9b41f7c2d6e8'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+from alembic import context
+
+
+def upgrade():
+    upgrades_pre()
+    schema_upgrades()
+    upgrades_post()
+
+
+def downgrade():
+    downgrades_pre()
+    schema_downgrades()
+    downgrades_post()
+
+
+def upgrades_pre():
+    """Add any optional data prep pre migrations here!"""
+    pass
+
+
+def foreign_keys(deferrable):
+    # the constraints carry postgres' generated names, so they are looked up rather than spelled out
+    return op.get_bind().execute(sa.text(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+        "WHERE contype = 'f' AND condeferrable = :deferrable AND connamespace = current_schema()::regnamespace"),
+        {'deferrable': deferrable}).all()
+
+
+def schema_upgrades():
+    """schema upgrade migrations go here."""
+    for table_name, constraint in foreign_keys(False):
+        op.execute('ALTER TABLE %s ALTER CONSTRAINT "%s" DEFERRABLE INITIALLY IMMEDIATE' % (table_name, constraint))
+
+
+def upgrades_post():
+    """Add any optional data prep post migrations here!"""
+    pass
+
+
+def downgrades_pre():
+    """Add any optional data prep pre migrations here!"""
+    pass
+
+
+def schema_downgrades():
+    """schema downgrade migrations go here."""
+    for table_name, constraint in foreign_keys(True):
+        op.execute('ALTER TABLE %s ALTER CONSTRAINT "%s" NOT DEFERRABLE' % (table_name, constraint))
+
+
+def downgrades_post():
+    """Add any optional data prep post migrations here!"""
+    pass
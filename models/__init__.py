@@ -11,6 +11,8 @@ from .config_template import ConfigTemplate
 from .language import Language
 from .associations import deps_to_zones
 from .associations import svcs_to_repos
+from .associations import subnets_to_fleets
+from .associations import target_to_fleets
 from .application import Application
 from .deployment_target import DeploymentTarget
 from .repo import Repo
@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import validates, relationship
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -15,13 +16,13 @@ class Allocation(db.Model):
 
     id = Column(String, primary_key=True)
     value = Column(Float, nullable=False)
-    allocation_type_id = Column(String, ForeignKey('allocation_type.id'), nullable=False, index=True)
-    deployment_proc_id = Column(String, ForeignKey('deployment_proc.id'), nullable=False, index=True)
+    allocation_type_id = Column(String, ForeignKey('allocation_type.id', deferrable=True), nullable=False, index=True)
+    deployment_proc_id = Column(String, ForeignKey('deployment_proc.id', deferrable=True), nullable=False, index=True)
     watermark = db.Column(watermarks_enum)
     UniqueConstraint('deployment_proc_id', 'type', 'watermark')
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     deployment_proc = relationship('DeploymentProc', back_populates='allocations')
     type = relationship('AllocationType', back_populates='allocations')
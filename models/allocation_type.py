@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship, validates
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -14,7 +15,7 @@ class AllocationType(db.Model):
     unit = Column(String, nullable=False)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     allocations = relationship("Allocation", back_populates="type", lazy='select')
     capacities = relationship("Capacity", back_populates="type", lazy='select')
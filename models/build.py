@@ -7,6 +7,7 @@ from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship, object_session, synonym
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -19,10 +20,10 @@ class Build(db.Model):
     build_num = Column(Integer, nullable=False)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
-    service_id = Column(String, ForeignKey('service.id'), nullable=False, index=True)
+    service_id = Column(String, ForeignKey('service.id', deferrable=True), nullable=False, index=True)
     ver = Column(String, nullable=False)
     vcs_ref = Column(String, nullable=False)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
     service = relationship('Service', back_populates='builds')
     releases = relationship('Release', back_populates='build', lazy='select')
 
@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import validates, relationship
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -11,12 +12,12 @@ class Capacity(db.Model):
     __tablename__ = "capacity"
 
     id = Column(String, primary_key=True)
-    fleet_id = Column(String, ForeignKey('fleet.id'), nullable=False, index=True)
-    allocation_type_id = Column(String, ForeignKey('allocation_type.id'), index=True)
+    fleet_id = Column(String, ForeignKey('fleet.id', deferrable=True), nullable=False, index=True)
+    allocation_type_id = Column(String, ForeignKey('allocation_type.id', deferrable=True), index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
     value = Column(Float, nullable=False)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
 
     fleet = relationship('Fleet', back_populates='capacities')
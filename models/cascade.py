@@ -0,0 +1,198 @@
+import re
+
+from sqlalchemy import String, cast, column, func, inspect, literal, or_, select, table, text, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from db import db
+
+# wraps a column name while a model's id listener is probed, cannot appear in real data
+SENTINEL = '\x1f'
+PART = re.compile('%s([^%s]+)%s' % ((SENTINEL,) * 3))
+
+
+def id_recipe(mapper):
+    """The parts a model's id is built from by its before_insert listeners, or None when it is not derived.
+
+    The listener is run once on a bare instance whose columns hold their own
+    names between sentinels, so the resulting id spells out which columns,
+    and which literals between them, make it up: ``Deployment`` gives
+    ``[('column', 'deployment_target_id'), ('literal', ':'), ...]``.
+    """
+    if 'id' not in mapper.columns or not mapper.dispatch.before_insert:
+        return None
+    instance = mapper.class_manager.new_instance()
+    for key, mapped in mapper.columns.items():
+        if key != 'id':
+            set_committed_value(instance, key, SENTINEL + mapped.name + SENTINEL)
+    try:
+        mapper.dispatch.before_insert(mapper, None, inspect(instance))
+    except Exception:
+        return None
+    derived = instance.__dict__.get('id')
+    if not isinstance(derived, str) or SENTINEL not in derived:
+        return None
+    parts = []
+    for i, piece in enumerate(PART.split(derived)):
+        if piece:
+            parts.append(('column' if i % 2 else 'literal', piece))
+    return parts
+
+
+def recipe_expression(recipe, columns):
+    """The SQL building an id from ``recipe``, ``columns`` maps a column name to the expression to use for it."""
+    expressions = [columns[value] if kind == 'column' else literal(value) for kind, value in recipe]
+    expression = cast(expressions[0], String)
+    for part in expressions[1:]:
+        expression = expression + cast(part, String)
+    return expression
+
+
+class IdCascade:
+    """Re-keys rows and everything whose id or foreign keys are built from theirs, set-based.
+
+    Ids are derived strings, ``Partition.id`` is ``region_id:name`` and so on,
+    so renaming a region changes the id of every row below it.  The id
+    recipes are read off the models' listeners (:func:`id_recipe`) and the
+    tables to visit off the foreign keys in the metadata.  Each table is then
+    rewritten, parents first, with one ``INSERT ... SELECT`` recording its
+    old and new ids in a temporary table and one ``UPDATE`` setting the new
+    foreign keys and id, whatever the number of rows.  Foreign keys, all
+    declared deferrable, are deferred for the transaction, so the tree is
+    only consistent again, and checked, at commit.  A dry run does the same work
+    and rolls it back.
+    """
+
+    def __init__(self, session=None, metadata=None, progress=None):
+        self.session = session if session is not None else db.session
+        self.metadata = metadata if metadata is not None else db.metadata
+        self.progress = progress or (lambda table_name, rows: None)
+        self._recipes = None
+
+    @property
+    def recipes(self):
+        if self._recipes is None:
+            self._recipes = dict()
+            for mapper in db.Model.registry.mappers:
+                recipe = id_recipe(mapper)
+                if recipe is not None and mapper.local_table is not None:
+                    self._recipes[mapper.local_table.name] = recipe
+        return self._recipes
+
+    @staticmethod
+    def __references__(child):
+        """(foreign key column, referenced table) of every foreign key of ``child`` pointing at an id."""
+        return [(fk.parent, fk.column.table) for fk in child.foreign_keys if fk.column.name == 'id']
+
+    def plan(self, table_name):
+        """The tables a re-key of ``table_name`` reaches, parents before children."""
+        reached = {table_name}
+        for candidate in self.metadata.sorted_tables:
+            if any(parent.name in reached for _, parent in self.__references__(candidate)):
+                reached.add(candidate.name)
+        return [x for x in self.metadata.sorted_tables if x.name in reached]
+
+    def defer_constraints(self):
+        """Checks the foreign keys, all declared deferrable, when the transaction commits."""
+        self.session.execute(text('SET CONSTRAINTS ALL DEFERRED'))
+
+    def __id_map__(self, table_name):
+        name = '_rekey_%s' % table_name
+        self.session.execute(text('CREATE TEMPORARY TABLE "%s" (old_id varchar PRIMARY KEY, new_id varchar NOT NULL) '
+                                  'ON COMMIT DROP' % name))
+        return table(name, column('old_id', String), column('new_id', String))
+
+    def __record__(self, id_map, source):
+        self.session.execute(id_map.insert().from_select(['old_id', 'new_id'], source))
+        self.session.execute(id_map.delete().where(id_map.c.old_id == id_map.c.new_id))
+
+    def rekey_root(self, root, ids, values):
+        recipe = self.recipes.get(root.name)
+        if recipe is None and 'id' in values:
+            new_id = literal(values['id'])
+        elif recipe is not None:
+            new_id = recipe_expression(recipe, {c.name: literal(values[c.name]) if c.name in values else c
+                                                for c in root.columns})
+        else:
+            raise ValueError('%s ids are not derived, set id to rename one' % root.name)
+        id_map = self.__id_map__(root.name)
+        self.__record__(id_map, select(root.c.id, new_id).where(root.c.id.in_(ids)))
+        changed = {k: v for k, v in values.items() if k != 'id'}
+        rows = self.session.execute(update(root).where(root.c.id.in_(ids)).values(
+            id=func.coalesce(select(id_map.c.new_id).where(id_map.c.old_id == root.c.id).scalar_subquery(),
+                             root.c.id), **changed)).rowcount
+        return id_map, rows
+
+    def rekey_child(self, child, id_maps, refresh=False):
+        """Moves the foreign keys of ``child`` to the new ids in ``id_maps`` and re-keys the rows whose id changes.
+
+        With ``refresh`` every row whose id no longer matches its recipe is
+        re-keyed too, whether a parent moved or not.
+        """
+        references = [(fk_column, id_maps[parent.name]) for fk_column, parent in self.__references__(child)
+                      if parent.name in id_maps]
+        recipe = self.recipes.get(child.name)
+        if not references and not (refresh and recipe is not None):
+            return None, 0
+        moved = {fk_column.name: func.coalesce(select(id_map.c.new_id).where(id_map.c.old_id == fk_column)
+                                               .scalar_subquery(), fk_column)
+                 for fk_column, id_map in references}
+        affected = [fk_column.in_(select(id_map.c.old_id)) for fk_column, id_map in references]
+        values = dict(moved)
+        id_map = None
+        if recipe is not None and (refresh or any(kind == 'column' and value in moved for kind, value in recipe)):
+            id_map = self.__id_map__(child.name)
+            source = select(child.c.id, recipe_expression(recipe, dict(child.columns, **moved)))
+            self.__record__(id_map, source if refresh else source.where(or_(*affected)))
+            affected.append(child.c.id.in_(select(id_map.c.old_id)))
+            values['id'] = func.coalesce(select(id_map.c.new_id).where(id_map.c.old_id == child.c.id)
+                                         .scalar_subquery(), child.c.id)
+        rows = self.session.execute(update(child).where(or_(*affected)).values(**values)).rowcount
+        return id_map, rows
+
+    def __finish__(self, dry_run):
+        if dry_run:
+            self.session.rollback()
+        else:
+            self.session.commit()
+
+    def run(self, table_name, ids, values, dry_run=False):
+        """Sets ``values`` on the ``table_name`` rows with ``ids`` and cascades the new ids, returns rows per table."""
+        tables = self.plan(table_name)
+        report = dict()
+        try:
+            self.defer_constraints()
+            root = tables[0]
+            id_maps = dict()
+            id_maps[root.name], report[root.name] = self.rekey_root(root, ids, values)
+            self.progress(root.name, report[root.name])
+            for child in tables[1:]:
+                id_map, rows = self.rekey_child(child, id_maps)
+                if id_map is not None:
+                    id_maps[child.name] = id_map
+                if rows:
+                    report[child.name] = rows
+                    self.progress(child.name, rows)
+            self.__finish__(dry_run)
+        except Exception:
+            self.session.rollback()
+            raise
+        return report
+
+    def refresh(self, dry_run=False):
+        """Re-derives every id in the database from its recipe, e.g. after columns were changed by hand."""
+        report = dict()
+        try:
+            self.defer_constraints()
+            id_maps = dict()
+            for candidate in self.metadata.sorted_tables:
+                id_map, rows = self.rekey_child(candidate, id_maps, refresh=True)
+                if id_map is not None:
+                    id_maps[candidate.name] = id_map
+                if rows:
+                    report[candidate.name] = rows
+                    self.progress(candidate.name, rows)
+            self.__finish__(dry_run)
+        except Exception:
+            self.session.rollback()
+            raise
+        return report
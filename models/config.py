@@ -3,6 +3,7 @@ from sqlalchemy.ext.declarative import ConcreteBase
 from sqlalchemy.orm import relationship
 
 from db import db
+from models.defaults import Defaults
 
 
 class DeploymentConfig(db.Model):
@@ -11,8 +12,8 @@ class DeploymentConfig(db.Model):
     __tablename__ = "deployment_config"
     id = Column(String, primary_key=True)
 
-    config_template_id = Column(String, ForeignKey('config_template.id'), nullable=False, index=True)
-    deployment_id = Column(String, ForeignKey('deployment.id'), nullable=False, index=True)
+    config_template_id = Column(String, ForeignKey('config_template.id', deferrable=True), nullable=False, index=True)
+    deployment_id = Column(String, ForeignKey('deployment.id', deferrable=True), nullable=False, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
     name = Column(String, nullable=False, index=True)
@@ -20,7 +21,7 @@ class DeploymentConfig(db.Model):
     tag = Column(String, nullable=False, default='default', index=True)
 
     config = Column(Text)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     template = relationship("ConfigTemplate", back_populates="deployment_configs")
 
@@ -36,15 +37,15 @@ class ServiceConfig(db.Model):
     __tablename__ = "service_config"
     id = Column(String, primary_key=True)
 
-    config_template_id = Column(String, ForeignKey('config_template.id'))
-    service_id = Column(String, ForeignKey('service.id'))
+    config_template_id = Column(String, ForeignKey('config_template.id', deferrable=True))
+    service_id = Column(String, ForeignKey('service.id', deferrable=True))
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now())
     name = Column(String, nullable=False)
 
     tag = Column(String, nullable=False, default='default')
     config = Column(Text)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     template = relationship("ConfigTemplate", back_populates="service_configs")
 
@@ -59,15 +60,15 @@ class StackConfig(db.Model):
     __tablename__ = "stack_config"
     id = Column(String, primary_key=True)
 
-    config_template_id = Column(String, ForeignKey('config_template.id'))
-    stack_id = Column(String, ForeignKey('stack.id'))
+    config_template_id = Column(String, ForeignKey('config_template.id', deferrable=True))
+    stack_id = Column(String, ForeignKey('stack.id', deferrable=True))
     created_at = Column(DateTime, nullable=False, server_default=func.now())
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now())
     name = Column(String, nullable=False)
 
     tag = Column(String, nullable=False, default='default')
     config = Column(Text)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     template = relationship("ConfigTemplate", back_populates="stack_configs")
 
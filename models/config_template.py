@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship, validates
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -10,11 +11,11 @@ class ConfigTemplate(db.Model):
 
     __tablename__ = "config_template"
     id = Column(String, primary_key=True)
-    language_id = Column(String, ForeignKey('language.id'), nullable=False, index=True)
+    language_id = Column(String, ForeignKey('language.id', deferrable=True), nullable=False, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
     doc = Column(Text, nullable=False)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     service_configs = relationship('ServiceConfig', back_populates='template', lazy='select')
     stack_configs = relationship('StackConfig', back_populates='template', lazy='select')
@@ -0,0 +1,167 @@
+import ast
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import Text, column, event, inspect, select, table, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+from sqlalchemy.types import TypeDecorator
+
+# opt in to jsonb defaults, the columns are converted by migration 5d2e8c41a0f3 and checked on every upgrade
+JSONB_DEFAULTS = 'QAIRON_JSONB_DEFAULTS' in os.environ
+
+# rows whose parsed defaults or compiled templates are kept in memory
+CACHE_SIZE = 1024
+
+
+def parse_defaults(value):
+    """Defaults as stored, JSON or a Python literal, as an object.  Already parsed values pass through."""
+    if not isinstance(value, str):
+        return {} if value is None else value
+    if not value.strip():
+        return {}
+    try:
+        return json.loads(value)
+    except ValueError:
+        return ast.literal_eval(value)
+
+
+def __to_json__(value):
+    try:
+        json.loads(value)
+        return value
+    except ValueError:
+        pass
+    try:
+        return json.dumps(ast.literal_eval(value))
+    except (ValueError, SyntaxError, TypeError):
+        # neither JSON nor a literal, keep it as a JSON string
+        return json.dumps(value)
+
+
+def defaults_columns(connection, type_):
+    """The tables whose ``defaults`` column is of ``type_``, none off Postgres."""
+    if connection.dialect.name != 'postgresql':
+        return []
+    inspector = inspect(connection)
+    return [table_name for table_name in inspector.get_table_names()
+            for c in inspector.get_columns(table_name)
+            if c['name'] == 'defaults' and isinstance(c['type'], type_)]
+
+
+def convert_defaults_columns(connection, jsonb=None):
+    """Casts the ``defaults`` columns still of the other type to jsonb, or to text, returns the tables cast.
+
+    The column type is where the choice is kept: whatever already matches
+    ``jsonb``, ``JSONB_DEFAULTS`` by default, is left alone, so this can run
+    on every upgrade and only acts when the setting changed.  Text is
+    rewritten as JSON before it is cast.
+    """
+    jsonb = JSONB_DEFAULTS if jsonb is None else jsonb
+    tables = defaults_columns(connection, Text if jsonb else JSONB)
+    for table_name in tables:
+        if jsonb:
+            t = table(table_name, column('id'), column('defaults', Text))
+            rows = connection.execute(select(t.c.id, t.c.defaults).where(t.c.defaults.isnot(None))).all()
+            for id_, value in rows:
+                converted = __to_json__(value)
+                if converted != value:
+                    connection.execute(t.update().where(t.c.id == id_).values(defaults=converted))
+            connection.execute(text('ALTER TABLE "%s" ALTER COLUMN defaults TYPE jsonb USING defaults::jsonb'
+                                    % table_name))
+        else:
+            connection.execute(text('ALTER TABLE "%s" ALTER COLUMN defaults TYPE text USING defaults::text'
+                                    % table_name))
+    return tables
+
+
+class Defaults(TypeDecorator):
+    """The ``defaults`` column: text, or jsonb on Postgres with ``QAIRON_JSONB_DEFAULTS`` set.
+
+    As jsonb, text written through the API is parsed once on the way in and
+    rows come back as objects, so readers skip parsing altogether and
+    Postgres can index and query into the defaults.  Text that is neither
+    JSON nor a Python literal is kept as a JSON string.
+    """
+    impl = Text
+    cache_ok = True
+
+    def __init__(self, jsonb=None):
+        super().__init__()
+        self.jsonb = JSONB_DEFAULTS if jsonb is None else jsonb
+        if self.jsonb:
+            # lets queries index into the defaults, e.g. Region.defaults['name'].astext
+            self.impl = JSONB()
+
+    def load_dialect_impl(self, dialect):
+        if self.jsonb and dialect.name == 'postgresql':
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(Text())
+
+    def process_bind_param(self, value, dialect):
+        if self.jsonb and dialect.name == 'postgresql':
+            if isinstance(value, str):
+                try:
+                    return parse_defaults(value)
+                except (ValueError, SyntaxError):
+                    return value
+            return value
+        if value is not None and not isinstance(value, str):
+            return json.dumps(value)
+        return value
+
+
+class ParsedCache:
+    """LRU of values parsed out of a row's text columns.
+
+    Entries are keyed by table and id and remember the row's
+    ``created_at``/``last_updated_at``, so a row changed by another process
+    is parsed again.  Rows flushed by this process are dropped straight away
+    by the session listener below.
+    """
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, instance, column, parse):
+        key = (instance.__tablename__, instance.id)
+        version = (instance.created_at, instance.last_updated_at)
+        with self.lock:
+            parsed = self.entries.get(key)
+            if parsed is not None and parsed['version'] == version and (column, parse) in parsed:
+                self.entries.move_to_end(key)
+                return parsed[(column, parse)]
+        value = parse(getattr(instance, column))
+        with self.lock:
+            parsed = self.entries.get(key)
+            if parsed is None or parsed['version'] != version:
+                parsed = self.entries[key] = {'version': version}
+            parsed[(column, parse)] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return value
+
+    def discard(self, table, id_):
+        with self.lock:
+            self.entries.pop((table, id_), None)
+
+
+cache = ParsedCache()
+
+
+def defaults_of(instance):
+    """The parsed defaults of a row, parsed at most once per version of the row."""
+    return cache.get(instance, 'defaults', parse_defaults)
+
+
+@event.listens_for(Session, 'after_flush')
+def discard_written_rows(session, flush_context):
+    for instance in session.dirty | session.deleted:
+        table = getattr(instance, '__tablename__', None)
+        if table is not None:
+            cache.discard(table, getattr(instance, 'id', None))
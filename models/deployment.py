@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship, validates
 
 from db import db
+from models.defaults import Defaults
 from models.associations import deployment_current_release
 
 
@@ -10,13 +11,14 @@ class Deployment(db.Model):
 
     __tablename__ = "deployment"
     id = Column(String, primary_key=True)
-    deployment_target_id = Column(String, ForeignKey('deployment_target.id'), nullable=False, index=True)
-    service_id = Column(String, ForeignKey('service.id'), nullable=False, index=True)
+    deployment_target_id = Column(String, ForeignKey('deployment_target.id', deferrable=True), nullable=False,
+                                  index=True)
+    service_id = Column(String, ForeignKey('service.id', deferrable=True), nullable=False, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
     tag = Column(String, nullable=False, default='default', index=True)
 
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     deployment_target = relationship("DeploymentTarget", back_populates="deployments")
     service = relationship("Service", back_populates="deployments")
@@ -1,7 +1,8 @@
 from sqlalchemy import *
-from sqlalchemy.orm import relationship, validates
+from sqlalchemy.orm import Session, relationship, validates
 
-from db import db
+from db import db, lookup, written
+from models.defaults import Defaults
 import datetime
 
 
@@ -10,11 +11,11 @@ class DeploymentProc(db.Model):
 
     __tablename__ = "deployment_proc"
     id = Column(String, primary_key=True)
-    deployment_id = Column(String, ForeignKey('deployment.id'), nullable=False, index=True)
-    proc_id = Column(String, ForeignKey('proc.id'), nullable=False, index=True)
+    deployment_id = Column(String, ForeignKey('deployment.id', deferrable=True), nullable=False, index=True)
+    proc_id = Column(String, ForeignKey('proc.id', deferrable=True), nullable=False, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     allocations = relationship("Allocation", back_populates="deployment_proc",
                                primaryjoin="and_(Allocation.deployment_proc_id==DeploymentProc.id)")
@@ -25,8 +26,6 @@ class DeploymentProc(db.Model):
         return self.id
 
 
-
-
 @db.event.listens_for(DeploymentProc, 'before_update')
 @db.event.listens_for(DeploymentProc, 'before_insert')
 def my_before_insert_listener(mapper, connection, deployment_proc):
@@ -34,19 +33,33 @@ def my_before_insert_listener(mapper, connection, deployment_proc):
 
 
 def __update_id__(deployment_proc):
-    # Extract service_id from proc_id (format: {service_id}:{name})
-    proc_service_id = ':'.join(deployment_proc.proc_id.rsplit(':', 1)[:-1])
+    deployment_proc.id = deployment_proc.deployment_id + ':' + deployment_proc.proc_id
 
-    # Get deployment's service_id - either from loaded relationship or query
-    if deployment_proc.deployment is not None:
-        deployment_service_id = deployment_proc.deployment.service_id
-    else:
-        # Query the deployment to get its service_id
-        from models.deployment import Deployment
-        dep = db.session.get(Deployment, deployment_proc.deployment_id)
-        deployment_service_id = dep.service_id if dep else None
 
-    assert deployment_service_id == proc_service_id, \
-        f"Proc service_id ({proc_service_id}) must match deployment service_id ({deployment_service_id})"
+def service_ids(session, procs):
+    """The service_id of each proc's deployment, read together for those whose deployment is not loaded."""
+    from models.deployment import Deployment
+    loaded = {x.deployment_id: x.deployment.service_id for x in procs
+              if 'deployment' in inspect(x).dict and x.deployment is not None}
+    return lookup(session, lambda ids: select(Deployment.id, Deployment.service_id).where(Deployment.id.in_(ids)),
+                  {x.deployment_id for x in procs}, loaded)
 
-    deployment_proc.id = deployment_proc.deployment_id + ':' + deployment_proc.proc_id
+
+@db.event.listens_for(Session, 'before_flush')
+def validate_service_ids(session, flush_context, instances):
+    procs = written(session, DeploymentProc)
+    if not procs:
+        return
+    for proc in procs:
+        # procs given a deployment or proc object rather than ids only get the ids at flush time
+        if proc.deployment_id is None and proc.deployment is not None:
+            proc.deployment_id = proc.deployment.id
+        if proc.proc_id is None and proc.proc is not None:
+            proc.proc_id = proc.proc.id
+    deployments = service_ids(session, procs)
+    for proc in procs:
+        # proc_id is {service_id}:{name}
+        proc_service_id = ':'.join(proc.proc_id.rsplit(':', 1)[:-1])
+        deployment_service_id = deployments[proc.deployment_id]
+        assert deployment_service_id == proc_service_id, \
+            f"Proc service_id ({proc_service_id}) must match deployment service_id ({deployment_service_id})"
@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import validates, relationship
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -11,13 +12,14 @@ class DeploymentTarget(db.Model):
     __tablename__ = "deployment_target"
 
     id = Column(String, primary_key=True)
-    deployment_target_type_id = Column(String, ForeignKey('deployment_target_type.id'), nullable=False, index=True)
-    partition_id = Column(String, ForeignKey('partition.id'), nullable=False, index=True)
+    deployment_target_type_id = Column(String, ForeignKey('deployment_target_type.id', deferrable=True), nullable=False,
+                                       index=True)
+    partition_id = Column(String, ForeignKey('partition.id', deferrable=True), nullable=False, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
     name = Column(String(255), nullable=False, index=True)
 
-    defaults = Column(Text)
+    defaults = Column(Defaults)
     native_id = Column(String, index=True)
 
     partition = relationship("Partition", back_populates="deployment_targets")
@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship, validates
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -12,7 +13,7 @@ class DeploymentTargetType(db.Model):
     id = Column(String, primary_key=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     targets = relationship("DeploymentTarget", back_populates="type", lazy='select')
 
@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -11,15 +12,16 @@ class Fleet(db.Model):
 
     __tablename__ = "fleet"
     id = Column(String, primary_key=True)
-    deployment_target_id = Column(String, ForeignKey('deployment_target.id'), nullable=False, index=True)
-    fleet_type_id = Column(String, ForeignKey('fleet_type.id'), nullable=False, index=True)
+    deployment_target_id = Column(String, ForeignKey('deployment_target.id', deferrable=True), nullable=False,
+                                  index=True)
+    fleet_type_id = Column(String, ForeignKey('fleet_type.id', deferrable=True), nullable=False, index=True)
     native_id = Column(String, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
 
     name = Column(String, index=True)
 
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     deployment_target = relationship("DeploymentTarget", back_populates="fleets")
     subnets = relationship("Subnet", secondary='subnets_fleets', back_populates="fleets", lazy='select')
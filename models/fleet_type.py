@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship, validates
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -11,10 +12,10 @@ class FleetType(db.Model):
     __tablename__ = "fleet_type"
     id = Column(String, primary_key=True)
     name = Column(String, nullable=False, index=True)
-    provider_type_id = Column(String, ForeignKey('provider_type.id'), nullable=False, index=True)
+    provider_type_id = Column(String, ForeignKey('provider_type.id', deferrable=True), nullable=False, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     provider_type = relationship("ProviderType", back_populates="fleet_types")
     fleets = relationship("Fleet", back_populates="type", lazy='select')
@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship, validates
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -13,7 +14,7 @@ class Language(db.Model):
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
     config_templates = relationship("ConfigTemplate", back_populates="language", lazy='select')
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     def __repr__(self):
         return self.id
@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 from sqlalchemy.dialects.postgresql.base import CIDR
@@ -12,19 +13,21 @@ class Network(db.Model):
     exclude = ['subnets']
 
     __tablename__ = "network"
+    # GiST over inet_ops serves the containment and overlap operators (>>=, <<=, &&)
+    __table_args__ = (Index('ix_network_cidr_gist', 'cidr', postgresql_using='gist', postgresql_ops={'cidr': 'inet_ops'}),)
 
     def __init__(self, **entries):
         self.__dict__.update(entries)
 
     id = Column(String, primary_key=True)
-    partition_id = Column(String, ForeignKey('partition.id'), nullable=False, index=True)
+    partition_id = Column(String, ForeignKey('partition.id', deferrable=True), nullable=False, index=True)
     native_id = Column(String, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
 
     name = Column(String, nullable=False, index=True)
     cidr = Column(CIDR, nullable=False, index=True)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
 
     partition = relationship("Partition", back_populates="networks")
@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -11,11 +12,11 @@ class Proc(db.Model):
     __tablename__ = "proc"
 
     id = Column(String, primary_key=True, nullable=False)
-    service_id = Column(String, ForeignKey('service.id'), nullable=False, index=True)
+    service_id = Column(String, ForeignKey('service.id', deferrable=True), nullable=False, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
     name = Column(String(64), nullable=False, index=True)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     service = relationship("Service", back_populates="procs")
 
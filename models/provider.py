@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship, validates
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -10,12 +11,12 @@ class Provider(db.Model):
 
     __tablename__ = "provider"
     id = Column(String, primary_key=True)
-    provider_type_id = Column(String, ForeignKey('provider_type.id'), nullable=False, index=True)
-    environment_id = Column(String, ForeignKey('environment.id'), nullable=False, index=True)
+    provider_type_id = Column(String, ForeignKey('provider_type.id', deferrable=True), nullable=False, index=True)
+    environment_id = Column(String, ForeignKey('environment.id', deferrable=True), nullable=False, index=True)
     native_id = Column(String, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     environment = relationship("Environment", back_populates="providers")
     type = relationship("ProviderType", back_populates="providers")
@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -12,10 +13,10 @@ class Region(db.Model):
     __tablename__ = "region"
     id = Column(String, primary_key=True)
     name = Column(String, nullable=False, index=True)
-    provider_id = Column(String, ForeignKey('provider.id'), nullable=False, index=True)
+    provider_id = Column(String, ForeignKey('provider.id', deferrable=True), nullable=False, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
     native_id = Column(String, index=True)
 
     partitions = relationship("Partition", back_populates="region", lazy='select')
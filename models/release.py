@@ -4,6 +4,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship
 
 from db import db
+from models.defaults import Defaults
 from models.associations import deployment_current_release
 import datetime
 
@@ -14,12 +15,12 @@ class Release(db.Model):
     __tablename__ = "release"
 
     id = Column(String, primary_key=True)
-    build_id = Column(String, ForeignKey('build.id'), nullable=False, index=True)
-    deployment_id = Column(String, ForeignKey('deployment.id'), nullable=False, index=True)
+    build_id = Column(String, ForeignKey('build.id', deferrable=True), nullable=False, index=True)
+    deployment_id = Column(String, ForeignKey('deployment.id', deferrable=True), nullable=False, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
     build_num = Column(Integer, nullable=False, index=True)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
     build = relationship('Build', back_populates='releases')
 
     deployment = relationship('Deployment', back_populates='releases', foreign_keys=[deployment_id])
@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship
 
 from db import db
+from models.defaults import Defaults
 
 
 class Repo(db.Model):
@@ -12,12 +13,12 @@ class Repo(db.Model):
 
     id = Column(String, primary_key=True)
     name = Column(String, nullable=False)
-    repo_type_id = Column(String, ForeignKey('repo_type.id'), nullable=False, index=True)
+    repo_type_id = Column(String, ForeignKey('repo_type.id', deferrable=True), nullable=False, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
 
     url = Column(String(253))
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     type = relationship("RepoType", back_populates="repos")
     services = relationship("Service", secondary='services_repos', back_populates="repos", lazy='select')
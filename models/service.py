@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -11,13 +12,13 @@ class Service(db.Model):
 
     __tablename__ = "service"
     id = Column(String, primary_key=True)
-    stack_id = Column(String, ForeignKey('stack.id'), nullable=False, index=True)
+    stack_id = Column(String, ForeignKey('stack.id', deferrable=True), nullable=False, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
     name = Column(String, nullable=False, index=True)
 
     artifact_name = Column(String, index=True)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     stack = relationship("Stack", back_populates="services")
     builds = relationship("Build", back_populates="service", lazy='select')
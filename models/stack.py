@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship
 
 from db import db
+from models.defaults import Defaults
 import datetime
 
 
@@ -13,10 +14,10 @@ class Stack(db.Model):
 
     id = Column(String, primary_key=True)
     name = Column(String, nullable=False, index=True)
-    application_id = Column(String, ForeignKey('application.id'), nullable=False, index=True)
+    application_id = Column(String, ForeignKey('application.id', deferrable=True), nullable=False, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     application = relationship('Application', back_populates='stacks')
     configs = relationship("StackConfig", back_populates="stack", lazy='select')
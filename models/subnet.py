@@ -5,6 +5,7 @@ from sqlalchemy.dialects.postgresql import CIDR
 from sqlalchemy.orm import relationship
 
 from db import db
+from models.defaults import Defaults
 from models import Network
 
 
@@ -12,15 +13,17 @@ class Subnet(db.Model):
     exclude = ['fleets']
 
     __tablename__ = "subnet"
+    # GiST over inet_ops serves the containment and overlap operators (>>=, <<=, &&)
+    __table_args__ = (Index('ix_subnet_cidr_gist', 'cidr', postgresql_using='gist', postgresql_ops={'cidr': 'inet_ops'}),)
     id = Column(String, primary_key=True)
-    network_id = Column(String, ForeignKey('network.id'), nullable=False, index=True)
+    network_id = Column(String, ForeignKey('network.id', deferrable=True), nullable=False, index=True)
     native_id = Column(String, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
     name = Column(String, nullable=False, index=True)
     cidr = Column(CIDR, nullable=False, index=True)
 
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     network = relationship("Network", back_populates="subnets")
     fleets = relationship("Fleet", secondary='subnets_fleets', back_populates="subnets", lazy='select')
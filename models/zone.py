@@ -2,6 +2,7 @@ from sqlalchemy import *
 from sqlalchemy.orm import relationship
 
 from db import db
+from models.defaults import Defaults
 
 
 class Zone(db.Model):
@@ -10,11 +11,11 @@ class Zone(db.Model):
     __tablename__ = "zone"
     id = Column(String, primary_key=True)
     name = Column(String, nullable=False, index=True)
-    region_id = Column(String, ForeignKey('region.id'), nullable=False, index=True)
+    region_id = Column(String, ForeignKey('region.id', deferrable=True), nullable=False, index=True)
     native_id = Column(String, index=True)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
-    defaults = Column(Text)
+    defaults = Column(Defaults)
 
     region = relationship("Region", back_populates="zones")
     deployments = relationship("Deployment", secondary='deployments_zones', back_populates="zones", lazy='select')
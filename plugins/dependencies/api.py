@@ -0,0 +1,191 @@
+import json
+from itertools import groupby
+
+from flask import Response, request, stream_with_context
+from sqlalchemy import String, Text, and_, cast, distinct, func, literal, not_, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, array
+
+from api.bulk import NDJSON_MIMETYPE, batched, jsonapi_error
+from db import db
+from plugins.dependencies.models import Dependency, Relatable, Related
+
+# object ids per IN query when one type has very many related objects
+IN_BATCH = 1000
+
+# hops walked when the caller sets no max_depth
+DEFAULT_DEPTH = 10
+
+# the deepest walk a caller may ask for
+MAX_DEPTH = 50
+
+
+class RelatedResolver:
+    """Streams the objects a dependency relates to as NDJSON.
+
+    The dependency's ``related`` rows are read in one query, ordered by
+    ``related_type``, and the objects of each type are then fetched with one
+    ``IN (...)`` query per type (per ``IN_BATCH`` ids), instead of one request
+    per edge.  ``related_type`` names the model class, e.g. ``Build``, or its
+    collection name.  Objects that no longer exist are left out.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self._models = None
+
+    @property
+    def models(self):
+        if self._models is None:
+            self._models = dict()
+            for model_class, api_info in self.manager.created_apis_for.items():
+                for name in (model_class.__name__, api_info.collection_name):
+                    self._models[name] = self._models[name.lower()] = model_class
+        return self._models
+
+    def model_for(self, related_type):
+        return self.models.get(related_type) or self.models.get(related_type.lower())
+
+    def objects(self, dependency_id):
+        """Yields (related_type, instance) grouped by type."""
+        rows = db.session.execute(select(Related.related_type, Related.object_id)
+                                  .where(Related.dependency_id == dependency_id)
+                                  .order_by(Related.related_type, Related.object_id)).all()
+        for related_type, group in groupby(rows, key=lambda x: x.related_type):
+            model_class = self.model_for(related_type)
+            if model_class is None:
+                continue
+            for ids in batched((row.object_id for row in group), IN_BATCH):
+                yield from ((related_type, instance) for instance in db.session.scalars(
+                    select(model_class).where(model_class.id.in_(ids)).order_by(model_class.id)))
+
+    def lines(self, dependency_id):
+        for _, instance in self.objects(dependency_id):
+            yield json.dumps(self.manager.serializer_for(type(instance)).serialize(instance)) + '\n'
+
+    def dispatch(self, dependency_id):
+        if db.session.get(Dependency, dependency_id) is None:
+            return jsonapi_error(404, 'No dependency with id %s' % dependency_id)
+        return Response(stream_with_context(self.lines(dependency_id)), mimetype=NDJSON_MIMETYPE)
+
+
+def __node__(type_column, object_id_column):
+    return type_column + literal(':') + object_id_column
+
+
+def __types__(name):
+    """The values of a repeatable, comma separated query parameter."""
+    return [x for value in request.args.getlist(name) for x in value.split(',') if x]
+
+
+class GraphWalker:
+    """Walks the dependency graph transitively with recursive CTEs.
+
+    Nodes are ``<type>:<object_id>``, the id of a relatable.  An edge runs
+    from a relatable through each of its dependencies to every related
+    object.  ``down`` answers what a node depends on, ``up`` what depends on
+    it.  The walk is breadth first over whole levels: each step carries the
+    set of nodes reached so far and expands only the new ones, so every node
+    is expanded once, at its shortest depth, however many paths lead to it.
+    Each node is then reported once, with the path through the first parent
+    that reached it.  An edge from a node back to one on its own path is
+    reported once per node with ``cycle`` set.
+    """
+
+    def __init__(self, node, direction='down', max_depth=DEFAULT_DEPTH, relatable_types=None, related_types=None):
+        self.node = node
+        self.direction = direction
+        self.max_depth = max_depth
+        self.relatable_types = relatable_types or []
+        self.related_types = related_types or []
+
+    def edges(self):
+        source = __node__(Relatable.relatable_type, Relatable.object_id)
+        target = __node__(Related.related_type, Related.object_id)
+        if self.direction == 'up':
+            source, target = target, source
+        query = select(source.label('source'), target.label('target'), Dependency.id.label('dependency_id')) \
+            .join(Dependency, Dependency.relatable_id == Relatable.id) \
+            .join(Related, Related.dependency_id == Dependency.id)
+        if self.relatable_types:
+            query = query.where(Relatable.relatable_type.in_(self.relatable_types))
+        if self.related_types:
+            query = query.where(Related.related_type.in_(self.related_types))
+        return query.cte('edges')
+
+    def levels(self, edges, start):
+        """(depth, nodes first reached at that depth), one row per level."""
+        nodes = array([start], type_=String)
+        levels = select(literal(0).label('depth'), nodes.label('frontier'), nodes.label('visited')) \
+            .cte('levels', recursive=True)
+        level = levels.alias('level')
+        following = select(func.array_agg(distinct(edges.c.target)).label('nodes')) \
+            .where(edges.c.source == level.c.frontier.any_(), not_(edges.c.target == level.c.visited.any_())) \
+            .lateral('following')
+        return levels.union_all(
+            select(level.c.depth + 1, following.c.nodes,
+                   level.c.visited.op('||', return_type=ARRAY(String))(following.c.nodes))
+            .select_from(level.join(following, true()))
+            .where(level.c.depth < self.max_depth, following.c.nodes.is_not(None)))
+
+    def query(self):
+        edges = self.edges()
+        start = literal(self.node, String)
+        levels = self.levels(edges, start)
+        reached = select(func.unnest(levels.c.frontier).label('node'), levels.c.depth).cte('reached')
+        previous = reached.alias('previous')
+        # each node hangs off the first of the nodes one level up with an edge to it
+        parents = select(reached.c.node, edges.c.source.label('parent'), edges.c.dependency_id) \
+            .join(edges, edges.c.target == reached.c.node) \
+            .join(previous, and_(previous.c.node == edges.c.source, previous.c.depth == reached.c.depth - 1)) \
+            .distinct(reached.c.node).order_by(reached.c.node, edges.c.source, edges.c.dependency_id) \
+            .cte('parents')
+        tree = select(start.label('node'), cast(None, Text).label('parent'),
+                      cast(None, String).label('dependency_id'), literal(0).label('depth'),
+                      array([start], type_=String).label('path')).cte('tree', recursive=True)
+        branch = tree.alias('branch')
+        tree = tree.union_all(
+            select(parents.c.node, parents.c.parent, parents.c.dependency_id, branch.c.depth + 1,
+                   branch.c.path.op('||', return_type=ARRAY(String))(parents.c.node))
+            .join(branch, parents.c.parent == branch.c.node))
+        nodes = select(tree.c.node, tree.c.parent, tree.c.dependency_id, tree.c.depth, tree.c.path,
+                       literal(False).label('cycle')).where(tree.c.depth > 0)
+        # edges back onto the path that led to their source, one per node they come back to
+        cycles = select(edges.c.target, edges.c.source, edges.c.dependency_id, tree.c.depth + 1,
+                        tree.c.path.op('||', return_type=ARRAY(String))(edges.c.target), literal(True)) \
+            .join(tree, edges.c.source == tree.c.node) \
+            .where(edges.c.target == tree.c.path.any_(), tree.c.depth < self.max_depth) \
+            .distinct(edges.c.target).order_by(edges.c.target, tree.c.depth, tree.c.path)
+        walk = nodes.union_all(cycles.subquery().select()).subquery()
+        return select(walk).order_by(walk.c.depth, walk.c.node, walk.c.cycle)
+
+    def lines(self):
+        for row in db.session.execute(self.query()):
+            node_type, _, object_id = row.node.partition(':')
+            attributes = {'node': row.node, 'node_type': node_type, 'object_id': object_id, 'parent': row.parent,
+                          'dependency_id': row.dependency_id, 'depth': row.depth, 'path': row.path,
+                          'cycle': row.cycle}
+            yield json.dumps({'type': 'dependency_walk', 'id': row.node, 'attributes': attributes}) + '\n'
+
+    @staticmethod
+    def dispatch(node):
+        direction = request.args.get('direction', 'down')
+        if direction not in ('down', 'up'):
+            return jsonapi_error(400, 'direction must be down or up')
+        try:
+            max_depth = int(request.args.get('max_depth', DEFAULT_DEPTH))
+        except ValueError:
+            return jsonapi_error(400, 'max_depth must be an integer')
+        if max_depth < 1:
+            return jsonapi_error(400, 'max_depth must be at least 1')
+        if max_depth > MAX_DEPTH:
+            return jsonapi_error(400, 'max_depth must be at most %d' % MAX_DEPTH)
+        walker = GraphWalker(node, direction, max_depth, __types__('relatable_type'), __types__('related_type'))
+        return Response(stream_with_context(walker.lines()), mimetype=NDJSON_MIMETYPE)
+
+
+def register_api(app, manager, url_prefix='/api/dependencies/v1'):
+    resolver = RelatedResolver(manager)
+    app.add_url_rule('%s/dependency/<dependency_id>/related.ndjson' % url_prefix,
+                     endpoint='dependency_related', view_func=resolver.dispatch)
+    app.add_url_rule('%s/node/<node>/walk.ndjson' % url_prefix, endpoint='dependency_walk',
+                     view_func=GraphWalker.dispatch)
@@ -10,8 +10,8 @@ class Dependency(db.Model):
     exclude = ['created_at', 'last_updated_at']
     id = Column(String, primary_key=True)
     dependency_case_id = Column(String,
-                                ForeignKey('plugin_dependencies_dependency_case.id'))
-    relatable_id = Column(String, ForeignKey('plugin_dependencies_relatable.id'), nullable=False)
+                                ForeignKey('plugin_dependencies_dependency_case.id', deferrable=True))
+    relatable_id = Column(String, ForeignKey('plugin_dependencies_relatable.id', deferrable=True), nullable=False)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     last_updated_at = Column(DateTime, nullable=True, onupdate=func.now(), index=True)
     name = Column(String, nullable=False)
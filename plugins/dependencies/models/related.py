@@ -1,8 +1,8 @@
-from sqlalchemy import Column, String, DateTime, func, ForeignKey
-from sqlalchemy.orm import relationship, validates
+from sqlalchemy import Column, String, DateTime, func, ForeignKey, select
+from sqlalchemy.orm import Session, relationship, validates
 
-from db import db
-from plugins.dependencies.models import Dependency
+from db import db, lookup, written
+from plugins.dependencies.models import Dependency, DependencyCase
 
 
 class Related(db.Model):
@@ -10,7 +10,7 @@ class Related(db.Model):
     __tablename__ = 'plugin_dependencies_related'
     exclude = ['created_at', 'last_updated_at', 'dependency_case']
     id = Column(String, primary_key=True)
-    dependency_id = Column(String, ForeignKey('plugin_dependencies_dependency.id'), nullable=False)
+    dependency_id = Column(String, ForeignKey('plugin_dependencies_dependency.id', deferrable=True), nullable=False)
     object_id = Column(String, nullable=False)
     related_type = Column(String, nullable=False)
     created_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
@@ -35,6 +35,27 @@ def my_before_insert_listener(mapper, connection, related):
 
 
 def __update_id__(related):
-    dep = db.session.query(Dependency).filter(Dependency.id==related.dependency_id).first()
-    assert dep.dependency_case.related_type == related.related_type
     related.id = ':'.join([related.related_type, related.dependency_id, related.object_id])
+
+
+def related_types(session, dependency_ids):
+    """The related_type each dependency's case allows."""
+    return lookup(session, lambda ids: select(Dependency.id, DependencyCase.related_type)
+                  .outerjoin(DependencyCase, Dependency.dependency_case_id == DependencyCase.id)
+                  .where(Dependency.id.in_(ids)), dependency_ids)
+
+
+@db.event.listens_for(Session, 'before_flush')
+def validate_related_types(session, flush_context, instances):
+    relateds = written(session, Related)
+    if not relateds:
+        return
+    for related in relateds:
+        # a row added through dependency.relateds has no dependency_id until the flush
+        if related.dependency_id is None and related.dependency is not None:
+            related.dependency_id = related.dependency.id
+    allowed = related_types(session, {x.dependency_id for x in relateds})
+    for related in relateds:
+        assert allowed[related.dependency_id] == related.related_type, \
+            'dependency %s relates %s objects, not %s' % (related.dependency_id, allowed[related.dependency_id],
+                                                          related.related_type)
@@ -1,9 +1,10 @@
 import argparse
-import importlib
+import os
+import sys
 
 import argcomplete
 
-from qairon_qcli.lib import dynamic
+from qairon_qcli.controllers.manifest import ParserManifest
 from qairon_qcli.controllers.rest_controller import RestController
 from qairon_qcli.controllers.schema import QaironSchema
 
@@ -54,13 +55,19 @@ def __add_list_parser__(parsers):
     list_parser = parsers.add_parser('list')
     list_parser.required = False
     list_parser.add_argument('-f', help='output fields', dest='output_fields', action='append')
-    list_parser.add_argument('-o', help='format: [ json(default) | plain ]', dest='output_format')
+    list_parser.add_argument('-o', help='format: [ json(default) | ndjson | plain ]', dest='output_format')
 
     query_parser = parsers.add_parser('query')
     query_parser.required = False
     query_parser.add_argument('query')
     query_parser.add_argument('-f', help='output fields', dest='output_fields', action='append')
-    query_parser.add_argument('-o', help='format: [ json(default) | plain ]', dest='output_format')
+    query_parser.add_argument('-o', help='format: [ json(default) | ndjson | plain ]', dest='output_format')
+
+
+def __add_export_parser__(parsers):
+    export_parser = parsers.add_parser('export')
+    export_parser.add_argument('query', nargs='?', help='filter[objects] query')
+    export_parser.add_argument('-f', help='fields (sparse fieldset)', dest='output_fields', action='append')
 
 
 def __add_set_field_parser__(rest, parsers, resource):
@@ -76,7 +83,7 @@ def __add_get_field_parser__(rest, parsers, resource):
     get_field_parser.add_argument('field')
     get_field_parser.add_argument('-f', help='output field for related object', dest='output_fields',
                                   action='append')
-    get_field_parser.add_argument('-o', help='format: [ json(default) | plain ]', dest='output_format')
+    get_field_parser.add_argument('-o', help='format: [ json(default) | ndjson | plain ]', dest='output_format')
 
 
 def __add_get_field_query_parser__(rest, parsers, resource):
@@ -85,54 +92,89 @@ def __add_get_field_query_parser__(rest, parsers, resource):
     get_field_query_parser.required = False
     get_field_query_parser.add_argument('query')
     get_field_query_parser.add_argument('-f', help='output fields', dest='output_fields', action='append')
-    get_field_query_parser.add_argument('-o', help='format: [ json(default) | plain ]', dest='output_format')
+    get_field_query_parser.add_argument('-o', help='format: [ json(default) | ndjson | plain ]', dest='output_format')
+
+
+def __add_destination_args__(rest, parser, dest):
+    parser.add_argument(dest, nargs='?', help='destination deployment').completer = getattr(rest,
+                                                                                        'deployment_completer')
+    parser.add_argument('--where', dest='query', help='filter[objects] query selecting destination deployments')
+    parser.add_argument('--dry-run', dest='dry_run', action='store_true',
+                        help='show what would change without changing it')
+    parser.add_argument('-f', help='output fields', dest='output_fields', action='append')
+    parser.add_argument('-o', help='format: [ json(default) | ndjson | plain ]', dest='output_format')
+
+
+def __add_cidr_query_parsers__(parsers):
+    contains_parser = parsers.add_parser('contains')
+    contains_parser.add_argument('address', help='IP address')
+    contains_parser.add_argument('-f', help='output fields', dest='output_fields', action='append')
+    contains_parser.add_argument('-o', help='format: [ json(default) | ndjson | plain ]', dest='output_format')
+
+    overlaps_parser = parsers.add_parser('overlaps')
+    overlaps_parser.add_argument('cidr', help='CIDR')
+    overlaps_parser.add_argument('-f', help='output fields', dest='output_fields', action='append')
+    overlaps_parser.add_argument('-o', help='format: [ json(default) | ndjson | plain ]', dest='output_format')
+
+
+def invoked_resource(argv=None):
+    """The resource a command line operates on, or '' when it has not been typed in full yet."""
+    if argv is None:
+        if '_ARGCOMPLETE' in os.environ:
+            comp_line = os.environ.get('COMP_LINE', '')
+            comp_line = comp_line[:int(os.environ.get('COMP_POINT', len(comp_line)))]
+            argv = comp_line.split()[1:]
+            # the word under the cursor is still being completed
+            if argv and not comp_line[-1:].isspace():
+                argv = argv[:-1]
+        else:
+            argv = sys.argv[1:]
+    words = [word for word in argv if not word.startswith('-')]
+    return words[0] if words else ''
 
 
 class CLIArgs:
 
-    def __init__(self, rest):
+    def __init__(self, rest, manifest=None):
         self.rest = rest
         self.model_subparsers = dict()
-        self.discovered_plugins = dict()
-
-        plugins_with_controllers = dynamic.plugin_has_module('controllers', 'qairon_qcli.plugins')
-        for plugin_with_controllers in plugins_with_controllers:
-            package_spec = importlib.util.find_spec('qairon_qcli.plugins.%s.%s' % (plugin_with_controllers, 'controllers.schema'))
-            if package_spec is not None:
-                module = importlib.import_module('qairon_qcli.plugins.%s.%s' % (plugin_with_controllers, 'controllers'))
-                qs = getattr(module, 'QaironSchema')
-                QaironSchema.CREATE_FIELDS.update(qs.CREATE_FIELDS)
-                RestController.schema.CREATE_FIELDS.update(qs.CREATE_FIELDS)
+        self.manifest = manifest if manifest is not None else ParserManifest()
+
+        QaironSchema.CREATE_FIELDS.update(self.manifest.create_fields)
+        RestController.schema.CREATE_FIELDS.update(self.manifest.create_fields)
         __gen_completers__(rest)
 
         __gen_attr_completers__(rest, 'service', 'repos')
         __gen_attr_completers__(rest, 'deployment', 'zones')
 
+    @property
+    def plugin_commands(self):
+        return self.manifest.commands
+
     def subnet_allocator_bits_completer(self, prefix):
         return ['additional_mask_bits']
 
-    def __gen_parsers__(self, context_parsers):
-        plugins_with_controllers = dynamic.plugin_has_module('controllers','qairon_qcli.plugins')
-        for plugin_base_name in plugins_with_controllers:
-            plugin = 'qairon_qcli.plugins.%s' % plugin_base_name
-            plugin_package = importlib.import_module(plugin)
-            self.discovered_plugins[plugin_base_name] = plugin_package
-            if hasattr(plugin_package, "cli"):
-                cli_module = importlib.import_module(plugin_package.__name__ + '.cli')
-                plugin_parser = context_parsers.add_parser(plugin_base_name)
-                new_subparsers = plugin_parser.add_subparsers(help='command', dest='command')
-                new_subparsers.required = True
-                for command in cli_module.COMMANDS.keys():
-                    parser = new_subparsers.add_parser(command)
-                    __populate_args__(self.rest, parser, plugin_package.COMMANDS[command])
+    def __gen_parsers__(self, context_parsers, resource=None):
+        for plugin_base_name, commands in self.plugin_commands.items():
+            plugin_parser = context_parsers.add_parser(plugin_base_name)
+            if resource is not None and resource != plugin_base_name:
+                continue
+            new_subparsers = plugin_parser.add_subparsers(help='command', dest='command')
+            new_subparsers.required = True
+            for command, fields in commands.items():
+                parser = new_subparsers.add_parser(command)
+                __populate_args__(self.rest, parser, fields)
 
         for model in QaironSchema.MODELS:
             model_parser = context_parsers.add_parser(model)
+            if resource is not None and resource != model:
+                continue
             parsers_for_model_parser = model_parser.add_subparsers(help='command', dest='command')
             parsers_for_model_parser.required = True
             self.model_subparsers[model] = parsers_for_model_parser
 
             __add_list_parser__(parsers_for_model_parser)
+            __add_export_parser__(parsers_for_model_parser)
             __add_set_field_parser__(self.rest, parsers_for_model_parser, model)
             __add_get_field_parser__(self.rest, parsers_for_model_parser, model)
             __add_get_field_query_parser__(self.rest, parsers_for_model_parser, model)
@@ -140,64 +182,94 @@ class CLIArgs:
             _model_com_get_parser.add_argument('resource_id').completer = getattr(self.rest, '%s_completer' % model)
             _model_com_get_parser.add_argument('-f', help='output field for related object', dest='output_fields',
                                                action='append')
-            _model_com_get_parser.add_argument('-o', help='format: [ json(default) | plain ]', dest='output_format')
+            _model_com_get_parser.add_argument('-o', help='format: [ json(default) | ndjson | plain ]', dest='output_format')
             _model_com_create_parser = parsers_for_model_parser.add_parser('create')
             __populate_args__(self.rest, _model_com_create_parser, QaironSchema.CREATE_FIELDS[model])
             _model_com_delete_parser = parsers_for_model_parser.add_parser('delete')
             _model_com_delete_parser.add_argument('resource_id').completer = getattr(self.rest, '%s_completer' % model)
 
-        service_subparsers = self.model_subparsers['service']
+        if 'service' in self.model_subparsers:
+            self.__gen_service_parsers__(self.model_subparsers['service'])
+        if 'deployment' in self.model_subparsers:
+            self.__gen_deployment_parsers__(self.model_subparsers['deployment'])
+        if 'network' in self.model_subparsers:
+            self.__gen_network_parsers__(self.model_subparsers['network'])
+        for model in ('network', 'subnet'):
+            if model in self.model_subparsers:
+                __add_cidr_query_parsers__(self.model_subparsers[model])
+
+    def __gen_service_parsers__(self, service_subparsers):
         assign_repo_parser = service_subparsers.add_parser('assign_repo')
         assign_repo_parser.add_argument(metavar='service_id', dest='owner_id').completer = getattr(self.rest,
                                                                                                    'service_completer')
-        assign_repo_parser.add_argument(metavar='repo_id', dest='item_id').completer = getattr(self.rest,
+        assign_repo_parser.add_argument(metavar='repo_id', dest='item_id', nargs='+').completer = getattr(self.rest,
                                                                                                'repo_completer')
 
         unassign_repo_parser = service_subparsers.add_parser('unassign_repo')
         unassign_repo_parser.add_argument(metavar='service_id', dest='owner_id').completer = getattr(self.rest,
                                                                                                      'service_completer')
-        unassign_repo_parser.add_argument(metavar='repo_id', dest='item_id').completer = getattr(self.rest,
+        unassign_repo_parser.add_argument(metavar='repo_id', dest='item_id', nargs='+').completer = getattr(self.rest,
                                                                                                  'service_repos_completer')
 
-        deployment_sub_parsers = self.model_subparsers['deployment']
+    def __gen_deployment_parsers__(self, deployment_sub_parsers):
         clone_dep_parser = deployment_sub_parsers.add_parser('clone')
-        clone_dep_parser.add_argument('id').completer = getattr(self.rest, 'deployment_completer')
+        clone_dep_parser.add_argument('deployment_id').completer = getattr(self.rest, 'deployment_completer')
         clone_dep_parser.add_argument('deployment_target_id',
-                                      help='destination deployment target')
+                                      help='destination deployment target').completer = getattr(self.rest,
+                                                                                                'deployment_target_completer')
+        clone_dep_parser.add_argument('--tag', help='tag of the clone, defaults to the source tag')
+
+        promote_parser = deployment_sub_parsers.add_parser('promote')
+        promote_parser.add_argument('srcid', help='deployment whose current build is promoted').completer = getattr(
+            self.rest, 'deployment_completer')
+        __add_destination_args__(self.rest, promote_parser, 'dstid')
+
+        setver_parser = deployment_sub_parsers.add_parser('setver')
+        setver_parser.add_argument('version', help='build id').completer = getattr(self.rest, 'build_completer')
+        __add_destination_args__(self.rest, setver_parser, 'resource_id')
 
         assign_zone_parser = deployment_sub_parsers.add_parser('assign_zone')
         assign_zone_parser.add_argument(metavar='deployment_id', dest='owner_id').completer = getattr(self.rest,
                                                                                                       'deployment_completer')
-        assign_zone_parser.add_argument(metavar='zone_id', dest='item_id').completer = getattr(self.rest,
+        assign_zone_parser.add_argument(metavar='zone_id', dest='item_id', nargs='+').completer = getattr(self.rest,
                                                                                                'zone_completer')
 
         unassign_zone_parser = deployment_sub_parsers.add_parser('unassign_zone')
         unassign_zone_parser.add_argument(metavar='deployment_id', dest='owner_id').completer = getattr(self.rest,
                                                                                                         'deployment_completer')
-        unassign_zone_parser.add_argument(metavar='zone_id', dest='item_id').completer = getattr(self.rest,
+        unassign_zone_parser.add_argument(metavar='zone_id', dest='item_id', nargs='+').completer = getattr(self.rest,
                                                                                                  'deployment_zones_completer')
 
-        network_sub_parsers = self.model_subparsers['network']
+    def __gen_network_parsers__(self, network_sub_parsers):
         subnet_allocator_parser = network_sub_parsers.add_parser('allocate_subnet')
         subnet_allocator_parser.add_argument('network_id', help='Network ID').completer = getattr(self.rest,
                                                                                           'network_completer')
         subnet_allocator_parser.add_argument('additional_mask_bits',
                                              help='Subnet bits').completer = self.subnet_allocator_bits_completer
-        subnet_allocator_parser.add_argument('name', help='Name of subnet')
+        subnet_allocator_parser.add_argument('name', nargs='+', help='Name of subnet, several allocate one each')
 
-    def assign_args(self):
+        free_blocks_parser = network_sub_parsers.add_parser('free_blocks')
+        free_blocks_parser.add_argument('network_id', help='Network ID').completer = getattr(self.rest,
+                                                                                     'network_completer')
+        free_blocks_parser.add_argument('prefixlen', help='prefix length of the blocks wanted, e.g. 24')
+        free_blocks_parser.add_argument('-f', help='output fields', dest='output_fields', action='append')
+        free_blocks_parser.add_argument('-o', help='format: [ json(default) | ndjson | plain ]', dest='output_format')
+
+    def assign_args(self, resource=None):
+        """Builds the parser, with only ``resource``'s subtree unless ``resource`` is None."""
+        self.model_subparsers = dict()
         parser = argparse.ArgumentParser(description='qaironRegistry CLI')
         parser.add_argument('-q', help='Quiet', required=False, action='store_true')
         context_parsers = parser.add_subparsers(help='context to operate in', dest='resource')
 
-        self.__gen_parsers__(context_parsers)
+        self.__gen_parsers__(context_parsers, resource)
 
         test_parser = context_parsers.add_parser('test')
         test_parser.add_argument('command', nargs='*')
         return parser
 
     def parse_args(self):
-        parser = self.assign_args()
+        parser = self.assign_args(invoked_resource())
         argcomplete.autocomplete(parser)
 
         return parser.parse_known_args()
@@ -0,0 +1,118 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    etag TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ids (
+    key TEXT NOT NULL,
+    id TEXT NOT NULL,
+    PRIMARY KEY (key, id)
+) WITHOUT ROWID;
+'''
+
+# sorts after every character an id can contain, closes the prefix range
+PREFIX_END = '\U0010ffff'
+
+
+def default_path():
+    cache_home = os.getenv('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache_home, 'qairon', 'completion.sqlite')
+
+
+class CompletionCache:
+    """On-disk read-through cache of ids for tab completion.
+
+    Each key (a collection, or an owner's to-many field such as
+    ``service/<id>/repos``) holds its full id list in a clustered
+    ``(key, id)`` index, so a prefix is answered by one range scan without
+    touching the server.  Entries older than ``ttl`` seconds are revalidated:
+    collections with ``If-None-Match`` against the export endpoint's ETag, so
+    an unchanged table costs a bodiless 304, and to-many fields by a plain
+    re-read.  When the server cannot be reached the stale ids are served.
+    """
+
+    def __init__(self, rest, path, ttl):
+        self.rest = rest
+        self.path = path
+        self.ttl = ttl
+        # sqlite connections cannot cross threads, each thread gets its own
+        self._local = threading.local()
+
+    @property
+    def db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = self._local.db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.executescript(SCHEMA)
+        return db
+
+    def __key__(self, path):
+        return self.rest.URL + path
+
+    def search(self, prefix, resource):
+        key = self.__key__(resource)
+        self.__refresh__(key, lambda etag: self.__fetch_collection__(resource, etag))
+        return self.__lookup__(key, prefix)
+
+    def attr_search(self, prefix, resource, resource_id, attribute):
+        key = self.__key__('%s/%s/%s' % (resource, resource_id, attribute))
+        self.__refresh__(key, lambda etag: self.__fetch_field__(resource, resource_id, attribute))
+        return self.__lookup__(key, prefix)
+
+    def invalidate(self, path):
+        # the next lookup revalidates, collections keep their ids and ETag for a 304
+        self.db.execute('UPDATE entries SET fetched_at = 0 WHERE key = ?', (self.__key__(path),))
+
+    def __lookup__(self, key, prefix):
+        prefix = str(prefix)
+        rows = self.db.execute('SELECT id FROM ids WHERE key = ? AND id >= ? AND id < ? ORDER BY id',
+                               (key, prefix, prefix + PREFIX_END))
+        return [row[0] for row in rows]
+
+    def __refresh__(self, key, fetch):
+        entry = self.db.execute('SELECT etag, fetched_at FROM entries WHERE key = ?', (key,)).fetchone()
+        if entry is not None and time.time() - entry[1] < self.ttl:
+            return
+        try:
+            fetched = fetch(None if entry is None else entry[0])
+        except (OSError, ValueError):
+            if entry is None:
+                raise
+            return
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            if fetched is not None:
+                etag, ids = fetched
+                self.db.execute('DELETE FROM ids WHERE key = ?', (key,))
+                self.db.executemany('INSERT OR IGNORE INTO ids (key, id) VALUES (?, ?)', ((key, x) for x in ids))
+            else:
+                etag = entry[0]
+            self.db.execute('INSERT OR REPLACE INTO entries (key, etag, fetched_at) VALUES (?, ?, ?)',
+                            (key, etag, time.time()))
+
+    def __fetch_collection__(self, resource, etag):
+        """Returns (etag, ids) or None when the server answers 304 Not Modified."""
+        headers = {'If-None-Match': etag} if etag else {}
+        response = self.rest.session.get(self.rest.EXPORT_URL + resource + '.ndjson',
+                                         params={'fields[%s]' % resource: 'id'}, headers=headers, stream=True)
+        if response.status_code == 304:
+            return None
+        if response.status_code != 200:
+            raise ValueError('%s: %d' % (resource, response.status_code))
+        response.encoding = 'utf-8'
+        ids = (json.loads(line)['id'] for line in response.iter_lines(decode_unicode=True) if line)
+        return response.headers.get('ETag'), ids
+
+    def __fetch_field__(self, resource, resource_id, attribute):
+        response = self.rest._get_record_(resource, resource_id, field=attribute)
+        if response.status_code != 200:
+            raise ValueError('%s/%s/%s: %d' % (resource, resource_id, attribute, response.status_code))
+        return None, [x['id'] for x in response.json()['data']]
@@ -0,0 +1,103 @@
+import importlib.util
+import json
+import os
+
+from qairon_qcli.controllers.completion_cache import default_path as completion_cache_path
+from qairon_qcli.lib import dynamic
+
+PLUGINS_PACKAGE = 'qairon_qcli.plugins'
+
+# bump when the layout of the manifest changes
+MANIFEST_VERSION = 1
+
+
+def default_path():
+    return os.path.join(os.path.dirname(completion_cache_path()), 'manifest.json')
+
+
+def plugins_dir():
+    return os.path.dirname(importlib.util.find_spec(PLUGINS_PACKAGE).origin)
+
+
+def fingerprint():
+    """Size and mtime of every source file under the plugins package."""
+    top = plugins_dir()
+    stamps = []
+    for root, dirs, files in os.walk(top):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+        for name in sorted(files):
+            if name.endswith('.py'):
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                stamps.append([os.path.relpath(path, top), stat.st_size, stat.st_mtime_ns])
+    return stamps
+
+
+def build():
+    """Imports every plugin's schema and cli modules and records what the parser needs from them."""
+    create_fields = dict()
+    commands = dict()
+    for plugin in dynamic.plugin_has_module('controllers', PLUGINS_PACKAGE):
+        schema = '%s.%s.controllers.schema' % (PLUGINS_PACKAGE, plugin)
+        if importlib.util.find_spec(schema) is not None:
+            create_fields.update(importlib.import_module(schema).QaironSchema.CREATE_FIELDS)
+        if importlib.util.find_spec('%s.%s.cli' % (PLUGINS_PACKAGE, plugin)) is not None:
+            commands[plugin] = importlib.import_module('%s.%s.cli' % (PLUGINS_PACKAGE, plugin)).COMMANDS
+    return {'create_fields': create_fields, 'commands': commands}
+
+
+class ParserManifest:
+    """Plugin schema and command definitions, cached on disk as JSON.
+
+    Building the parser needs every plugin's ``CREATE_FIELDS`` and
+    ``COMMANDS``, and importing the modules that define them pulls in boto3,
+    jinja2 and friends.  The manifest keeps those definitions keyed by a
+    fingerprint of the plugin sources, so a normal run reads one small file
+    and plugin code is only imported when one of its commands actually runs.
+    Set ``QAIRON_PARSER_MANIFEST`` to a path, or to ``off`` to always import.
+    """
+
+    def __init__(self, path=None):
+        self.path = path if path is not None else os.getenv('QAIRON_PARSER_MANIFEST', default_path())
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self.__load__()
+        return self._data
+
+    @property
+    def create_fields(self):
+        return self.data['create_fields']
+
+    @property
+    def commands(self):
+        return self.data['commands']
+
+    def __load__(self):
+        if self.path == 'off':
+            return build()
+        stamp = fingerprint()
+        try:
+            with open(self.path) as f:
+                cached = json.load(f)
+            if cached.get('version') == MANIFEST_VERSION and cached.get('fingerprint') == stamp:
+                return cached
+        except (OSError, ValueError):
+            pass
+        data = build()
+        self.__save__(dict(data, version=MANIFEST_VERSION, fingerprint=stamp))
+        return data
+
+    def __save__(self, data):
+        tmp = '%s.%d.tmp' % (self.path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            # a read-only cache only costs the imports on every run
+            if os.path.exists(tmp):
+                os.remove(tmp)
@@ -1,3 +1,5 @@
+import json
+
 from json_stream import streamable_list
 
 from .rest_controller import RestController
@@ -49,6 +51,9 @@ class OperationsController:
         value = self.rest.get_field(resource, resource_id, field=relation, index='relationships')
         return self._stream_(value['data'])
 
+    def export(self, resource, query=None, fields=None):
+        return self.rest.export(resource, query, fields)
+
     def list(self, resource):
         batches = self.rest.query(resource)
         return self._stream_(batches)
@@ -94,9 +99,25 @@ class OperationsController:
 
     def allocate_subnet(self, network_id, additional_mask_bits, name):
         response = self.rest.allocate_subnet(network_id, additional_mask_bits, name)
+        if response.status_code != 201:
+            raise ValueError(response.json()['errors'][0]['detail'])
         data = response.json()['data']
         return self._stream_(data)
 
+    def _net_query_(self, response):
+        if response.status_code != 200:
+            raise ValueError(response.json()['errors'][0]['detail'])
+        return self._stream_(response.json()['data'])
+
+    def contains(self, resource, address):
+        return self._net_query_(self.rest.cidr_contains(resource, address))
+
+    def overlaps(self, resource, cidr):
+        return self._net_query_(self.rest.cidr_overlaps(resource, cidr))
+
+    def free_blocks(self, network_id, prefixlen):
+        return self._net_query_(self.rest.free_blocks(network_id, prefixlen))
+
     def clone_config(self, config_id, deployment_id):
         config = self.rest.get_instance('config', config_id)
         config.pop('id')
@@ -106,60 +127,11 @@ class OperationsController:
         data = response.json().get('data')
         return self._stream_(data)
 
-    def clone_deployment(self, deployment_id, deployment_target_id, version=None):
-        dep = self.rest.get_instance('deployment', deployment_id)
-        configs = dep['configs']
-        dep_procs = dep['deployment_proces']
-        dep['deployment_target_id'] = deployment_target_id
-        dep.pop('deployment_target')
-        dep.pop('id')
-        dep.pop('configs')
-        dep.pop('service')
-        dep['resource'] = 'deployment'
-
-        if version is not None:
-            dep['version'] = version
-
-        response = self.rest.create_resource(dep)
-        new_dep_data = response.json().get('data')
-        new_dep_id = new_dep_data['id']
-
-        for config in configs:
-            config.pop('id')
-            config['deployment_id'] = new_dep_id
-            config['resource'] = 'config'
-            self.rest.create_resource(config)
-
-        for dep_proc in dep_procs:
-            old_dep_proc_id = dep_proc['id']
-            dep_proc.pop('id')
-            dep_proc.pop('deployment_id')
-            dep_proc['deployment_id'] = new_dep_id
-            dep_proc['resource'] = 'deployment_proc'
-            response = self.rest.create_resource(dep_proc)
-            if response.status_code == 201:
-                new_depproc_id = response.json()['id']
-                cpu_allocations = self.rest.query('cpu_allocation', 'deployment_proc_id', 'equals', old_dep_proc_id)
-                for cpu_alloc in cpu_allocations:
-                    ca = self.rest.get_instance('cpu_allocation', cpu_alloc[0])
-                    ca.pop('id')
-                    ca.pop('deployment_proc_id')
-                    ca['deployment_proc_id'] = new_depproc_id
-                    ca.pop('deployment_proc')
-                    ca['resource'] = 'cpu_allocation'
-                    self.rest.create_resource(ca)
-                memory_allocations = self.rest.query('memory_allocation', 'deployment_proc_id', 'equals',
-                                                     old_dep_proc_id)
-                for memory_alloc in memory_allocations:
-                    ca = self.rest.get_instance('memory_allocation', memory_alloc[0])
-                    ca.pop('id')
-                    ca.pop('deployment_proc_id')
-                    ca['deployment_proc_id'] = new_depproc_id
-                    ca.pop('deployment_proc')
-                    ca['resource'] = 'memory_allocation'
-                    self.rest.create_resource(ca)
-
-        return self._stream_(new_dep_data)
+    def clone_deployment(self, deployment_id, deployment_target_id, tag=None):
+        response = self.rest.clone_deployment(deployment_id, deployment_target_id, tag)
+        if response.status_code != 201:
+            raise ValueError(response.json()['errors'][0]['detail'])
+        return self._stream_(response.json()['data'])
 
     def clone_nodegroup(self, resource_id, name):
         nodegroup = self.rest.get_instance('deployment', resource_id)
@@ -174,12 +146,26 @@ class OperationsController:
         result = self.rest.del_from_many_to_many(resource, owner_id, singular_resource, items, item_id)
         return self._stream_(result)
 
-    def promote(self, srcid, dstid):
-        src_version = self.rest.get_instance('deployment', srcid)['version']
-        return self.set_field('deployment', dstid, 'version', src_version)
+    @staticmethod
+    def _destinations_(dstid=None, query=None):
+        filters = json.loads(query) if query else []
+        if dstid is not None:
+            filters.append({'name': 'id', 'op': 'eq', 'val': dstid})
+        return filters
+
+    def _promote_(self, filters, source=None, build_id=None, dry_run=False):
+        response = self.rest.promote(filters, source, build_id, dry_run)
+        if response.status_code != 200:
+            raise ValueError(response.json()['errors'][0]['detail'])
+        return self._stream_(response.json()['data'])
+
+    def promote(self, srcid, dstid=None, query=None, dry_run=False):
+        return self._promote_(self._destinations_(dstid, query), source=srcid, dry_run=dry_run)
 
     def set_field(self, resource, resource_id, field, value):
         return self.update(resource, resource_id, field, value)
 
-    def set_version(self, resource, resource_id, version):
-        return self.update(resource, resource_id, 'version', version)
+    def set_version(self, resource, resource_id, version, query=None, dry_run=False):
+        if resource != 'deployment':
+            raise ValueError('setver only applies to deployments')
+        return self._promote_(self._destinations_(resource_id, query), build_id=version, dry_run=dry_run)
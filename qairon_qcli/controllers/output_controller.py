@@ -1,5 +1,6 @@
 import itertools
 import json
+import sys
 
 from abc import ABC
 
@@ -57,6 +58,31 @@ def _filter_fields(data, fields):
     return {k: v for k, v in data.items() if k in fields}
 
 
+_END = object()
+
+
+def write_json(rows, write):
+    """Write rows as a JSON array one row at a time.
+
+    Looks one row ahead so a single row is still written as a scalar object
+    and no rows as an empty array; the output matches json.dumps(list(rows)).
+    """
+    rows = iter(rows)
+    first = next(rows, _END)
+    if first is _END:
+        write('[]')
+        return
+    second = next(rows, _END)
+    if second is _END:
+        write(json.dumps(first))
+        return
+    write('[' + json.dumps(first))
+    write(', ' + json.dumps(second))
+    for row in rows:
+        write(', ' + json.dumps(row))
+    write(']')
+
+
 class AbstractOutputController(ABC):
 
     def handle(self, data, **kwargs):
@@ -65,28 +91,42 @@ class AbstractOutputController(ABC):
             results = simplify_rows(data)
             self._output_(results, **kwargs)
 
-
-class PrintingOutputController(AbstractOutputController):
+    def pipe(self, lines):
+        """Pass already serialized lines (e.g. an NDJSON export) through one at a time."""
+        for line in lines:
+            self._write_line_(line)
 
     def _output_(self, data, **kwargs):
         output_format = kwargs.get('output_format') or 'json'
         output_fields = kwargs.get('output_fields')
 
-        # Materialize the iterable to a list so we can check length
-        rows = list(data)
-
-        # Apply field filtering if specified
+        # Rows are filtered and written as they arrive, nothing is materialised
+        rows = iter(data)
         if output_fields:
-            rows = [_filter_fields(row, output_fields) for row in rows]
+            rows = (_filter_fields(row, output_fields) for row in rows)
+
         if output_format == 'json':
-            # Single item: output as scalar dict, multiple: output as list
-            if len(rows) == 1:
-                print(json.dumps(rows[0]))
-            else:
-                print(json.dumps(rows))
+            self._output_json_(rows)
+        elif output_format == 'ndjson':
+            for row in rows:
+                self._write_line_(json.dumps(row))
         elif output_format == 'plain':
             for row in rows:
-                print(' '.join(row[x] for x in output_fields))
+                self._output_plain_(row, output_fields)
+
+
+class PrintingOutputController(AbstractOutputController):
+
+    def _write_line_(self, line):
+        sys.stdout.write(line + '\n')
+
+    def _output_json_(self, rows):
+        # Single item: output as scalar dict, multiple: output as list
+        write_json(rows, sys.stdout.write)
+        sys.stdout.write('\n')
+
+    def _output_plain_(self, row, output_fields):
+        print(' '.join(str(row[x]) for x in output_fields))
 
 
 class StringIOOutputController(AbstractOutputController):
@@ -94,26 +134,15 @@ class StringIOOutputController(AbstractOutputController):
     def __init__(self, string_io):
         self.string_io = string_io
 
-    def _output_(self, data, **kwargs):
-        output_format = kwargs.get('output_format') or 'json'
-        output_fields = kwargs.get('output_fields')
+    def _write_line_(self, line):
+        self.string_io.write(line + '\n')
 
-        # Materialize the iterable to a list so we can check length
-        rows = list(data)
-
-        # Apply field filtering if specified
-        if output_fields:
-            rows = [_filter_fields(row, output_fields) for row in rows]
+    def _output_json_(self, rows):
+        # Single item: output as scalar dict, multiple: output as list
+        write_json(rows, self.string_io.write)
 
-        if output_format == 'json':
-            # Single item: output as scalar dict, multiple: output as list
-            if len(rows) == 1:
-                json.dump(rows[0], self.string_io)
-            else:
-                json.dump(rows, self.string_io)
-        elif output_format == 'plain':
-            for row in rows:
-                self.string_io.write(' '.join(str(x) for x in row.values()))
+    def _output_plain_(self, row, output_fields):
+        self.string_io.write(' '.join(str(x) for x in row.values()))
 
 
 class IterableOutputController(AbstractOutputController):
@@ -121,23 +150,15 @@ class IterableOutputController(AbstractOutputController):
     def __init__(self, iterable):
         self.iterable = iterable
 
-    def _output_(self, data, **kwargs):
-        output_format = kwargs.get('output_format') or 'json'
-        output_fields = kwargs.get('output_fields')
-
-        # Materialize the iterable to a list so we can check length
-        rows = list(data)
+    def _write_line_(self, line):
+        self.iterable.append(line)
 
-        # Apply field filtering if specified
-        if output_fields:
-            rows = [_filter_fields(row, output_fields) for row in rows]
+    def _output_json_(self, rows):
+        for row in rows:
+            self.iterable.append(json.dumps(row))
 
-        if output_format == 'json':
-            for row in rows:
-                self.iterable.append(json.dumps(row))
-        elif output_format == 'plain':
-            for row in rows:
-                self.iterable.append(' '.join(str(x) for x in row.values()))
+    def _output_plain_(self, row, output_fields):
+        self.iterable.append(' '.join(str(x) for x in row.values()))
 
     @streamable_list
     def read_as_json(self):
@@ -31,6 +31,10 @@ class QCLIController:
         rows = self.ops.get_parent(resource, relation, resource_id)
         self.oc.handle(rows, **kwargs)
 
+    def export(self, resource, query=None, output_fields=None, **kwargs):
+        lines = self.ops.export(resource, query, output_fields)
+        self.oc.pipe(lines)
+
     def list(self, resource, **kwargs):
         rows = self.ops.list(resource)
         self.oc.handle(rows, **kwargs)
@@ -51,12 +55,24 @@ class QCLIController:
         data = self.ops.allocate_subnet(network_id, additional_mask_bits, name)
         self.oc.handle(data, **kwargs)
 
+    def contains(self, resource, address, **kwargs):
+        data = self.ops.contains(resource, address)
+        self.oc.handle(data, **kwargs)
+
+    def overlaps(self, resource, cidr, **kwargs):
+        data = self.ops.overlaps(resource, cidr)
+        self.oc.handle(data, **kwargs)
+
+    def free_blocks(self, network_id, prefixlen, **kwargs):
+        data = self.ops.free_blocks(network_id, prefixlen)
+        self.oc.handle(data, **kwargs)
+
     def clone_config(self, config_id, deployment_id, **kwargs):
         data = self.ops.clone_config(config_id, deployment_id)
         self.oc.handle(data, **kwargs)
 
-    def clone_deployment(self, deployment_id, deployment_target_id, resource=None, command=None, version=None, **kwargs):
-        data = self.ops.clone_deployment(deployment_id, deployment_target_id, version)
+    def clone_deployment(self, deployment_id, deployment_target_id, resource=None, command=None, tag=None, **kwargs):
+        data = self.ops.clone_deployment(deployment_id, deployment_target_id, tag)
         self.oc.handle(data, **kwargs)
 
     def clone_nodegroup(self, resource_id, name, **kwargs):
@@ -78,16 +94,16 @@ class QCLIController:
         data = self.ops.delete(resource, resource_id)
         self.oc.handle(data, **kwargs)
 
-    def promote(self, resource, srcid, dstid, **kwargs):
-        data = self.ops.promote(srcid, dstid)
+    def promote(self, resource, srcid, dstid=None, query=None, dry_run=False, **kwargs):
+        data = self.ops.promote(srcid, dstid, query, dry_run)
         self.oc.handle(data, **kwargs)
 
     def set_field(self, resource, resource_id, field, value, **kwargs):
         data = self.ops.set_field(resource, resource_id, field, value)
         self.oc.handle(data, **kwargs)
 
-    def set_version(self, resource_id, version, resource, **kwargs):
-        data = self.ops.set_version(resource, resource_id, version)
+    def set_version(self, resource_id, version, resource, query=None, dry_run=False, **kwargs):
+        data = self.ops.set_version(resource, resource_id, version, query, dry_run)
         self.oc.handle(data, **kwargs)
 
     # =========================================================================
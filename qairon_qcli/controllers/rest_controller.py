@@ -2,14 +2,40 @@ import json
 import logging
 import os
 import re
+import threading
 
 import requests
 from json_stream import streamable_list
-from qairon_qcli.controllers.subnets import SubnetController
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from .completion_cache import CompletionCache, default_path
 from .schema import QaironSchema
 
 
+class PooledSession(requests.Session):
+    """A keep-alive session that applies a default timeout and counts requests."""
+
+    def __init__(self, pool_size, timeout, retries, backoff):
+        super().__init__()
+        self.timeout = timeout
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        # only idempotent methods are retried, POST and PATCH are not
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(502, 503, 504),
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+        self.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        with self._count_lock:
+            self.request_count += 1
+        return super().request(method, url, **kwargs)
+
+
 class RestController:
     # global schema
     schema = QaironSchema()
@@ -20,34 +46,96 @@ class RestController:
         pass
 
     URL = '%s/api/rest/v1/' % endpoint
+    EXPORT_URL = '%s/api/export/v1/' % endpoint
+    OPS_URL = '%s/api/ops/v1/' % endpoint
+    NET_URL = '%s/api/net/v1/' % endpoint
+    BAKE_URL = '%s/api/bake/v1/' % endpoint
     HEADERS = {'Content-Type': 'application/vnd.api+json', 'Accept': 'application/vnd.api+json'}
 
+    # one connection pool shared by every RestController in the process
+    POOL_SIZE = int(os.getenv("QAIRON_POOL_SIZE", 10))
+    TIMEOUT = (float(os.getenv("QAIRON_CONNECT_TIMEOUT", 5)), float(os.getenv("QAIRON_READ_TIMEOUT", 120)))
+    RETRIES = int(os.getenv("QAIRON_RETRIES", 3))
+    BACKOFF = float(os.getenv("QAIRON_RETRY_BACKOFF", 0.3))
+    KEYSET_PAGE_SIZE = 1000
+    _session = None
+    _session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        if RestController._session is None:
+            with RestController._session_lock:
+                if RestController._session is None:
+                    RestController._session = PooledSession(self.POOL_SIZE, self.TIMEOUT, self.RETRIES, self.BACKOFF)
+        return RestController._session
+
+    @classmethod
+    def reset_session(cls):
+        """Drops the connection pool, e.g. in a forked worker that must not share its parent's sockets."""
+        with cls._session_lock:
+            cls._session = None
+
+    @classmethod
+    def request_count(cls):
+        return 0 if cls._session is None else cls._session.request_count
+
+    # tab completion reads ids from an on-disk cache, QAIRON_COMPLETION_CACHE=off disables it
+    _completion_cache = None
+
+    @property
+    def completion_cache(self):
+        path = os.getenv("QAIRON_COMPLETION_CACHE", default_path())
+        if path == 'off':
+            return None
+        if RestController._completion_cache is None or RestController._completion_cache.path != path:
+            RestController._completion_cache = CompletionCache(self, path,
+                                                               float(os.getenv("QAIRON_COMPLETION_TTL", 300)))
+        return RestController._completion_cache
+
+    def __invalidate_completions__(self, path):
+        cache = self.completion_cache
+        if cache is not None:
+            cache.invalidate(path)
+
     def add_to_many_to_many(self, owner_res, owner_res_id, singular_resource, plural_resource, col_res_id):
-        owner = self._get_all_(owner_res, owner_res_id, path=plural_resource)
-        collection = dict()
-        collection['data'] = []
-        for wrapper in owner:
-            for wraps in wrapper:
-                collection['data'].append({'id': wraps['id'], 'type': singular_resource})
-        collection['data'].append({'type': singular_resource, 'id': col_res_id})
-        response = self._put_rest_(owner_res, owner_res_id, plural_resource, json=collection)
+        # JSON:API relationship POST appends to the collection server side, no read-modify-write
+        linkage = {'data': [{'type': singular_resource, 'id': x} for x in self.__as_list__(col_res_id)]}
+        response = self._post_rest_(owner_res, owner_res_id + '/relationships/' + plural_resource, json=linkage)
+        self.__invalidate_completions__('%s/%s/%s' % (owner_res, owner_res_id, plural_resource))
         if response.status_code == 204:
             return self.get_field(owner_res, owner_res_id, plural_resource)
 
     def del_from_many_to_many(self, owner_res, owner_res_id, singular_resource, plural_resource, col_res_id):
-        owner = self._get_all_(owner_res, owner_res_id, path=plural_resource)
-        collection = dict()
-        for wrapper in owner:
-            collection['data'] = list(filter(lambda x: x.get('id') != col_res_id, wrapper))
-        response = self._put_rest_(owner_res, owner_res_id, plural_resource, json=collection)
+        linkage = {'data': [{'type': singular_resource, 'id': x} for x in self.__as_list__(col_res_id)]}
+        response = self._delete_rest_(owner_res, owner_res_id + '/relationships/' + plural_resource, json=linkage)
+        self.__invalidate_completions__('%s/%s/%s' % (owner_res, owner_res_id, plural_resource))
         if response.status_code == 204:
             return self.get_field(owner_res, owner_res_id, plural_resource)
 
+    # rows are the association table's foreign keys, e.g. {'service_id': ..., 'repo_id': ...}
+    def bulk_associate(self, association, rows):
+        resources = [{'type': association, 'attributes': row} for row in rows]
+        return self._post_rest_(association, '_bulk', json={'data': resources})
+
+    def bulk_dissociate(self, association, rows):
+        resources = [{'type': association, 'attributes': row} for row in rows]
+        return self._delete_rest_(association, '_bulk', json={'data': resources})
+
+    @staticmethod
+    def __as_list__(ids):
+        return [ids] if isinstance(ids, str) else list(ids)
+
     def resource_get_search(self, prefix, resource):
-        return self._get_search_(prefix, resource=resource)
+        cache = self.completion_cache
+        if cache is None:
+            return self._get_search_(prefix, resource=resource)
+        return cache.search(prefix, resource)
 
     def resource_get_attr_search(self, prefix, parsed_args, resource, attribute):
-        return self._get_attr_search_(prefix, parsed_args, resource=resource, attribute=attribute)
+        cache = self.completion_cache
+        if cache is None:
+            return self._get_attr_search_(prefix, parsed_args, resource=resource, attribute=attribute)
+        return cache.attr_search(prefix, resource, parsed_args.owner_id, attribute)
 
     def __collection_for_resource_completer__(self, prefix, parsed_args, plural):
         results = self._get_members_of_collection_(prefix, parsed_args, plural)
@@ -82,9 +170,9 @@ class RestController:
             'Accept': 'application/vnd.api+json',
             'Content-Type': 'application/vnd.api+json'
         }
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url, headers=headers)
         assert response.status_code == 200
-        results = requests.get(url, headers=headers).json()
+        results = response.json()
         if 'data' not in results:
             exit(255)
         else:
@@ -92,16 +180,47 @@ class RestController:
             ids = [x['id'] for x in objs]
             return ids
 
+    def clone_deployment(self, deployment_id, deployment_target_id, tag=None):
+        body = {'deployment_target_id': deployment_target_id}
+        if tag is not None:
+            body['tag'] = tag
+        response = self.session.post(self.OPS_URL + 'deployment/%s/clone' % deployment_id, json=body,
+                                     headers=self.HEADERS)
+        self.__invalidate_completions__('deployment')
+        return response
+
+    def promote(self, filters, source=None, build_id=None, dry_run=False):
+        body = {'filter': filters, 'dry_run': dry_run}
+        if source is not None:
+            body['source'] = source
+        if build_id is not None:
+            body['build_id'] = build_id
+        return self.session.post(self.OPS_URL + 'deployment/_promote', json=body, headers=self.HEADERS)
+
     def allocate_subnet(self, network_id, additional_mask_bits, name):
+        body = {'additional_mask_bits': int(additional_mask_bits)}
+        if isinstance(name, str):
+            body['name'] = name
+        else:
+            body['names'] = list(name)
+        response = self.session.post(self.NET_URL + 'network/%s/allocate' % network_id, json=body,
+                                     headers=self.HEADERS)
+        self.__invalidate_completions__('subnet')
+        return response
+
+    def cidr_contains(self, resource, address):
+        return self.session.get(self.NET_URL + resource + '/_contains', params={'ip': address}, headers=self.HEADERS)
+
+    def cidr_overlaps(self, resource, cidr):
+        return self.session.get(self.NET_URL + resource + '/_overlaps', params={'cidr': cidr}, headers=self.HEADERS)
 
-        # s = Subnet()
-        subnet = dict()
-        subc = SubnetController(network_id)
-        subnet['resource'] = 'subnet'
-        subnet['network_id'] = network_id
-        subnet['name'] = name
-        subnet['cidr'] = subc.allocate_subnet(additional_mask_bits, name)
-        return self.create_resource(subnet)
+    def free_blocks(self, network_id, prefixlen):
+        return self.session.get(self.NET_URL + 'network/%s/free' % network_id, params={'prefixlen': prefixlen},
+                                headers=self.HEADERS)
+
+    def bake_context(self, deployment_id, build_id=None):
+        params = {'build': build_id} if build_id is not None else {}
+        return self.session.get(self.BAKE_URL + 'context/%s' % deployment_id, params=params, headers=self.HEADERS)
 
     def _get_search_(self, prefix, resource=None):
         url = self.URL + "{resource}".format(resource=resource)
@@ -111,7 +230,7 @@ class RestController:
         }
         filters = [dict(name='id', op='like', val=str(prefix) + '%')]
         params = {'filter[objects]': json.dumps(filters)}
-        response = requests.get(url, params=params, headers=headers)
+        response = self.session.get(url, params=params, headers=headers)
         assert response.status_code == 200
         results = response.json()
         if 'data' not in results:
@@ -129,9 +248,9 @@ class RestController:
         }
         filters = [dict(name='id', op='like', val=str(prefix) + '%')]
         params = {'filter[objects]': json.dumps(filters)}
-        response = requests.get(url, params=params, headers=headers)
+        response = self.session.get(url, params=params, headers=headers)
         assert response.status_code == 200
-        results = requests.get(url, headers=headers).json()
+        results = response.json()
         if 'data' not in results:
             exit(255)
         else:
@@ -145,7 +264,7 @@ class RestController:
             res_url += '/' + resource_id
         if field is not None:
             res_url += '/' + field
-        response = requests.get(res_url, headers=headers)
+        response = self.session.get(res_url, headers=headers)
         return response
 
     def create_complete_application(self, args_dict):
@@ -181,22 +300,33 @@ class RestController:
         #             post_data[opt] = args_dict[opt]
 
         data_post_data = {'data': {'attributes': post_data, 'type': args_dict['resource']}}
-        return self._post_rest_(args_dict['resource'], json=data_post_data)
+        response = self._post_rest_(args_dict['resource'], json=data_post_data)
+        self.__invalidate_completions__(args_dict['resource'])
+        return response
+
+    def bulk_create_resources(self, resource, resources, upsert=False):
+        # resources are JSON:API resource objects, inserted server side in one transaction
+        params = {'upsert': 'true'} if upsert else {}
+        response = self._post_rest_(resource, '_bulk', json={'data': resources}, params=params)
+        self.__invalidate_completions__(resource)
+        return response
 
-    def _delete_rest_(self, resource, resource_id, headers=HEADERS):
+    def _delete_rest_(self, resource, resource_id, json=None, headers=HEADERS):
         res_url = self.URL + resource
         if resource_id is not None:
             res_url += '/' + resource_id
-        return requests.delete(res_url, headers=headers)
+        return self.session.delete(res_url, json=json, headers=headers)
 
     def delete_resource(self, resource, resource_id):
-        return self._delete_rest_(resource, resource_id)
+        response = self._delete_rest_(resource, resource_id)
+        self.__invalidate_completions__(resource)
+        return response
 
     def _post_rest_(self, resource, resource_id=None, data=None, json=None, params={}, headers=HEADERS):
         res_url = self.URL + resource
         if resource_id is not None:
             res_url += '/' + resource_id
-        return requests.post(res_url, data=data, json=json, params=params, headers=headers)
+        return self.session.post(res_url, data=data, json=json, params=params, headers=headers)
 
     def patch_resource(self, resource, resource_id, json={}, **kwargs):
         return self._patch_rest_(resource, resource_id, data=None, json=json)
@@ -208,13 +338,13 @@ class RestController:
         res_url = self.URL + resource
         if resource_id is not None:
             res_url += '/' + resource_id
-        return requests.patch(res_url, data, json=json, params=params, headers=headers)
+        return self.session.patch(res_url, data, json=json, params=params, headers=headers)
 
     def _put_rest_(self, resource, resource_id, collection, data=None, json=None, params={}, headers=HEADERS):
         res_url = self.URL + resource
         if resource_id is not None:
             res_url += '/' + resource_id + '/relationships/' + collection
-        return requests.patch(res_url, data, json=json, params=params, headers=headers)
+        return self.session.patch(res_url, data, json=json, params=params, headers=headers)
 
     def get_instance(self, resource, resource_id):
         response = self._get_record_(resource, resource_id)
@@ -242,24 +372,27 @@ class RestController:
                 res_url += '/' + path
 
         # this section loops through the pages, yielding page (batch of rows) to the caller
-
-        req_params['page[size]'] = 100
-        response = requests.get(res_url, params=req_params, headers=headers)
-        if not (response.status_code >= 200 and response.status_code < 300):
-            logging.error("Server Error: %d - %s" % (response.status_code, response.reason))
-            raise ValueError
+        # top level collections are paged by keyset (page[after]) so a deep page costs the same as the first,
+        # relationship collections still use the server's offset pages
+        req_params = dict(req_params)
+        if resource_id is None:
+            req_params['page[after]'] = ''
+            req_params['page[size]'] = self.KEYSET_PAGE_SIZE
         else:
+            req_params['page[size]'] = 100
+        response = self.session.get(res_url, params=req_params, headers=headers)
+        while True:
+            if not (response.status_code >= 200 and response.status_code < 300):
+                logging.error("Server Error: %d - %s" % (response.status_code, response.reason))
+                raise ValueError
             rdata = response.json()
             if 'data' not in rdata:
                 exit(255)
-            else:
-                data = rdata['data']
-                yield data
-                while ('links' in rdata and rdata['links']['next'] is not None):
-                    response = requests.get(rdata['links']['next'], params=req_params, headers=headers)
-                    rdata = response.json()
-                    data = rdata['data']
-                    yield data
+            yield rdata['data']
+            if 'links' not in rdata or rdata['links'].get('next') is None:
+                break
+            # next links already carry every query parameter
+            response = self.session.get(rdata['links']['next'], headers=headers)
 
     def query(self, resource, query=None, **kwargs):
         return self._query_(resource, query=query, **kwargs)
@@ -276,15 +409,22 @@ class RestController:
 
         return response
 
+    # streams the collection as NDJSON lines, nothing is parsed or held in memory here
+    def export(self, resource, query=None, fields=None):
+        params = dict()
+        if query is not None:
+            params['filter[objects]'] = query
+        if fields:
+            params['fields[%s]' % resource] = ','.join(fields)
+        response = self.session.get(self.EXPORT_URL + resource + '.ndjson', params=params, stream=True)
+        if not (response.status_code >= 200 and response.status_code < 300):
+            logging.error("Server Error: %d - %s" % (response.status_code, response.reason))
+            raise ValueError
+        response.encoding = 'utf-8'
+        return (line for line in response.iter_lines(decode_unicode=True) if line)
+
     def qairon_wrapped_deployment_search(self, prefix, parsed_args):
         return self._get_search_(prefix, 'deployment')
 
-    def _clone_config_for_dep_clone_(self, configs, new_dep_id):
-        for config in configs:
-            config.pop('id')
-            config['deployment_id'] = new_dep_id
-            config['resource'] = 'config'
-            self.create_resource(config)
-
     def _paginate_(self, result):
         pass
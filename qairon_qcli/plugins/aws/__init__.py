@@ -1 +0,0 @@
-from qairon_qcli.plugins.aws.cli import COMMANDS
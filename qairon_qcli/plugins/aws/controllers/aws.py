@@ -1,4 +1,5 @@
 import json
+import threading
 
 from boto3 import session
 
@@ -6,14 +7,30 @@ from qairon_qcli.controllers import RestController
 
 rest = RestController()
 
+# the most secrets one BatchGetSecretValue call takes
+SECRET_BATCH_SIZE = 20
+
+_secrets_client = None
+_secrets_client_lock = threading.Lock()
+
+
+def secrets_client():
+    """
+    one Secrets Manager client per process, boto3 honours AWS_ENDPOINT_URL, e.g. to point it at a moto server
+    """
+    global _secrets_client
+    if _secrets_client is None:
+        with _secrets_client_lock:
+            if _secrets_client is None:
+                _secrets_client = session.Session().client('secretsmanager')
+    return _secrets_client
+
 
 def __update_secret__(secret_id, secret_value, secret_tag, kms_key_alias):
     """
     update a secret for a deployment
     """
 
-    boto_sess = session.Session()
-    secrets_client = boto_sess.client("secretsmanager")
     kwargs = {"SecretId": secret_id}
 
     if isinstance(secret_value, str):
@@ -24,7 +41,7 @@ def __update_secret__(secret_id, secret_value, secret_tag, kms_key_alias):
     if kms_key_alias is not None:
         kwargs["KmsKeyId"] = kms_key_alias
 
-    response = secrets_client.update_secret(**kwargs)
+    response = secrets_client().update_secret(**kwargs)
     # create a new config object and attach it to the deployment for
     # the short-name:long-name mapping
     return response
@@ -35,10 +52,49 @@ def __fqsn__(deployment_id, secret_name):
 
 
 def __get_secret_id__(deployment_id, secret_name) -> object:
-    wrapper = rest.query('deployment_config', query='[{"and":[{"name": "deployment_id", "op":"eq", "val": "%s"}, {"name":"config_template_id", "op":"eq", "val":"secret_name_map_item"}, {"name":"name", "op":"eq", "val":"%s"}]}]' % (deployment_id, secret_name))
-    for configs in wrapper:
-        secret_id = json.loads(configs[0]['attributes']['config'])[secret_name]
-    return secret_id
+    return __get_secret_ids__(deployment_id, [secret_name])[secret_name]
+
+
+def __get_secret_ids__(deployment_id, secret_names, missing_ok=False):
+    """
+    secret ids of a deployment's secret names, all looked up with one query, names without one are left out
+    when missing_ok
+    """
+    query = [{'and': [{'name': 'deployment_id', 'op': 'eq', 'val': deployment_id},
+                      {'name': 'config_template_id', 'op': 'eq', 'val': 'secret_name_map_item'},
+                      {'name': 'name', 'op': 'in', 'val': sorted(set(secret_names))}]}]
+    secret_ids = dict()
+    for configs in rest.query('deployment_config', query=json.dumps(query)):
+        for config in configs:
+            name = config['attributes']['name']
+            secret_ids[name] = json.loads(config['attributes']['config'])[name]
+    missing = [name for name in secret_names if name not in secret_ids]
+    if missing and not missing_ok:
+        raise ValueError('No secret named %s for deployment %s' % (', '.join(missing), deployment_id))
+    return secret_ids
+
+
+def __batch_get_secret_values__(secret_ids, missing_ok=False):
+    """
+    secret values by id, SECRET_BATCH_SIZE secrets per BatchGetSecretValue call, secrets that cannot be read are
+    left out when missing_ok
+    """
+    client = secrets_client()
+    values = dict()
+    for i in range(0, len(secret_ids), SECRET_BATCH_SIZE):
+        kwargs = {'SecretIdList': secret_ids[i:i + SECRET_BATCH_SIZE]}
+        while True:
+            response = client.batch_get_secret_value(**kwargs)
+            for error in response.get('Errors', []):
+                if missing_ok:
+                    continue
+                raise ValueError('%s: %s' % (error['SecretId'], error.get('Message', error.get('ErrorCode'))))
+            for secret in response['SecretValues']:
+                values[secret['Name']] = values[secret['ARN']] = secret
+            if not response.get('NextToken'):
+                break
+            kwargs['NextToken'] = response['NextToken']
+    return values
 
 
 class AwsServiceController:
@@ -69,10 +125,15 @@ class AwsServiceController:
     @staticmethod
     def get_secret_string_for_deployment(deployment_id, secret_name):
         secret_id = __get_secret_id__(deployment_id, secret_name)
-
-        boto_sess = session.Session()
-        client = boto_sess.client(
-            service_name='secretsmanager'
-        )
-        get_secret_value_response = client.get_secret_value(SecretId=secret_id)
+        get_secret_value_response = secrets_client().get_secret_value(SecretId=secret_id)
         return get_secret_value_response
+
+    @staticmethod
+    def get_secret_strings_for_deployment(deployment_id, secret_names, missing_ok=False):
+        """
+        every named secret of a deployment, with one qairon query and one BatchGetSecretValue call per 20 secrets,
+        with missing_ok the names that cannot be read are left out instead of failing the lot
+        """
+        secret_ids = __get_secret_ids__(deployment_id, secret_names, missing_ok)
+        values = __batch_get_secret_values__(sorted(set(secret_ids.values())), missing_ok)
+        return {name: values[secret_id] for name, secret_id in secret_ids.items() if secret_id in values}
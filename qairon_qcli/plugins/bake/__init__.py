@@ -1 +0,0 @@
-from .cli import COMMANDS
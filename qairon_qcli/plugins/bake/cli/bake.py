@@ -1,10 +1,23 @@
-from ..controllers import BakingBuilder
+from qairon_qcli.controllers import PrintingOutputController
+from ..controllers import BakingBuilder, BatchBaker
+from ..controllers.batch import read_manifest
 
 COMMANDS = dict(
     files=[
         {'deployment_id': {'dotters': {'completer': 'deployment_completer'}}},
         {'build_id': {'dotters': {'completer': 'build_completer'}}},
         'release_job_number'
+    ],
+    batch=[
+        'release_job_number',
+        {'--manifest': {'args': {'help': 'JSON array or NDJSON of {"deployment_id": ..., "build_id": ...}'}}},
+        {'--where': {'args': {'dest': 'query', 'help': 'flask-restless filter selecting the deployments'}}},
+        {'--build': {'args': {'dest': 'build_id', 'help': 'build baked for every deployment --where selects'}}},
+        {'--output-dir': {'args': {'dest': 'output_dir', 'default': 'baked',
+                                   'help': 'each deployment is baked into its own directory under this one'}}},
+        {'--workers': {'args': {'help': 'processes baking at once, one per core by default'}}},
+        {'-o': {'args': {'dest': 'output_format'}}},
+        {'-f': {'args': {'dest': 'output_fields', 'action': 'append'}}}
     ]
 )
 
@@ -17,3 +30,15 @@ def files(deployment_id, build_id, release_job_number, resource=None, **kwargs):
     if q is False:
         if result is not None:
             print(result)
+
+
+def batch(release_job_number, manifest=None, query=None, build_id=None, output_dir='baked', workers=None,
+          resource=None, **kwargs):
+    baker = BatchBaker(release_job_number, output_dir, int(workers) if workers else None)
+    jobs = read_manifest(manifest) if manifest else []
+    if query is not None:
+        if build_id is None:
+            raise ValueError('--build is required with --where')
+        jobs += baker.from_query(query, build_id)
+    rows = ({'type': 'bake', 'id': x['deployment_id'], 'attributes': x} for x in baker.bake(jobs))
+    PrintingOutputController().handle(rows, **kwargs)
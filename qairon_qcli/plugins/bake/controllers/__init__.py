@@ -1,2 +1,3 @@
 from .baking import FileBakingController, AbstractBakingController
 from .baking_builder import BakingBuilder
+from .batch import BatchBaker
@@ -1,2 +1,3 @@
 from .abstract_bake import AbstractBakingController
 from .file import FileBakingController
+from .template_engine import JinjaTemplateEngine
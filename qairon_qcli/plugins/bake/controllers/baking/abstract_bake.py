@@ -12,6 +12,8 @@ class AbstractBakingController(ABC):
         self.deployment = metadata.__deployment__
         self.deployment_target = metadata.__deployment_target__
         self.configs = metadata.__configs__
+        self.svc_configs = metadata.__svc_configs__
+        self.output_dir = metadata.output_dir
 
     @abstractmethod
     def bake(self):
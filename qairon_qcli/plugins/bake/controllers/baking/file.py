@@ -2,9 +2,10 @@ import ast
 import json
 import os
 
-from qairon_qcli.controllers.output_controller import simplify_rows
 from qairon_qcli.plugins.aws.controllers import AwsServiceController
 from qairon_qcli.plugins.bake.controllers.baking.abstract_bake import AbstractBakingController
+from qairon_qcli.plugins.bake.controllers.baking.substitution import substitute_file
+from qairon_qcli.plugins.bake.controllers.baking.template_engine import JinjaTemplateEngine
 
 
 class FileBakingController(AbstractBakingController):
@@ -18,9 +19,7 @@ class FileBakingController(AbstractBakingController):
         }
         blob_repo_type = 'ecr'
 
-        repos = simplify_rows(self.rest.get_field('service', self.deployment['service_id'], 'repos'))
-
-        candidate_repos = [repo for repo in repos if repo['type_id'] == blob_repo_type]
+        candidate_repos = [repo for repo in metadata.__repos__ if repo['type_id'] == blob_repo_type]
         # this condition supports old DSL for baking of repo as a single object on the baker
         if len(candidate_repos) == 1:
             self.repo = candidate_repos[0]
@@ -30,10 +29,14 @@ class FileBakingController(AbstractBakingController):
             for repo in candidate_repos:
                 self.repos[repo['id']] = repo
 
-    def bake(self):
-        svc_configs = simplify_rows(self.rest.get_field('service', self.deployment['service_id'], 'configs'))
+        # field values, parsed configs and secrets are worked out once per bake, however many files use them
+        self.resolved = dict()
+        self.parsed_configs = dict()
+        self.secret_names = set()
+        self.secrets = None
 
-        svc_cfg = [svc_cfg for svc_cfg in svc_configs if
+    def bake(self):
+        svc_cfg = [svc_cfg for svc_cfg in self.svc_configs if
                    svc_cfg['template_id'] == 'bake_files' and svc_cfg['name'] == 'default']
         assert len(svc_cfg) == 1
         cfg = svc_cfg[0]['config']
@@ -51,10 +54,17 @@ class FileBakingController(AbstractBakingController):
 
     def create(self, creates_list):
         for instruction in creates_list:
-            with open(instruction['filename'], 'w') as file:
+            with open(self.__output_path__(instruction['filename']), 'w') as file:
                 config = self.__filter_config__(instruction, "in-place")
                 file.write(config[0])
 
+    def __output_path__(self, filename):
+        if self.output_dir is None:
+            return filename
+        path = os.path.join(self.output_dir, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
     def __filter_config__(self, instruction, config_type):
         config = [conf['config'] for conf in self.deployment['configs']
                   if conf['config_template_id'] == config_type and
@@ -62,116 +72,111 @@ class FileBakingController(AbstractBakingController):
         return config
 
     def substition(self, subs_list):
+        self.secret_names.update(field['secret_name'] for instruction in subs_list
+                                 for field in instruction['fields'] if field['type'] == 'aws_secret')
         for instruction in subs_list:
-            output = ''
-            filename = ''
             if os.getenv('LOCAL_DEV'):
                 filename = instruction['filename'] + '.tmpl'
             else:
                 filename = instruction['filename']
-            with open(filename, 'r') as file:
-                output = file.read()
-
+            fields = dict()
             for field in instruction['fields']:
-                value = ''
-                if field['type'] == 'dict_env_var':
-                    jp = os.getenv(field['value']['var'])
-                    try:
-                        job_parameters = json.loads(jp)
-                    except:
-                        job_parameters = ast.literal_eval(jp)
-
-                    parameter = field['value']['parameter']
-                    value = job_parameters[parameter]
-                if field['type'] == 'meta_hash':
-                    object_type = field['value']['object']
-                    key = field['value']['key']
-                    field_name = field['value']['field']
-                    obj = getattr(self, object_type)
-                    value = str(obj[key][field_name])
-                if field['type'] == 'meta':
-                    object_type = field['value']['object']
-                    field_name = field['value']['field']
-                    obj = getattr(self, object_type)
-                    value = str(obj[field_name])
-                if field['type'] == 'one_from_collection':
-                    object_type = field['collection']
-                    data_field = field['data_field']
-                    filters = field['filters']
-                    objs = getattr(self, object_type)
-                    for filter in filters:
-                        objs = [cfg for cfg in objs if cfg[filter['field_name']] == filter['value']]
-                    assert len(objs) == 1
-                    value = objs[0][data_field]
-                if field['type'] == 'template':
-                    data_dict = {
-                        'local': self.local_data,
-                        "deploy_target": self.deployment_target
-                    }
-                    cfgs = getattr(self, 'configs')
-                    template_id = field['template_id']
-                    cfg = [cfg for cfg in cfgs if cfg['template_id'] == template_id][0]
-                    template_string = cfg['config']
-                    templateEngine = JinjaTemplateEngine()
-                    value = templateEngine.render_string(data_dict, template_string)
-                if field['type'] == 'aws_secret':
-                    aws = AwsServiceController()
-                    secret = aws.get_secret_string_for_deployment(self.local_data['deployment_id'],
-                                                                  field['secret_name'])
-                    value = secret['SecretString']
-                if field['type'] == 'config_kv_list':
-                    object_type = field['value']['object']
-                    field_name = field['value']['field']
-                    filter_value = field['value']['filter']
-                    cfgs = getattr(self, object_type)
-                    objs = [cfg for cfg in cfgs if cfg[field_name] == filter_value]
-                    value = ""
-                    x = 0
-                    for cfg_obj in objs:
-                        for k, v in json.loads(cfg_obj['config']).items():
-                            # assume all config kv's get indented
-                            if x > 0:
-                                value += "\n"
-                            value += format("  %s=%s" % (k, v))
-                            x = x + 1
-                elif field['type'] == 'local':
-                    value = self.local_data[field['value']]
-
-                pattern = '%%--%s--%%' % field['name']
-                output = output.replace(pattern, value)
-            with open(instruction['filename'], 'w') as file:
-                file.write(output)
-
-
-
-import jinja2
-
-class JinjaTemplateEngine:
-
-    # Jinja custome functions
-    def _kubernetes_format(self, val):
-        return val.replace(':', '/')
-
-    def _extract_service_name(self, val):
-        return val.split(':')[-2]
-
-    # render method
-    def render_string(self, dict_vals, template_source):
-        inline_functions = {
-            "k8s_fmt": self._kubernetes_format,
-            "srv_name": self._extract_service_name
-        }
-        # Load template from the string
-        TEMPLATE_FILE = "in-memory-bake-string"
-        templateLoader = jinja2.DictLoader({TEMPLATE_FILE: template_source})
-        templateEnv = jinja2.Environment( loader=templateLoader, trim_blocks=True)
-        # Read the template using the environment object.
-        template = templateEnv.get_template( TEMPLATE_FILE )
-        # Register inline functions available in template
-        template.globals.update(inline_functions)
-        # Specify any input variables to the template as a dictionary.
-        templateVars = dict_vals
-        # Process the template to produce our final text.
-        outputText = template.render( templateVars )
-        return outputText
-
+                # the first field of a name wins, as it did when they were replaced one after another
+                fields.setdefault(field['name'], (json.dumps(field, sort_keys=True), field))
+            substitute_file(filename, self.__output_path__(instruction['filename']), self.__replacer__(fields))
+
+    def __replacer__(self, fields):
+        """Replaces a placeholder with its field's value, resolved the first time the field is met in this bake."""
+
+        def replace(match):
+            if match.group(1) not in fields:
+                return match.group(0)
+            key, field = fields[match.group(1)]
+            if key not in self.resolved:
+                self.resolved[key] = self.__resolve__(field)
+            return self.resolved[key]
+
+        return replace
+
+    def __parsed_config__(self, cfg):
+        if cfg['id'] not in self.parsed_configs:
+            self.parsed_configs[cfg['id']] = json.loads(cfg['config'])
+        return self.parsed_configs[cfg['id']]
+
+    def __secret__(self, secret_name):
+        """A secret of the deployment, fetched with every other secret the bake names on first use.
+
+        Fields whose placeholder never occurs name secrets too, those may not
+        exist, so only a secret that is actually used fails the bake.
+        """
+        deployment_id = self.local_data['deployment_id']
+        if self.secrets is None:
+            self.secrets = AwsServiceController.get_secret_strings_for_deployment(deployment_id,
+                                                                                  sorted(self.secret_names),
+                                                                                  missing_ok=True)
+        if secret_name not in self.secrets:
+            raise ValueError('No secret named %s for deployment %s' % (secret_name, deployment_id))
+        return self.secrets[secret_name]
+
+    def __resolve__(self, field):
+        value = ''
+        if field['type'] == 'dict_env_var':
+            jp = os.getenv(field['value']['var'])
+            try:
+                job_parameters = json.loads(jp)
+            except:
+                job_parameters = ast.literal_eval(jp)
+
+            parameter = field['value']['parameter']
+            value = job_parameters[parameter]
+        if field['type'] == 'meta_hash':
+            object_type = field['value']['object']
+            key = field['value']['key']
+            field_name = field['value']['field']
+            obj = getattr(self, object_type)
+            value = str(obj[key][field_name])
+        if field['type'] == 'meta':
+            object_type = field['value']['object']
+            field_name = field['value']['field']
+            obj = getattr(self, object_type)
+            value = str(obj[field_name])
+        if field['type'] == 'one_from_collection':
+            object_type = field['collection']
+            data_field = field['data_field']
+            filters = field['filters']
+            objs = getattr(self, object_type)
+            for filter in filters:
+                objs = [cfg for cfg in objs if cfg[filter['field_name']] == filter['value']]
+            assert len(objs) == 1
+            value = objs[0][data_field]
+        if field['type'] == 'template':
+            data_dict = {
+                'local': self.local_data,
+                "deploy_target": self.deployment_target
+            }
+            cfgs = getattr(self, 'configs')
+            template_id = field['template_id']
+            cfg = [cfg for cfg in cfgs if cfg['template_id'] == template_id][0]
+            template_string = cfg['config']
+            templateEngine = JinjaTemplateEngine()
+            value = templateEngine.render_string(data_dict, template_string)
+        if field['type'] == 'aws_secret':
+            value = self.__secret__(field['secret_name'])['SecretString']
+        if field['type'] == 'config_kv_list':
+            object_type = field['value']['object']
+            field_name = field['value']['field']
+            filter_value = field['value']['filter']
+            cfgs = getattr(self, object_type)
+            objs = [cfg for cfg in cfgs if cfg[field_name] == filter_value]
+            value = ""
+            x = 0
+            for cfg_obj in objs:
+                for k, v in self.__parsed_config__(cfg_obj).items():
+                    # assume all config kv's get indented
+                    if x > 0:
+                        value += "\n"
+                    value += format("  %s=%s" % (k, v))
+                    x = x + 1
+        elif field['type'] == 'local':
+            value = self.local_data[field['value']]
+        return value
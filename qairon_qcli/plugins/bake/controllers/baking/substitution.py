@@ -0,0 +1,61 @@
+import os
+import re
+import shutil
+import tempfile
+
+# %--name--%, the placeholder the file baker fills in, names hold neither % nor whitespace
+PLACEHOLDER = re.compile(r'%--([^%\s]+?)--%')
+# the end of a chunk that may still grow into a placeholder
+PARTIAL = re.compile(r'%(?:-(?:-[^%\s]*)?)?$')
+
+# characters read at a time
+CHUNK_SIZE = 1 << 20
+
+# longest placeholder held back at the end of a chunk waiting for its closer
+MAX_PLACEHOLDER = 1024
+
+
+def __held__(tail):
+    """Where the part of ``tail`` that may be the start of a placeholder begins, its length when there is none."""
+    partial = PARTIAL.search(tail, max(0, len(tail) - MAX_PLACEHOLDER))
+    return partial.start() if partial else len(tail)
+
+
+def substitute(read, write, replace, chunk_size=CHUNK_SIZE):
+    """Replaces every placeholder in one pass over the chunks ``read`` returns.
+
+    ``replace`` gets each match and returns its replacement, so values are
+    only worked out for placeholders that actually occur.  Whatever follows
+    the last placeholder of a chunk and could begin another one is held back
+    until the next chunk arrives.
+    """
+    pending = ''
+    while True:
+        chunk = read(chunk_size)
+        text = pending + chunk
+        position = 0
+        for match in PLACEHOLDER.finditer(text):
+            write(text[position:match.start()])
+            write(replace(match))
+            position = match.end()
+        if not chunk:
+            write(text[position:])
+            return
+        cut = position + __held__(text[position:])
+        write(text[position:cut])
+        pending = text[cut:]
+
+
+def substitute_file(source, destination, replace, chunk_size=CHUNK_SIZE):
+    """Substitutes ``source`` into ``destination``, which may be the same file; it is replaced once complete."""
+    directory = os.path.dirname(os.path.abspath(destination))
+    with open(source, 'r') as reader, tempfile.NamedTemporaryFile('w', dir=directory, delete=False) as writer:
+        try:
+            substitute(reader.read, writer.write, replace, chunk_size)
+        except BaseException:
+            writer.close()
+            os.unlink(writer.name)
+            raise
+    # a baked file keeps the mode of the one it replaces, or of its template
+    shutil.copymode(destination if os.path.exists(destination) else source, writer.name)
+    os.replace(writer.name, destination)
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import jinja2
+from jinja2.sandbox import SandboxedEnvironment
+
+from qairon_qcli.controllers.completion_cache import default_path as completion_cache_path
+
+# compiled templates kept per process
+TEMPLATE_CACHE_SIZE = 256
+
+# opt in to rendering templates in Jinja's sandbox
+SANDBOXED = 'QAIRON_JINJA_SANDBOX' in os.environ
+
+
+def default_bytecode_path():
+    return os.path.join(os.path.dirname(completion_cache_path()), 'jinja')
+
+
+def bytecode_cache(path=None):
+    """The on-disk bytecode cache shared by every bake, ``QAIRON_JINJA_CACHE`` sets its directory or ``off``."""
+    path = path if path is not None else os.getenv('QAIRON_JINJA_CACHE', default_bytecode_path())
+    if path == 'off':
+        return None
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError:
+        return None
+    return jinja2.FileSystemBytecodeCache(path)
+
+
+class SourceLoader(jinja2.BaseLoader):
+    """Hands Jinja the source of the template being compiled, named by its hash."""
+
+    def __init__(self):
+        self.sources = dict()
+
+    def get_source(self, environment, name):
+        if name not in self.sources:
+            raise jinja2.TemplateNotFound(name)
+        return self.sources[name], None, lambda: True
+
+
+def _kubernetes_format(val):
+    return val.replace(':', '/')
+
+
+def _extract_service_name(val):
+    return val.split(':')[-2]
+
+
+class JinjaTemplateEngine:
+    """Renders ``template`` fields with one Jinja environment per process.
+
+    Compiled templates are kept in an LRU keyed by a hash of their source, so
+    the same template config baked for many deployments compiles once, and
+    what does get compiled goes through a bytecode cache on disk, so the
+    next bake starts warm too.  The sandboxed environment, enabled with
+    ``QAIRON_JINJA_SANDBOX`` or per engine, shares both caches.
+    """
+
+    _environments = dict()
+    _templates = OrderedDict()
+    _lock = threading.RLock()
+
+    def __init__(self, sandboxed=None):
+        self.sandboxed = SANDBOXED if sandboxed is None else sandboxed
+
+    @classmethod
+    def environment(cls, sandboxed=False):
+        with cls._lock:
+            if sandboxed not in cls._environments:
+                shared = next(iter(cls._environments.values()), None)
+                environment_class = SandboxedEnvironment if sandboxed else jinja2.Environment
+                # templates are cached here, by source, rather than by name in the environment
+                environment = environment_class(loader=SourceLoader(), trim_blocks=True, cache_size=0,
+                                                bytecode_cache=shared.bytecode_cache if shared else bytecode_cache())
+                environment.globals.update(k8s_fmt=_kubernetes_format, srv_name=_extract_service_name)
+                cls._environments[sandboxed] = environment
+            return cls._environments[sandboxed]
+
+    def template(self, template_source):
+        key = (self.sandboxed, hashlib.sha256(template_source.encode()).hexdigest())
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                return template
+            environment = self.environment(self.sandboxed)
+            environment.loader.sources[key[1]] = template_source
+            try:
+                template = environment.get_template(key[1])
+            finally:
+                del environment.loader.sources[key[1]]
+            self._templates[key] = template
+            while len(self._templates) > TEMPLATE_CACHE_SIZE:
+                self._templates.popitem(last=False)
+        return template
+
+    # render method
+    def render_string(self, dict_vals, template_source):
+        return self.template(template_source).render(dict_vals)
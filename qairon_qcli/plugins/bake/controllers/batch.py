@@ -0,0 +1,74 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from qairon_qcli.controllers import RestController
+
+from .baking_builder import BakingBuilder
+
+
+def read_manifest(path):
+    """(deployment_id, build_id) pairs from a JSON array or NDJSON file of ``{"deployment_id", "build_id"}`` objects."""
+    with open(path) as file:
+        text = file.read()
+    if text.lstrip().startswith('['):
+        rows = json.loads(text)
+    else:
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [(row['deployment_id'], row['build_id']) for row in rows]
+
+
+def output_dir_for(output_root, deployment_id):
+    return os.path.join(output_root, str(deployment_id).replace(':', '-'))
+
+
+def __reset_worker__():
+    # a forked worker must not share the parent's sockets
+    RestController.reset_session()
+
+
+def bake_one(deployment_id, build_id, release_job_number, output_dir):
+    """Bakes one deployment into ``output_dir`` and reports how it went, never raises."""
+    started = time.perf_counter()
+    result = {'deployment_id': deployment_id, 'build_id': build_id, 'output_dir': output_dir, 'status': 'baked',
+              'error': None}
+    try:
+        BakingBuilder(deployment_id, build_id, release_job_number, output_dir=output_dir).build().bake()
+    except Exception as e:
+        result.update(status='failed', error='%s: %s' % (type(e).__name__, e))
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+class BatchBaker:
+    """Bakes many deployments at once in a pool of processes.
+
+    Every deployment is baked from the templates in the current directory
+    into its own directory under ``output_root``, named after its id.
+    Workers are started once and reused, so a release train pays Python
+    startup and plugin discovery per core rather than per deployment.  One
+    failing deployment does not stop the others; each one is reported with
+    its status and timing as it finishes.
+    """
+
+    def __init__(self, release_job_number, output_root='baked', workers=None, rest=None):
+        self.release_job_number = release_job_number
+        self.output_root = output_root
+        self.workers = workers or os.cpu_count()
+        self.rest = rest or RestController()
+
+    def from_query(self, query, build_id):
+        """Every deployment matching a Flask-Restless filter, all baked with ``build_id``."""
+        return [(row['id'], build_id) for batch in self.rest.query('deployment', query) for row in batch]
+
+    def bake(self, jobs):
+        """Yields one result per ``(deployment_id, build_id)`` as it finishes."""
+        if not jobs:
+            return
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs)), initializer=__reset_worker__) as pool:
+            futures = [pool.submit(bake_one, deployment_id, build_id, self.release_job_number,
+                                   output_dir_for(self.output_root, deployment_id))
+                       for deployment_id, build_id in jobs]
+            for future in as_completed(futures):
+                yield future.result()
@@ -8,8 +8,17 @@ COMMANDS = dict(
         {'dependency_id': {'dotters': {'completer': 'dependency_completer'}}},
         {'-o': {'args': {'dest': 'output_format'}}},
         {'-f': {'args': {'dest': 'output_fields', 'action': 'append'}}}
+    ],
+    walk=[
+        {'node': {'args': {'help': '<type>:<object_id>, e.g. Deployment:<deployment_id>'}}},
+        {'--direction': {'args': {'choices': ['down', 'up'], 'default': 'down',
+                                  'help': 'down: what node depends on, up: what depends on node'}}},
+        {'--max-depth': {'args': {'dest': 'max_depth'}}},
+        {'--relatable-type': {'args': {'dest': 'relatable_types', 'action': 'append'}}},
+        {'--related-type': {'args': {'dest': 'related_types', 'action': 'append'}}},
+        {'-o': {'args': {'dest': 'output_format'}}},
+        {'-f': {'args': {'dest': 'output_fields', 'action': 'append'}}}
     ]
-
 )
 
 
@@ -18,3 +27,10 @@ def get_related(dependency_id, **kwargs):
     dep_con = DependencyController()
     rows = dep_con.get_related(dependency_id)
     oc.handle(rows, **kwargs)
+
+
+def walk(node, direction='down', max_depth=None, relatable_types=None, related_types=None, **kwargs):
+    oc = PrintingOutputController()
+    dep_con = DependencyController()
+    rows = dep_con.walk(node, direction, max_depth, relatable_types, related_types)
+    oc.handle(rows, **kwargs)
@@ -1,7 +1,11 @@
 import json
 
+from json_stream import streamable_list
+
 from qairon_qcli.controllers import RestController
-from qairon_qcli.controllers.output_controller import simplify_row
+from qairon_qcli.controllers.rest_controller import endpoint
+
+URL = '%s/api/dependencies/v1/' % endpoint
 
 
 class CardinalityException(Exception):
@@ -15,14 +19,31 @@ class DependencyController:
     def __init__(self):
         self.rest = RestController()
 
+    @streamable_list
     def get_related(self, dependency_id):
-        results = []
-        filters = [dict(name='dependency_id', op='eq', val=dependency_id)]
-        rows =  self.rest.query('related', query=json.dumps(filters))
-        for row in rows:
-            newrow = simplify_row(row[0])
-            obj = self.rest.get_instance(newrow['related_type'].lower(), newrow['object_id'])
-            results.append(obj)
-        return results
-
-
+        # one request, the server resolves the objects with one IN query per related_type
+        response = self.rest.session.get(URL + 'dependency/%s/related.ndjson' % dependency_id, stream=True)
+        if response.status_code != 200:
+            raise ValueError(response.json()['errors'][0]['detail'])
+        response.encoding = 'utf-8'
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                yield json.loads(line)
+
+    @streamable_list
+    def walk(self, node, direction='down', max_depth=None, relatable_types=None, related_types=None):
+        """Everything ``node`` depends on transitively, or with ``direction='up'`` everything depending on it."""
+        params = {'direction': direction}
+        if max_depth is not None:
+            params['max_depth'] = max_depth
+        if relatable_types:
+            params['relatable_type'] = ','.join(relatable_types)
+        if related_types:
+            params['related_type'] = ','.join(related_types)
+        response = self.rest.session.get(URL + 'node/%s/walk.ndjson' % node, params=params, stream=True)
+        if response.status_code != 200:
+            raise ValueError(response.json()['errors'][0]['detail'])
+        response.encoding = 'utf-8'
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                yield json.loads(line)
@@ -2,6 +2,7 @@
 # PYTHON_ARGCOMPLETE_OK
 import importlib
 import logging
+import os
 import sys
 
 from qairon_qcli.controllers import CLIArgs
@@ -9,7 +10,6 @@ from qairon_qcli.controllers import PrintingOutputController
 from qairon_qcli.controllers import QCLIController
 from qairon_qcli.controllers import QaironSchema
 from qairon_qcli.controllers import RestController
-from qairon_qcli.lib import dynamic
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
@@ -24,8 +24,8 @@ def _main_():
         qaironargs = CLIArgs(rest)
 
         (args, junk) = qaironargs.parse_args()
-        commands = ['delete', 'get', 'get_version', 'list', 'promote', 'query', 'get_field', 'get_field_query',
-                    'set_field']
+        commands = ['delete', 'export', 'get', 'get_version', 'list', 'promote', 'query', 'get_field', 'get_field_query',
+                    'set_field', 'contains', 'overlaps', 'free_blocks']
         if hasattr(args, 'resource'):
             if args.resource in QaironSchema.MODELS:
                 if hasattr(args, 'command'):
@@ -60,27 +60,30 @@ def _main_():
                         if args.command == 'assign_repo':
                             args_dict = vars(args)
                             args_dict['items'] = 'repos'
-                            cli.add_to_collection(**args_dict)
+                            cli.add_to_collection(singular_resource='repo', **args_dict)
                         elif args.command == 'unassign_repo':
                             args_dict = vars(args)
                             args_dict['items'] = 'repos'
-                            cli.del_from_collection(**args_dict)
+                            cli.del_from_collection(singular_resource='repo', **args_dict)
                     elif args.resource == 'test':
                         cli.test(args)
             else:
                 potential_plugin_name = args.resource
-                plugins_with_cli = dynamic.plugin_has_module('cli', 'qairon_qcli.plugins')
-                if potential_plugin_name in plugins_with_cli:
-                    plugin = qaironargs.discovered_plugins[potential_plugin_name]
-                    module = importlib.import_module("%s.%s.%s" % (plugin.__name__, 'cli', potential_plugin_name))
+                plugin_commands = qaironargs.plugin_commands
+                if potential_plugin_name in plugin_commands:
+                    # the plugin, and whatever it imports, is only loaded to run one of its commands
+                    module = importlib.import_module("qairon_qcli.plugins.%s.cli.%s" % (potential_plugin_name,
+                                                                                       potential_plugin_name))
 
-
-                    if args.command in plugin.COMMANDS.keys():
+                    if args.command in plugin_commands[potential_plugin_name].keys():
                         command = args.command
                         getattr(module, command)(**vars(args))
     except Exception as e:
         logger.error(e)
         exit(255)
+    finally:
+        if os.getenv('QAIRON_REQUEST_STATS'):
+            sys.stderr.write('qcli: %d requests\n' % RestController.request_count())
 
 
 if __name__ == '__main__':
@@ -3,8 +3,8 @@
 from setuptools import setup, find_packages
 
 install_requires = ["argcomplete==2.0.0",
-                    "boto3==1.26.5",
-                    "botocore==1.29.5",
+                    "boto3==1.33.0",
+                    "botocore==1.33.0",
                     "certifi==2022.9.24",
                     "chardet==5.0.0",
                     "click==8.1.3",
@@ -18,7 +18,7 @@ install_requires = ["argcomplete==2.0.0",
                     "MarkupSafe==2.1.1",
                     "python-dateutil==2.8.2",
                     "requests==2.28.1",
-                    "s3transfer==0.6.0",
+                    "s3transfer==0.8.0",
                     "six==1.16.0",
                     "urllib3==1.26.12",
                     "Werkzeug==2.2.2",
@@ -40,7 +40,7 @@ setup(
     entry_points = {
         'console_scripts': ['qcli=qairon_qcli.qcli:_main_']
     },
-    packages=find_packages(exclude=("features", "features.*", "models", "views", "views.*", "serializers" ,"serializers.*", "converters", "converters.*")),
+    packages=find_packages(exclude=("features", "features.*", "models", "views", "views.*", "serializers" ,"serializers.*", "converters", "converters.*", "api", "api.*")),
     scripts=['qairon_qcli/qcli.py'],
     zip_safe=False,
     include_package_data=True,
@@ -1,4 +1,6 @@
 from flask_admin.contrib.sqla import ModelView
+from flask_admin.contrib.sqla.form import AdminModelConverter
+from flask_admin.model.form import converts
 
 
 @property
@@ -7,9 +9,18 @@ def column_exclude_list(self):
     return c
 
 
+class ModelConverter(AdminModelConverter):
+
+    # defaults are edited as text whether they are stored as text or jsonb
+    @converts('models.defaults.Defaults')
+    def conv_Defaults(self, field_args, **extra):
+        return self.conv_Text(field_args, **extra)
+
+
 class DefaultView(ModelView):
     can_view_details = True
     form_excluded_columns = column_exclude_list
+    model_form_converter = ModelConverter
     column_searchable_list = ['id']
     column_sortable_list = ['id']
     list_display_pk = True